@@ -0,0 +1,110 @@
+"""Микробенчмарк кодека вебсокетов: старый путь через stdlib json против websocket.codec.
+
+Запуск из корня репозитория:
+    python benchmarks/codec_benchmark.py [--participants 500]
+
+Для каждого сообщения печатается время на одно сообщение и процессорное время в секунду
+при нагрузке интерактива: каждый участник присылает ответ раз в секунду, а каждый тик
+сервер отправляет кадр каждому участнику."""
+import argparse
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from websocket.codec import dumps, encode_model  # noqa: E402
+from websocket.frames import encode_fields, splice  # noqa: E402
+from websocket.schemas import ParticipantSent, LeaderSent, StageWaiting, DataStageWaiting, DataPause, \
+    StatePause, ScoreStageEnd, Stage  # noqa: E402
+
+ANSWER_TEXT = '{"answer_text": "Московский государственный университет"}'
+ANSWER_IDS = '{"answer_ids": [101, 102, 105]}'
+LEADER = '{"hide": 4242}'
+
+WAITING = StageWaiting(
+    stage=Stage.WAITING,
+    data=DataStageWaiting(
+        title="Квиз по истории",
+        description="Вопросы о важных событиях XX века " * 4,
+        code="123456",
+        participants_active=500
+    ),
+    pause=DataPause(state=StatePause.no, timer_n=0)
+)
+DELTA = {
+    "type": "delta",
+    "stage": "question",
+    "server_time": 1760000000000,
+    "changes": {"data": {"participants_active": 501}, "pause": {"state": "no"}},
+}
+CHECKPOINT_RESULTS = {
+    "scoreboard": [[i, i * 7, f"Участник {i}", False, i * 10, i * 3] for i in range(500)],
+    "selected": {i: [101, 102] for i in range(500)},
+}
+
+
+def stdlib_receive(raw: str, schema):
+    return schema(**json.loads(raw))
+
+
+def codec_receive(raw: str, schema):
+    return schema.model_validate_json(raw)
+
+
+def stdlib_envelope(base: str) -> str:
+    fields = ",".join(
+        f"{json.dumps(k)}:{json.dumps(v, ensure_ascii=False, separators=(',', ':'))}"
+        for k, v in {"rank": 17, "total": 500}.items()
+    )
+    return base[:-1] + "," + fields + "}"
+
+
+CASES = [
+    # (имя, старый путь, новый путь, сообщений в секунду на одного участника)
+    ("receive ParticipantSent text",
+     lambda: stdlib_receive(ANSWER_TEXT, ParticipantSent),
+     lambda: codec_receive(ANSWER_TEXT, ParticipantSent), 1),
+    ("receive ParticipantSent ids",
+     lambda: stdlib_receive(ANSWER_IDS, ParticipantSent),
+     lambda: codec_receive(ANSWER_IDS, ParticipantSent), 1),
+    ("receive LeaderSent",
+     lambda: stdlib_receive(LEADER, LeaderSent),
+     lambda: codec_receive(LEADER, LeaderSent), 0),
+    ("send StageWaiting",
+     lambda: json.dumps(WAITING.model_dump(mode="json")),
+     lambda: encode_model(WAITING), 0),
+    ("send delta",
+     lambda: json.dumps(DELTA, ensure_ascii=False, separators=(",", ":")),
+     lambda: dumps(DELTA), 1),
+    ("send participant envelope",
+     lambda: stdlib_envelope('{"stage":"end"}'),
+     lambda: splice('{"stage":"end"}', encode_fields(score=ScoreStageEnd(position=17, score=40, time=93))), 1),
+    ("checkpoint results (500 rows)",
+     lambda: json.dumps(CHECKPOINT_RESULTS, ensure_ascii=False),
+     lambda: dumps(CHECKPOINT_RESULTS), 0),
+]
+
+
+def per_call_us(func, number: int) -> float:
+    return min(timeit.repeat(func, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--participants", type=int, default=500)
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'case':34} {'stdlib us':>10} {'codec us':>10} {'x':>6} {'saved ms/s':>11}")
+    for name, old, new, rate in CASES:
+        number = max(args.number // 100, 1) if "500 rows" in name else args.number
+        old_us = per_call_us(old, number)
+        new_us = per_call_us(new, number)
+        saved = (old_us - new_us) * rate * args.participants / 1000  # мс процессора в секунду
+        print(f"{name:34} {old_us:10.2f} {new_us:10.2f} {old_us / new_us:6.1f} {saved:11.2f}")
+
+
+if __name__ == "__main__":
+    main()
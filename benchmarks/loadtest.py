@@ -0,0 +1,289 @@
+"""Нагрузочный тест вебсокетов интерактива на локальном стенде.
+
+Создаёт интерактив от имени ведущего, подключает N анонимных участников, ведущего и модератора,
+проводит интерактив целиком (WAITING -> COUNTDOWN -> QUESTION -> DISCUSSION -> END), участники
+отвечают со случайной задержкой. В конце печатается:
+    - разброс интервала между тиками у ведущего (джиттер);
+    - задержка рассылки кадра: насколько позже первого получателя кадр тика дошёл до участника, p50/p99;
+    - запросы к бд на тик, память процесса и опоздание тиков по /ws/metrics.
+
+Запуск (стенд из docker-compose, учётная запись ведущего уже есть):
+    python benchmarks/loadtest.py --base-url http://localhost:8000 --login leader@example.com \\
+        --password secret --x-key $SECRET_KEY --participants 1000
+
+Все клиенты работают в одном процессе, поэтому при тысячах сокетов задержка рассылки включает
+и очередь цикла событий самого теста: для точных чисел запускайте тест на отдельной машине.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+
+import httpx
+from websockets.asyncio.client import connect
+
+CONNECT_CONCURRENCY = 100  # одновременных подключений и регистраций
+TEXT_ANSWERS = ["Москва", "москва", "Масква", "МОСКВА!", "Санкт-Петербург", "не знаю"]
+
+
+def build_quiz(questions: int, answer_duration: int, discussion_duration: int, countdown_duration: int) -> dict:
+    """Интерактив с чередованием вопросов с одним, несколькими и текстовым ответом"""
+    items = []
+    for i in range(questions):
+        kind = ("one", "many", "text")[i % 3]
+        if kind == "one":
+            answers = [{"text": f"Вариант {j + 1}", "is_correct": j == 0} for j in range(4)]
+        elif kind == "many":
+            answers = [{"text": f"Вариант {j + 1}", "is_correct": j < 2} for j in range(4)]
+        else:
+            answers = [{"text": "Москва", "is_correct": True}]
+        items.append({
+            "text": f"Вопрос {i + 1}",
+            "position": i + 1,
+            "type": kind,
+            "image": "",
+            "score": 1 + i % 5,
+            "answers": answers,
+        })
+    return {
+        "title": "Нагрузочный тест",
+        "description": "Интерактив создан benchmarks/loadtest.py",
+        "answer_duration": answer_duration,
+        "discussion_duration": discussion_duration,
+        "countdown_duration": countdown_duration,
+        "questions": items,
+    }
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def frame_key(frame: dict) -> tuple | None:
+    """Один и тот же тик у разных получателей: фаза, вопрос и значение таймера"""
+    stage = frame.get("stage")
+    data = frame.get("data") or {}
+    if stage not in ("countdown", "question", "discussion"):
+        return None
+    question = data.get("question") or {}
+    return stage, question.get("id"), data.get("timer")
+
+
+class Stats:
+    def __init__(self):
+        self.first_arrival: dict[tuple, float] = {}  # тик : когда его получил первый клиент
+        self.arrivals: list[tuple[tuple, float]] = []  # (тик, время получения) у всех участников
+        self.leader_ticks: list[float] = []
+        self.connect_times: list[float] = []
+        self.frames = 0
+        self.bytes = 0
+        self.answers = 0
+        self.moderation_frames = 0
+        self.errors = 0
+        self.ended = asyncio.Event()
+
+    def record(self, raw: str, now: float) -> dict:
+        self.frames += 1
+        self.bytes += len(raw)
+        frame = json.loads(raw)
+        key = frame_key(frame)
+        if key is not None:
+            self.first_arrival.setdefault(key, now)
+            self.arrivals.append((key, now))
+        return frame
+
+
+async def post_json(client: httpx.AsyncClient, url: str, **kwargs) -> dict:
+    response = await client.post(url, **kwargs)
+    response.raise_for_status()
+    return response.json()
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> str:
+    data = await post_json(client, "/api/auth/login", data={"username": username, "password": password})
+    return data["access_token"]
+
+
+async def create_interactive(client: httpx.AsyncClient, token: str, quiz: dict) -> int:
+    data = await post_json(
+        client,
+        "/api/interactivities/",
+        headers={"Authorization": f"Bearer {token}"},
+        data={"interactive": json.dumps(quiz, ensure_ascii=False)}
+    )
+    return data["interactive_id"]
+
+
+async def anonym_tokens(client: httpx.AsyncClient, count: int) -> list[str]:
+    semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+
+    async def one() -> str:
+        async with semaphore:
+            return (await post_json(client, "/api/auth/anonym_login"))["access_token"]
+
+    return await asyncio.gather(*(one() for _ in range(count)))
+
+
+async def get_metrics(client: httpx.AsyncClient, x_key: str) -> dict:
+    response = await client.get("/ws/metrics", params={"x_key": x_key})
+    response.raise_for_status()
+    return response.json()
+
+
+def choose_answer(frame: dict) -> dict:
+    question = frame["data"]["question"]
+    options = [answer["id"] for answer in frame.get("data_answers") or []]
+    if question["type"] == "one":
+        return {"answer_id": random.choice(options)}
+    if question["type"] == "many":
+        return {"answer_ids": random.sample(options, random.randint(1, len(options)))}
+    return {"answer_text": random.choice(TEXT_ANSWERS)}
+
+
+async def participant(ws_url: str, token: str, stats: Stats, answer_duration: int, semaphore: asyncio.Semaphore):
+    started = time.perf_counter()
+    async with semaphore:
+        try:
+            websocket = await connect(f"{ws_url}?anonymToken={token}", max_queue=None, open_timeout=30)
+        except Exception:
+            stats.errors += 1
+            return
+    stats.connect_times.append(time.perf_counter() - started)
+    answered: set[int] = set()
+    pending: list[asyncio.Task] = []
+
+    async def answer_later(delay: float, message: dict):
+        await asyncio.sleep(delay)
+        await websocket.send(json.dumps(message, ensure_ascii=False))
+        stats.answers += 1
+
+    try:
+        async for raw in websocket:
+            frame = stats.record(raw, time.perf_counter())
+            if frame.get("stage") == "question" and frame.get("pause", {}).get("state") == "no":
+                question_id = frame["data"]["question"]["id"]
+                if question_id not in answered:
+                    answered.add(question_id)
+                    # большинство отвечает в первой половине времени, часть - в последние секунды
+                    delay = min(random.lognormvariate(0, 0.6) * answer_duration / 3, answer_duration - 0.5)
+                    pending.append(asyncio.create_task(answer_later(max(delay, 0.2), choose_answer(frame))))
+            if frame.get("stage") == "end":
+                break
+    except Exception:
+        stats.errors += 1
+    finally:
+        for task in pending:
+            task.cancel()
+        await websocket.close()
+
+
+async def leader(ws_url: str, token: str, stats: Stats, start: asyncio.Event):
+    async with connect(f"{ws_url}?token={token}", max_queue=None) as websocket:
+        await start.wait()
+        await websocket.send(json.dumps({"interactive_status": "going"}))
+        async for raw in websocket:
+            stats.leader_ticks.append(time.perf_counter())
+            if json.loads(raw).get("stage") == "end":
+                stats.ended.set()
+                return
+
+
+async def moderator(ws_url: str, token: str, stats: Stats):
+    async with connect(f"{ws_url}?token={token}", max_queue=None) as websocket:
+        try:
+            async for _ in websocket:
+                stats.moderation_frames += 1
+        except Exception:
+            pass
+
+
+async def sample_metrics(client: httpx.AsyncClient, x_key: str, samples: list[dict], stop: asyncio.Event):
+    while not stop.is_set():
+        try:
+            samples.append(await get_metrics(client, x_key))
+        except Exception:
+            pass
+        await asyncio.sleep(1)
+
+
+def report(stats: Stats, before: dict, after: dict, samples: list[dict], args):
+    intervals = [b - a for a, b in zip(stats.leader_ticks, stats.leader_ticks[1:])]
+    jitter = [abs(i - 1.0) * 1000 for i in intervals]
+    fan_out = [(now - stats.first_arrival[key]) * 1000 for key, now in stats.arrivals]
+    ticks = after["scheduler"]["ticks"] - before["scheduler"]["ticks"]
+    queries = after["db_queries"] - before["db_queries"]
+    lag_max = max((s["scheduler"]["tick_lag_max_ms"] for s in samples), default=0.0)
+    rss_peak = max((s["rss_bytes"] for s in samples), default=after["rss_bytes"])
+
+    print(f"participants           {args.participants} (connect errors/drops: {stats.errors})")
+    print(f"connect time           p50 {percentile(stats.connect_times, 0.5) * 1000:.0f} ms, "
+          f"p99 {percentile(stats.connect_times, 0.99) * 1000:.0f} ms")
+    print(f"frames received        {stats.frames} ({stats.bytes / max(stats.frames, 1):.0f} B avg), "
+          f"moderator {stats.moderation_frames}")
+    print(f"answers sent           {stats.answers}")
+    print(f"tick jitter (leader)   p50 {percentile(jitter, 0.5):.1f} ms, p99 {percentile(jitter, 0.99):.1f} ms, "
+          f"max {max(jitter, default=0):.1f} ms, mean interval {statistics.fmean(intervals or [0]):.3f} s")
+    print(f"fan-out latency        p50 {percentile(fan_out, 0.5):.1f} ms, p99 {percentile(fan_out, 0.99):.1f} ms")
+    print(f"server tick lag        max {lag_max:.1f} ms")
+    print(f"db queries             {queries} over {ticks} ticks ({queries / max(ticks, 1):.2f} per tick)")
+    print(f"server rss             {before['rss_bytes'] / 2 ** 20:.0f} MiB -> peak {rss_peak / 2 ** 20:.0f} MiB")
+
+
+async def main(args):
+    quiz = build_quiz(args.questions, args.answer_duration, args.discussion_duration, args.countdown_duration)
+    ws_base = args.base_url.replace("http", "ws", 1)
+    limits = httpx.Limits(max_connections=CONNECT_CONCURRENCY)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30, limits=limits) as client:
+        token = await login(client, args.login, args.password)
+        interactive_id = await create_interactive(client, token, quiz)
+        tokens = await anonym_tokens(client, args.participants)
+        print(f"interactive {interactive_id}, {len(tokens)} participants")
+
+        stats = Stats()
+        start = asyncio.Event()
+        stop_sampling = asyncio.Event()
+        samples: list[dict] = []
+        before = await get_metrics(client, args.x_key)
+
+        leader_task = asyncio.create_task(leader(f"{ws_base}/ws/organization/{interactive_id}", token, stats, start))
+        await asyncio.sleep(1)  # сессию создаёт ведущий
+        moderator_task = asyncio.create_task(moderator(f"{ws_base}/ws/moderation/{interactive_id}", token, stats))
+        sampler = asyncio.create_task(sample_metrics(client, args.x_key, samples, stop_sampling))
+
+        semaphore = asyncio.Semaphore(CONNECT_CONCURRENCY)
+        participants = [
+            asyncio.create_task(participant(
+                f"{ws_base}/ws/{interactive_id}", t, stats, args.answer_duration, semaphore
+            ))
+            for t in tokens
+        ]
+        while len(stats.connect_times) + stats.errors < len(tokens):
+            await asyncio.sleep(0.2)
+        start.set()
+
+        await stats.ended.wait()
+        after = await get_metrics(client, args.x_key)
+        await asyncio.gather(*participants, return_exceptions=True)
+        stop_sampling.set()
+        moderator_task.cancel()
+        await asyncio.gather(leader_task, moderator_task, sampler, return_exceptions=True)
+        report(stats, before, after, samples, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--login", required=True, help="логин ведущего")
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--x-key", required=True, help="SECRET_KEY сервера для /ws/metrics")
+    parser.add_argument("--participants", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=6)
+    parser.add_argument("--answer-duration", type=int, default=10)
+    parser.add_argument("--discussion-duration", type=int, default=5)
+    parser.add_argument("--countdown-duration", type=int, default=3)
+    asyncio.run(main(parser.parse_args()))
@@ -1,3 +1,6 @@
+import hashlib
+import hmac
+
 from pwdlib import PasswordHash
 from config import SECRET_KEY, VK_APP_ID, VK_CLIENT_SECRET
 
@@ -7,6 +10,10 @@ ALGORITHM = "HS256"
 
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 REFRESH_TOKEN_EXPIRE_DAYS = 30
+RESUME_TOKEN_EXPIRE_MINUTES = 5
+RESUME_TOKEN_TYPE = "resume"
+# resume-токены подписываются отдельным ключом: обычные декодеры их не примут
+RESUME_SECRET_KEY = hmac.new(SECRET_KEY.encode(), b"resume-token", hashlib.sha256).hexdigest()
 
 REFRESH_COOKIE_NAME = "refresh_token"
 
@@ -44,6 +44,12 @@ class VkTokenData(VkTokenSchema):
 class ParticipantTokenData(BaseModel):
     user_id: int
 
+class ResumeTokenData(BaseModel):
+    user_id: int
+    participant_id: int
+    interactive_id: int
+    role: UserRoleEnum
+
 class VkUserInfo(BaseModel):
     id: int
     user_id: int
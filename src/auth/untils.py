@@ -9,9 +9,10 @@ from urllib.parse import urlencode, unquote
 import time
 import hashlib
 
-from auth.auth_config import SECRET_KEY, ALGORITHM, password_hash_algorithm, DUMMY_HASH, ACCESS_TOKEN_EXPIRE_MINUTES
+from auth.auth_config import SECRET_KEY, ALGORITHM, password_hash_algorithm, DUMMY_HASH, ACCESS_TOKEN_EXPIRE_MINUTES, \
+    RESUME_TOKEN_EXPIRE_MINUTES, RESUME_TOKEN_TYPE, RESUME_SECRET_KEY
 from auth.repository import Repository
-from auth.schemas import TokenData, AuthenticateUserSchema, RefreshTokenSchema, TokenRegisterData
+from auth.schemas import TokenData, AuthenticateUserSchema, RefreshTokenSchema, TokenRegisterData, ResumeTokenData
 
 
 def verify_password(plain_password, password_hash):
@@ -60,9 +61,17 @@ def get_datetime_expire(expires_delta: timedelta):
     return expire
 
 
+def _decode_payload(token: str) -> dict:
+    """Полезная нагрузка токенов доступа, регистрации и сброса пароля, resume-токены не принимаются"""
+    payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    if payload.get("type") == RESUME_TOKEN_TYPE:
+        raise jwt.InvalidTokenError("Resume token is not accepted here")
+    return payload
+
+
 def decode_token(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_payload(token)
     except Exception as e:
         print(e)
         return None
@@ -84,7 +93,7 @@ def decode_token(token: str):
 
 def decode_token_for_register(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_payload(token)
     except Exception as e:
         print(e)
         return None
@@ -103,7 +112,7 @@ def decode_token_for_register(token: str):
 
 def decode_token_for_reset(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_payload(token)
     except Exception as e:
         print(e)
         return None
@@ -116,7 +125,7 @@ def decode_token_for_reset(token: str):
 
 def decode_token_for_participant(token: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = _decode_payload(token)
     except Exception as e:
         print(e)
         return None
@@ -125,6 +134,26 @@ def decode_token_for_participant(token: str):
     return user_id
 
 
+def create_resume_token(data: ResumeTokenData) -> str:
+    """Короткий токен для переподключения к интерактиву без повторного допуска"""
+    to_encode = data.model_dump(mode="json")
+    to_encode.update({
+        "type": RESUME_TOKEN_TYPE,
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=RESUME_TOKEN_EXPIRE_MINUTES)
+    })
+    return jwt.encode(to_encode, RESUME_SECRET_KEY, algorithm=ALGORITHM)
+
+
+def decode_resume_token(token: str) -> ResumeTokenData | None:
+    try:
+        payload = jwt.decode(token, RESUME_SECRET_KEY, algorithms=[ALGORITHM])
+        if payload.get("type") != RESUME_TOKEN_TYPE:
+            return None
+        return ResumeTokenData(**payload)
+    except Exception:
+        return None  # просроченный или чужой токен - обычное подключение
+
+
 def decode_base64(data: str) -> dict:
     decoded_bytes = base64.b64decode(data)
     decoded_str = decoded_bytes.decode('utf-8')
@@ -18,11 +18,12 @@ MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY", "minioadmin")
 
 REDIS_HOST = os.getenv('REDIS_HOST', 'redis')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
+CLUSTER_MODE = os.getenv('CLUSTER_MODE', '0').lower() in ('1', 'true', 'yes')  # живые сессии через redis, несколько воркеров
 
 EMAIL_LOGIN = os.getenv("EMAIL_LOGIN")
 EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
 EMAIL_SMTP_SERVER = os.getenv("EMAIL_SMTP_SERVER")
-EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT"))
+EMAIL_SMTP_PORT = int(os.getenv("EMAIL_SMTP_PORT") or 0)  # воркеру отчётов почта не нужна
 
-VK_APP_ID = int(os.getenv("VK_APP_ID"))
+VK_APP_ID = int(os.getenv("VK_APP_ID") or 0)
 VK_CLIENT_SECRET = os.getenv("VK_CLIENT_SECRET")
\ No newline at end of file
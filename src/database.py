@@ -1,3 +1,4 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from models import Base
 
@@ -8,8 +9,16 @@ DATABASE_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT
 engine = create_async_engine(DATABASE_URL, echo=False)
 new_session = async_sessionmaker(engine, expire_on_commit=False)
 
+query_count = 0  # запросов к бд с запуска процесса, для /ws/metrics
+
+
+@event.listens_for(engine.sync_engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    global query_count
+    query_count += 1
+
 
 async def init_db():
-    """Инициализация базы данных"""
+    """Инициализация базы данных, изменения существующих таблиц делает migrations.py"""
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        await conn.run_sync(Base.metadata.create_all)
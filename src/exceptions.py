@@ -520,6 +520,19 @@ class InteractiveNotConductedException(HTTPException):
             },
         )
 
+
+class ReportJobNotFoundException(HTTPException):
+    """Задача отчёта не найдена, истекла или запущена другой организацией"""
+
+    def __init__(self):
+        super().__init__(
+            status_code=404,
+            detail={
+                "message": "report job not found",
+                "code": "REPORT_JOB_NOT_FOUND",
+            },
+        )
+
 ### MinIO
 
 class BucketCreationFailedException(HTTPException):
@@ -337,7 +337,14 @@ class Repository:
             old_questions = old_questions_result.all()
             old_image_ids = {q.image_id for q in old_questions if q.image_id is not None}
 
-            # 3. Удаляем все ответы
+            # 3. Удаляем все ответы и итоги вопросов
+            await session.execute(
+                delete(QuestionResult)
+                .where(QuestionResult.question_id.in_(
+                    select(Question.id)
+                    .where(Question.interactive_id == interactive_id)
+                ))
+            )
             await session.execute(
                 delete(Answer)
                 .where(Answer.question_id.in_(
@@ -458,8 +465,11 @@ class Repository:
             question_ids = [q.id for q in questions]
             image_ids = {q.image_id for q in questions if q.image_id is not None}
 
-            # 3. Удаляем ответы
+            # 3. Удаляем ответы и итоги вопросов
             if question_ids:
+                await session.execute(
+                    delete(QuestionResult).where(QuestionResult.question_id.in_(question_ids))
+                )
                 await session.execute(
                     delete(Answer).where(Answer.question_id.in_(question_ids))
                 )
@@ -498,7 +508,10 @@ class Repository:
                         delete(Image).where(Image.id.in_(unused_image_ids))
                     )
 
-            # 6. Удаляем сам интерактив
+            # 6. Удаляем итоги и сам интерактив
+            await session.execute(
+                delete(InteractiveResult).where(InteractiveResult.interactive_id == interactive_id)
+            )
             await session.execute(
                 delete(Interactive).where(Interactive.id == interactive_id)
             )
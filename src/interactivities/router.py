@@ -12,7 +12,7 @@ from exceptions import InteractiveParsingException, InvalidQuestionPositionsExce
 from users.schemas import UserRoleEnum
 from websocket.router import manager as ws_manager
 from websocket.InteractiveSession import Stage
-from websocket.schemas import StageEnd, DataStageEnd, Winner
+from websocket.schemas import StageEnd, DataStageEnd
 from websocket.repository import Repository as Repository_Websocket
 import minios3.services as services
 from organizations.repository import Repository as Repository_Organization
@@ -181,9 +181,9 @@ async def get_join_interactive(
     if interactive_id is None:
         raise InteractiveNotFoundException()
 
-    if interactive_id in ws_manager.interactive_sessions:
-        if await ws_manager.interactive_sessions[interactive_id].get_stage() != Stage.WAITING:
-            raise InteractiveAlreadyStartedException()
+    stage = await ws_manager.get_live_stage(interactive_id)
+    if stage is not None and stage != Stage.WAITING:
+        raise InteractiveAlreadyStartedException()
 
     return InteractiveId(interactive_id=interactive_id)
 
@@ -235,7 +235,7 @@ async def patch_interactive(
         raise InteractiveNotFoundException()
     if conducted:
         raise InteractiveAlreadyEndException()
-    if interactive_id in ws_manager.interactive_sessions:
+    if await ws_manager.is_live(interactive_id):
         raise InteractiveAlreadyStartedException()
 
     count_images = 0
@@ -363,8 +363,9 @@ async def delete_interactive(
     if interactive_info.conducted:
         raise InteractiveAlreadyEndException()
 
-    if interactive_id.interactive_id in ws_manager.interactive_sessions:
-        await ws_manager.disconnect_delete(interactive_id.interactive_id)
+    if await ws_manager.is_live(interactive_id.interactive_id):
+        if not await ws_manager.disconnect_delete(interactive_id.interactive_id):
+            raise InteractiveAlreadyStartedException()  # владелец сессии не ответил, удалять пока нельзя
     else:
         await Repository.remove_participant_from_interactive(interactive_id=interactive_id.interactive_id)
 
@@ -378,7 +379,7 @@ async def is_running(
         current_token: Annotated[TokenData, Depends(get_current_active_token)],
         interactive_id: Annotated[InteractiveId, Depends()]
 ):
-    return interactive_id.interactive_id in ws_manager.interactive_sessions
+    return await ws_manager.is_live(interactive_id.interactive_id)
 
 
 @router.get("/end/{interactive_id}")
@@ -401,20 +402,18 @@ async def get_interactive(
     if title is None:
         raise InteractiveNotFoundException()
 
-    participants_total = await Repository_Websocket.get_participant_count(interactive_id.interactive_id)
-    winners_sorted_list = await Repository_Websocket.get_winners(interactive_id.interactive_id)
-    winners = []
-    for i, w in enumerate(winners_sorted_list):
-        winners.append(Winner(
-            position=i + 1,
-            username=w["username"],
-            score=w["score"],
-            time=w["total_time"],
-            participant_id=w["participant_id"],
-            is_hidden=w["is_hidden"]
-        ))
-
-    data = DataStageEnd(title=title, participants_total=participants_total, winners=winners)
+    interactive_result = ws_manager.get_final_result(interactive_id.interactive_id)  # идёт рассылка итогов
+    if interactive_result is None:
+        interactive_result = await Repository_Websocket.get_interactive_result(interactive_id=interactive_id.interactive_id)
+    if interactive_result is None:
+        # интерактив ещё идёт или завершён до появления таблицы итогов
+        interactive_result = await Repository_Websocket.build_interactive_result(interactive_id=interactive_id.interactive_id)
+
+    data = DataStageEnd(
+        title=title,
+        participants_total=interactive_result.participants_total,
+        winners=interactive_result.winners
+    )
     result = StageEnd(stage=Stage.END, data=data)
 
     return result
@@ -6,7 +6,7 @@ from config import URL_BACK,URL_FRONT
 from database import init_db
 
 # from users.router import router as user_router
-from websocket.router import router as websocket_router
+from websocket.router import router as websocket_router, manager as ws_manager
 from interactivities.router import router as interactivity_router
 from reports.router import router as report_router
 from broadcasts.router import router as broadcast_router
@@ -17,7 +17,9 @@ from auth.router import router as auth_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()  # инициализация БД при запуске (только если файла нет)
+    await ws_manager.start()
     yield
+    await ws_manager.close()
 
 
 # app = FastAPI(dependencies=[Depends(verify_key)], lifespan=lifespan)
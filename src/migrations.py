@@ -0,0 +1,104 @@
+"""Изменения схемы существующей базы, которые не делает create_all.
+
+Выполняются отдельным шагом до запуска приложения, каждое один раз:
+    python migrations.py
+"""
+import asyncio
+
+from sqlalchemy import text
+
+from database import engine
+from models import Base
+
+MIGRATIONS_LOCK = 7210001  # ключ pg_advisory_xact_lock: миграции не идут в нескольких контейнерах сразу
+
+# название : запросы, выполняются по порядку в одной транзакции
+MIGRATIONS: list[tuple[str, list[str]]] = [
+    ("0001_user_answers_unique", [
+        # из повторных ответов участника на вопрос остаётся последний
+        """
+        DELETE FROM user_answers a
+        USING user_answers b
+        WHERE a.participant_id = b.participant_id
+          AND a.question_id = b.question_id
+          AND a.id < b.id
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_user_answers_participant_question "
+        "ON user_answers (participant_id, question_id)",
+    ]),
+    ("0002_quiz_participants_unique", [
+        # у повторно записанного участника остаётся первая запись, ответы дублей переносятся на неё,
+        # из нескольких ответов на один вопрос остаётся последний
+        """
+        WITH keep AS (
+            SELECT id, min(id) OVER (PARTITION BY interactive_id, user_id) AS keep_id
+            FROM quiz_participants
+            WHERE interactive_id IS NOT NULL AND user_id IS NOT NULL
+        ), ranked AS (
+            SELECT ua.id, row_number() OVER (PARTITION BY keep.keep_id, ua.question_id ORDER BY ua.id DESC) AS n
+            FROM user_answers ua
+            JOIN keep ON keep.id = ua.participant_id
+        )
+        DELETE FROM user_answers WHERE id IN (SELECT id FROM ranked WHERE n > 1)
+        """,
+        """
+        UPDATE user_answers ua
+        SET participant_id = keep.keep_id
+        FROM (
+            SELECT id, min(id) OVER (PARTITION BY interactive_id, user_id) AS keep_id
+            FROM quiz_participants
+            WHERE interactive_id IS NOT NULL AND user_id IS NOT NULL
+        ) keep
+        WHERE ua.participant_id = keep.id AND keep.id <> keep.keep_id
+        """,
+        # блокировка любой из записей сохраняется
+        """
+        UPDATE quiz_participants k
+        SET is_blocked = true
+        FROM quiz_participants d
+        WHERE d.interactive_id = k.interactive_id
+          AND d.user_id = k.user_id
+          AND d.id > k.id
+          AND d.is_blocked
+        """,
+        """
+        DELETE FROM quiz_participants d
+        USING quiz_participants k
+        WHERE d.interactive_id = k.interactive_id
+          AND d.user_id = k.user_id
+          AND d.id > k.id
+        """,
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_quiz_participants_interactive_user "
+        "ON quiz_participants (interactive_id, user_id)",
+    ]),
+]
+
+
+async def migrate():
+    """Создаёт недостающие таблицы и выполняет ещё не применённые миграции"""
+    async with engine.begin() as conn:
+        await conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATIONS_LOCK})
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "name TEXT PRIMARY KEY, applied_at TIMESTAMP NOT NULL DEFAULT now())"
+        ))
+        applied = set((await conn.execute(text("SELECT name FROM schema_migrations"))).scalars())
+        for name, statements in MIGRATIONS:
+            if name in applied:
+                continue
+            for statement in statements:
+                await conn.execute(text(statement))
+            await conn.execute(text("INSERT INTO schema_migrations (name) VALUES (:name)"), {"name": name})
+            print(f"Migration {name} applied")
+
+
+async def main():
+    try:
+        await migrate()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,5 +1,6 @@
 from minio import Minio
 from minio.error import S3Error
+from typing import BinaryIO
 import io
 import transliterate
 import re
@@ -9,6 +10,8 @@ from exceptions import BucketCreationFailedException, FileUploadFailedException
 
 from minios3.schemas import ImageModel
 
+STREAM_PART_SIZE = 10 * 1024 * 1024  # размер части multipart-загрузки, не меньше 5 МиБ
+
 # Конфигурация MinIO
 minio_client = Minio(
     "minio:9000",
@@ -26,6 +29,26 @@ async def save_image_to_minio(
         size: int,
         bucket_name: str
 ) -> ImageModel:
+    return await save_stream_to_minio(
+        data=io.BytesIO(file),
+        filename=filename,
+        unique_filename=unique_filename,
+        content_type=content_type,
+        size=size,
+        bucket_name=bucket_name
+    )
+
+
+async def save_stream_to_minio(
+        data: BinaryIO,
+        filename: str,
+        unique_filename: str,
+        content_type: str,
+        size: int,
+        bucket_name: str,
+        part_size: int = 0
+) -> ImageModel:
+    """Загрузка из файлового объекта: MinIO читает его частями по part_size, файл целиком в память не попадает"""
     # Создаем бакет если не существует
     try:
         if not minio_client.bucket_exists(bucket_name):
@@ -47,8 +70,9 @@ async def save_image_to_minio(
         minio_client.put_object(
             bucket_name=bucket_name,
             object_name=unique_filename,
-            data=io.BytesIO(file),
+            data=data,
             length=size,
+            part_size=part_size,
             content_type=content_type,
             metadata={
                 "original-filename": f"{translit_title}.{extension_part}",
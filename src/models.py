@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, Integer, BigInteger, Text, Boolean, ForeignKey, TIMESTAMP, func, JSON
+    Column, Integer, BigInteger, Text, Boolean, ForeignKey, TIMESTAMP, func, JSON, UniqueConstraint
 )
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import declarative_base, relationship
@@ -142,6 +142,9 @@ class Answer(AsyncAttrs, Base):
 
 class QuizParticipant(AsyncAttrs, Base):
     __tablename__ = 'quiz_participants'
+    __table_args__ = (
+        UniqueConstraint("interactive_id", "user_id", name="uq_quiz_participants_interactive_user"),
+    )
 
     id = Column(Integer, primary_key=True)
     interactive_id = Column(Integer, ForeignKey("interactives.id"))
@@ -155,6 +158,9 @@ class QuizParticipant(AsyncAttrs, Base):
 
 class UserAnswer(AsyncAttrs, Base):
     __tablename__ = 'user_answers'
+    __table_args__ = (
+        UniqueConstraint("participant_id", "question_id", name="uq_user_answers_participant_question"),
+    )
 
     id = Column(Integer, primary_key=True)
     participant_id = Column(Integer, ForeignKey("quiz_participants.id"))
@@ -203,3 +209,23 @@ class UserAnswer(AsyncAttrs, Base):
             "answer_text": answer_text,
             "matched_answer_id": matched_answer_id
         }
+
+
+class QuestionResult(AsyncAttrs, Base):
+    __tablename__ = 'question_results'
+
+    id = Column(Integer, primary_key=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, unique=True)
+    answered_count = Column(Integer, nullable=False)
+    distribution = Column(JSON, nullable=False)  # answer_id : сколько раз выбран
+    closed_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
+
+
+class InteractiveResult(AsyncAttrs, Base):
+    __tablename__ = 'interactive_results'
+
+    id = Column(Integer, primary_key=True)
+    interactive_id = Column(Integer, ForeignKey("interactives.id"), nullable=False, unique=True)
+    participants_total = Column(Integer, nullable=False)
+    winners = Column(JSON, nullable=False)  # итоговая таблица в порядке мест
+    created_at = Column(TIMESTAMP, nullable=False, server_default=func.now())
@@ -0,0 +1,670 @@
+import asyncio
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import time
+
+import transliterate
+
+from database import engine
+from interactivities.schemas import InteractiveType
+from interactivities.repository import Repository as Repository_interactive
+from broadcasts.repository import Repository as Repository_broadcasts
+import minios3.services as services
+from config import URL_MINIO
+
+from reports.schemas import ExportEnum, ReturnUrl, ExportForLeaderData
+from reports.repository import Repository
+from reports.xlsx import StreamingWorkbook, SheetRecorder, Font, PatternFill, Border, Side, get_column_letter
+
+RENDER_PROCESSES = os.cpu_count() or 1  # процессов для отрисовки листов отчёта ведущего
+
+
+# Общие стили листа ведущего: создаются один раз, на каждое сочетание XlsxWriter заводит один формат
+CORRECT_ANSWER_FILL = PatternFill(start_color="c1f0c8", end_color="c1f0c8", fill_type="solid")
+STATISTIC_FILL = PatternFill(start_color="f6fbc8", end_color="f6fbc8", fill_type="solid")
+STATISTIC_TIME_FILL = PatternFill(start_color="ffc000", end_color="ffc000", fill_type="solid")
+BOLD_FONT = Font(bold=True)
+MEDIUM_SIDE = Side(border_style='medium', color='000000')  # Толстая граница
+THIN_SIDE = Side(border_style='thin', color='000000')  # Обычная граница
+BORDER_THIN = Border(top=THIN_SIDE, left=THIN_SIDE, right=THIN_SIDE, bottom=THIN_SIDE)
+BORDER_MEDIUM = Border(top=MEDIUM_SIDE, left=MEDIUM_SIDE, right=MEDIUM_SIDE, bottom=MEDIUM_SIDE)
+BORDER_TOP = Border(top=MEDIUM_SIDE, left=THIN_SIDE, right=THIN_SIDE, bottom=THIN_SIDE)
+BORDER_LEFT = Border(top=THIN_SIDE, left=MEDIUM_SIDE, right=THIN_SIDE, bottom=THIN_SIDE)
+BORDER_RIGHT = Border(top=THIN_SIDE, left=THIN_SIDE, right=MEDIUM_SIDE, bottom=THIN_SIDE)
+BORDER_BOTTOM = Border(top=THIN_SIDE, left=THIN_SIDE, right=THIN_SIDE, bottom=MEDIUM_SIDE)
+BORDER_TOP_LEFT = Border(top=MEDIUM_SIDE, left=MEDIUM_SIDE, right=THIN_SIDE, bottom=THIN_SIDE)
+BORDER_TOP_RIGHT = Border(top=MEDIUM_SIDE, left=THIN_SIDE, right=MEDIUM_SIDE, bottom=THIN_SIDE)
+BORDER_LEFT_RIGHT = Border(top=THIN_SIDE, left=MEDIUM_SIDE, right=MEDIUM_SIDE, bottom=THIN_SIDE)
+BORDER_LEFT_BOTTOM = Border(top=THIN_SIDE, left=MEDIUM_SIDE, right=THIN_SIDE, bottom=MEDIUM_SIDE)
+BORDER_RIGHT_BOTTOM = Border(top=THIN_SIDE, left=THIN_SIDE, right=MEDIUM_SIDE, bottom=MEDIUM_SIDE)
+BORDER_TOP_LEFT_RIGHT = Border(top=MEDIUM_SIDE, left=MEDIUM_SIDE, right=MEDIUM_SIDE, bottom=THIN_SIDE)
+
+
+def build_report(interactive_ids: list[int], report_type: str) -> dict:
+    """Задача rq из очереди reports: строит отчёт, загружает его в MinIO и возвращает ReturnUrl"""
+    return asyncio.run(_build_report(interactive_ids, ExportEnum(report_type))).model_dump()
+
+
+async def _build_report(interactive_ids: list[int], report_type: ExportEnum) -> ReturnUrl:
+    try:
+        return await export_report(interactive_ids, report_type)
+    finally:
+        await engine.dispose()  # соединения пула привязаны к циклу событий этой задачи
+
+
+async def export_report(interactive_ids: list[int], report_type: ExportEnum) -> ReturnUrl:
+    bucket = "reports"
+
+    if report_type == ExportEnum.forAnalise.value:
+        wb = StreamingWorkbook()
+        ws = wb.create_sheet(title="Analytics Report")
+
+        headers = [
+            "id_интерактива", "Название интерактива", "Дата проведения",
+            "Общее количество участников", "Общее количество вопросов",
+            "Целевая аудитория", "Место проведения", "ФИО ведущего",
+            "Способ подключения", "vk_id", "Имя", "Фамилия", "Почта", "Номер телефона",
+            "Введенное имя пользователя", "Кикнут с интерактива?", "Скрыто имя на интерактиве?",
+            "Количество правильных ответов", "Общее время на ответа",
+            "Общее количество баллов"
+        ]
+        ws.append(headers)
+
+        # Данные
+        for interactive_id in interactive_ids:
+            items = await Repository.get_interactive_export_for_analise(interactive_id)
+            for item in items:
+                ws.append([
+                    item.interactive_id,
+                    item.title,
+                    item.date_completed,
+                    item.participant_count,
+                    item.question_count,
+                    item.target_audience,
+                    item.location,
+                    item.responsible_full_name,
+
+                    item.provider,
+                    item.vk_id,
+                    item.first_name,
+                    item.last_name,
+                    item.email,
+                    item.phone_number,
+
+                    item.name,
+                    item.is_blocked,
+                    item.is_hidden,
+
+                    item.correct_answers_count,
+                    item.total_time,
+                    item.total_score,
+                ])
+
+        # Возвращаем файл
+        filename = "PRC_analytics_report.xlsx"
+        if len(interactive_ids) == 1:
+            data_title_date = await Repository.get_title_and_date_for_interactive(interactive_ids[0])
+            if data_title_date:
+                translit_title = smart_translit(data_title_date.title).lower().replace(' ', '_')
+                translit_title = re.sub(r'[^\w_]', '', translit_title)
+                filename = f"PRC_{translit_title}_{data_title_date.date_completed}.xlsx"
+
+        output, size = wb.save()
+
+        unique = await Repository_interactive.generate_unique_filename(ext="xlsx", bucket_name=bucket)
+
+        with output:
+            saved_file = await services.save_stream_to_minio(data=output, filename=filename, unique_filename=unique,
+                                                             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                                             size=size, bucket_name=bucket,
+                                                             part_size=services.STREAM_PART_SIZE)
+
+        await Repository_broadcasts.save_image(saved_file)
+        url = URL_MINIO
+        return ReturnUrl(url=f"{url}{bucket}/{saved_file.unique_filename}", name=filename)
+
+    else:
+        wb = StreamingWorkbook()
+
+        paths = await render_leader_sheets(interactive_ids)
+        try:
+            for interactive_id, path in zip(interactive_ids, paths):
+                # Создаем новый лист для каждого интерактива
+                wb.replay_sheet(title=f"Интерактив {interactive_id}", path=path)
+        finally:
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)  # планы листов, до которых не дошли из-за ошибки
+
+        filename = "LDR_leader_report.xlsx"
+        if len(interactive_ids) == 1:
+            data_title_date = await Repository.get_title_and_date_for_interactive(interactive_ids[0])
+            if data_title_date:
+                translit_title = smart_translit(data_title_date.title).lower().replace(' ', '_')
+                translit_title = re.sub(r'[^\w_]', '', translit_title)
+                filename = f"LDR_{translit_title}_{data_title_date.date_completed}.xlsx"
+
+        output, size = wb.save()
+
+        unique = await Repository_interactive.generate_unique_filename(ext="xlsx", bucket_name=bucket)
+
+        with output:
+            saved_file = await services.save_stream_to_minio(data=output, filename=filename, unique_filename=unique,
+                                                             content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                                                             size=size, bucket_name=bucket,
+                                                             part_size=services.STREAM_PART_SIZE)
+
+        await Repository_broadcasts.save_image(saved_file)
+        url = URL_MINIO
+        return ReturnUrl(url=f"{url}{bucket}/{saved_file.unique_filename}", name=filename)
+
+
+def render_leader_sheet(data: ExportForLeaderData) -> str:
+    """Лист отчёта ведущего по одному интерактиву. Выполняется в процессе пула, строки пишутся
+    в файл-план, путь к нему возвращается для StreamingWorkbook.replay_sheet()"""
+    ws = SheetRecorder()
+
+    # Настройка ширины столбцов
+    for col in range(1, 14):
+        ws.set_column_width(col, 15)
+
+    # Подсчёт кол-во ответивших правильно на текстовый вопрос
+    dict_text_true_answer = {}  # int:int | id:count
+
+    # 1. Заголовок интерактива (A1:M7)
+    interact_info = [
+        f"Название интерактива: {data.header.title}",
+        f"Id_интерактива: {data.header.interactive_id}",
+        f"Дата проведения: {data.header.date_completed}",
+        f"Общее количество участников: {len(data.body)}",
+        f"Целевая аудитория: {data.header.target_audience}" if data.header.target_audience else "Целевая аудитория: не указано",
+        f"Место проведения: {data.header.location}" if data.header.location else "Место проведения: не указано",
+        f"ФИО ведущего: {data.header.responsible_full_name}" if data.header.responsible_full_name else "ФИО ведущего: не указано"
+    ]
+
+    for i, info in enumerate(interact_info, start=1):
+        cell = ws.cell(row=i, column=1, value=info)
+        ws.merge_cells(start_row=i, start_column=1, end_row=i, end_column=13)
+        cell.font = BOLD_FONT
+
+    # 2. Вопросы и ответы (строка 11-14)
+    current_col = 14  # Начинаем с колонки J
+
+    for question in sorted(data.header.question, key=lambda q: q.position):
+        if question.type == InteractiveType.one or question.type == InteractiveType.many:
+            answer_count = len(question.answers)
+
+            # Заголовок вопроса (строка 11)
+            cell = ws.cell(row=11, column=current_col,
+                           value=f"Вопрос {question.position} Сложность - {question.score}")
+            cell.border = BORDER_TOP_LEFT_RIGHT
+            ws.merge_cells(start_row=11, start_column=current_col, end_row=11,
+                           end_column=current_col + answer_count)
+
+            # Текст вопроса (строка 12)
+            cell = ws.cell(row=12, column=current_col, value=question.text)
+            cell.border = BORDER_LEFT_RIGHT
+            ws.merge_cells(start_row=12, start_column=current_col, end_row=12,
+                           end_column=current_col + answer_count)
+
+            # добавляем Время на ответ (строка 14)
+            cell = ws.cell(row=13, column=current_col + answer_count, value=f"Время на ответ")
+            cell.border = BORDER_RIGHT
+            cell = ws.cell(row=14, column=current_col + answer_count, value="")
+            cell.border = BORDER_RIGHT_BOTTOM
+            cell = ws.cell(row=15, column=current_col + answer_count, value="")
+            cell.border = BORDER_TOP_RIGHT
+
+            # Тексты ответов (строка 13, 14, 15)
+            for i, answer in enumerate(question.answers):
+                cell0 = ws.cell(row=13, column=current_col + i, value=f"Ответ {i + 1}")
+                cell = ws.cell(row=14, column=current_col + i, value=answer.text)
+                cell2 = ws.cell(row=15, column=current_col + i, value="")
+                if answer.is_correct:
+                    cell0.fill = CORRECT_ANSWER_FILL
+                    cell.fill = CORRECT_ANSWER_FILL
+                    cell2.fill = CORRECT_ANSWER_FILL
+
+                if i == 0:
+                    cell0.border = BORDER_LEFT
+                    cell.border = BORDER_LEFT_BOTTOM
+                    cell2.border = BORDER_TOP_LEFT
+                else:
+                    cell0.border = BORDER_THIN
+                    cell.border = BORDER_BOTTOM
+                    cell2.border = BORDER_TOP
+
+            current_col += answer_count + 1  # Сдвигаем на нужное количество колонок
+        else:
+            answer_count = 3
+
+            # Заголовок вопроса (строка 11)
+            cell = ws.cell(row=11, column=current_col,
+                           value=f"Вопрос {question.position} Сложность - {question.score}")
+            cell.border = BORDER_TOP_LEFT_RIGHT
+            ws.merge_cells(start_row=11, start_column=current_col, end_row=11,
+                           end_column=current_col + answer_count)
+
+            # Текст вопроса (строка 12)
+            cell = ws.cell(row=12, column=current_col, value=question.text)
+            cell.border = BORDER_LEFT_RIGHT
+            ws.merge_cells(start_row=12, start_column=current_col, end_row=12,
+                           end_column=current_col + answer_count)
+
+            # Варианты ответов (строка 13)
+            cell = ws.cell(row=13, column=current_col, value=f"Правильные ответы")
+            cell.border = BORDER_LEFT
+            cell.fill = CORRECT_ANSWER_FILL
+            ws.merge_cells(start_row=13, start_column=current_col, end_row=13,
+                           end_column=current_col + answer_count - 1)
+
+            # добавляем Время на ответ (строка 13)
+            cell = ws.cell(row=13, column=current_col + answer_count, value=f"Время на ответ")
+            cell.border = BORDER_RIGHT
+            cell = ws.cell(row=14, column=current_col + answer_count, value="")
+            cell.border = BORDER_RIGHT_BOTTOM
+            cell = ws.cell(row=15, column=current_col + answer_count, value="")
+            cell.border = BORDER_TOP_RIGHT
+
+            # Тексты ответов (строка 14)
+            text_correct_answer = ", ".join([answer.text for answer in question.answers])
+            cell = ws.cell(row=14, column=current_col, value=text_correct_answer)
+            cell.fill = CORRECT_ANSWER_FILL
+            cell.border = BORDER_LEFT_BOTTOM
+            ws.merge_cells(start_row=14, start_column=current_col, end_row=14,
+                           end_column=current_col + answer_count - 1)
+
+            cell = ws.cell(row=15, column=current_col, value="")
+            cell.border = BORDER_TOP_LEFT
+            cell.fill = CORRECT_ANSWER_FILL
+            ws.merge_cells(start_row=15, start_column=current_col, end_row=15,
+                           end_column=current_col + answer_count - 1)
+
+            current_col += answer_count + 1  # Сдвигаем на нужное количество колонок
+
+    # 2.2 Общие показатели участника (14 строчка с E по G)
+    cell = ws.cell(row=14, column=11, value=f"Общие показатели участника")
+    cell.border = BORDER_MEDIUM
+    ws.merge_cells(start_row=14, start_column=11, end_row=14, end_column=13)
+
+    # 3. Заголовки таблицы участников (строка 15)
+    headers = [
+        "Количество участников", "Способ подключения", "vk_id", "Имя", "Фамилия", "Почта", "Номер телефона",
+        "Введенное имя пользователя", "Кикнут с интерактива?", "Скрыто имя на интерактиве?",
+        "Количество верных ответов", "Общее время на ответы", "Общее количество баллов"
+    ]
+    for col, header in enumerate(headers, start=1):
+        cell = ws.cell(row=15, column=col, value=header)
+        if header == "Количество верных ответов":
+            cell.border = BORDER_TOP_LEFT
+        elif header == "Общее количество баллов":
+            cell.border = BORDER_TOP_RIGHT
+        else:
+            cell.border = BORDER_TOP
+
+    ws.flush(before_row=16)  # шапка готова, дальше строки пишутся по порядку
+
+    # 4. Данные участников (начиная со строки 16)
+
+    questions = sorted(data.header.question, key=lambda q: q.position)
+    # Колонка варианта внутри вопроса: question_id : {answer_id : смещение}
+    answer_columns = {q.id: {a.id: j for j, a in enumerate(q.answers)} for q in questions}
+
+    count_participant = len(data.body)
+    for i, participant in enumerate(data.body, start=1):
+        row = 15 + i
+
+        # Основная информация
+        if i == count_participant:
+            cell = ws.cell(row=row, column=1, value=i)
+            cell.border = BORDER_BOTTOM
+
+            cell = ws.cell(row=row, column=2, value=participant.provider)
+            cell.border = BORDER_BOTTOM
+
+            cell = ws.cell(row=row, column=3, value=participant.vk_id)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=4, value=participant.first_name)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=5, value=participant.last_name)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=6, value=participant.email)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=7, value=participant.phone_number)
+            cell.border = BORDER_BOTTOM
+
+            cell = ws.cell(row=row, column=8, value=participant.name)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=9, value=participant.is_blocked)
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=10, value=participant.is_hidden)
+            cell.border = BORDER_BOTTOM
+
+            cell = ws.cell(row=row, column=11,
+                           value=f"{participant.correct_answers_count}/{len(data.header.question)}")
+            cell.border = BORDER_LEFT_BOTTOM
+            cell = ws.cell(row=row, column=12, value=f"{participant.total_time}")
+            cell.border = BORDER_BOTTOM
+            cell = ws.cell(row=row, column=13, value=f"{participant.total_score}")
+            cell.border = BORDER_RIGHT_BOTTOM
+        else:
+            cell = ws.cell(row=row, column=1, value=i)
+            cell.border = BORDER_THIN
+
+            cell = ws.cell(row=row, column=2, value=participant.provider)
+            cell.border = BORDER_THIN
+
+            cell = ws.cell(row=row, column=3, value=participant.vk_id)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=4, value=participant.first_name)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=5, value=participant.last_name)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=6, value=participant.email)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=7, value=participant.phone_number)
+            cell.border = BORDER_THIN
+
+            cell = ws.cell(row=row, column=8, value=participant.name)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=9, value=participant.is_blocked)
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=10, value=participant.is_hidden)
+            cell.border = BORDER_THIN
+
+            cell = ws.cell(row=row, column=11,
+                           value=f"{participant.correct_answers_count}/{len(data.header.question)}")
+            cell.border = BORDER_LEFT
+            cell = ws.cell(row=row, column=12, value=f"{participant.total_time}")
+            cell.border = BORDER_THIN
+            cell = ws.cell(row=row, column=13, value=f"{participant.total_score}")
+            cell.border = BORDER_RIGHT
+
+        # Ответы участника
+        current_col = 14
+        for question in questions:
+            answer = participant.answers.get(question.id)
+            if question.type == InteractiveType.one:
+                answer_count = len(question.answers)
+
+                # Сначала заполняем все 0
+                for j in range(answer_count):
+                    cell = ws.cell(row=row, column=current_col + j, value=0)
+                    if j == 0:
+                        cell.border = BORDER_LEFT
+                    else:
+                        cell.border = BORDER_THIN
+
+                # Затем отмечаем выбранные ответы
+                flag_is_answered = True
+                j = answer_columns[question.id].get(answer.answer_id) if answer is not None else None
+                if j is not None:
+                    cell = ws.cell(row=row, column=current_col + j, value=1)
+                    if j == 0:
+                        cell.border = BORDER_LEFT
+                    else:
+                        cell.border = BORDER_THIN
+
+                    if answer.is_correct:
+                        cell.fill = CORRECT_ANSWER_FILL
+                    minutes, seconds = map(int, answer.time.split(':'))
+                    time_obj = time(0, minutes, seconds)  # часы, минуты, секунды
+                    cell = ws.cell(row=row, column=current_col + answer_count, value=time_obj)
+                    cell.border = BORDER_RIGHT
+                    flag_is_answered = False
+
+                if flag_is_answered:
+                    cell = ws.cell(row=row, column=current_col + answer_count, value="")
+                    cell.border = BORDER_RIGHT
+
+                current_col += answer_count + 1
+
+            elif question.type == InteractiveType.many:
+                answer_count = len(question.answers)
+
+                # Сначала заполняем все 0
+                for j in range(answer_count):
+                    cell = ws.cell(row=row, column=current_col + j, value=0)
+                    if j == 0:
+                        cell.border = BORDER_LEFT
+                    else:
+                        cell.border = BORDER_THIN
+
+                # Затем отмечаем выбранные ответы
+                flag_is_answered = True
+                columns = answer_columns[question.id]
+                for answer_id in (answer.answer_id if answer is not None else []):
+                    j = columns.get(answer_id)
+                    if j is None:
+                        continue
+                    cell = ws.cell(row=row, column=current_col + j, value=1)
+                    if j == 0:
+                        cell.border = BORDER_LEFT
+                    else:
+                        cell.border = BORDER_THIN
+
+                    if answer.is_correct:
+                        cell.fill = CORRECT_ANSWER_FILL
+
+                    minutes, seconds = map(int, answer.time.split(':'))
+                    time_obj = time(0, minutes, seconds)  # часы, минуты, секунды
+                    cell = ws.cell(row=row, column=current_col + answer_count, value=time_obj)
+                    cell.border = BORDER_RIGHT
+                    flag_is_answered = False
+
+                if flag_is_answered:
+                    cell = ws.cell(row=row, column=current_col + answer_count, value="")
+                    cell.border = BORDER_RIGHT
+
+                current_col += answer_count + 1
+
+            else:
+                flag_is_answered = True
+                if answer is not None:
+                    cell = ws.cell(row=row, column=current_col, value=f"{answer.answer_id}")
+                    cell.border = BORDER_LEFT
+                    if answer.is_correct:
+                        cell.fill = CORRECT_ANSWER_FILL
+                        if question.id in dict_text_true_answer:
+                            dict_text_true_answer[question.id] += 1
+                        else:
+                            dict_text_true_answer[question.id] = 1
+                    ws.merge_cells(start_row=row, start_column=current_col, end_row=row,
+                                   end_column=current_col + 2)
+                    minutes, seconds = map(int, answer.time.split(':'))
+                    time_obj = time(0, minutes, seconds)  # часы, минуты, секунды
+                    cell = ws.cell(row=row, column=current_col + 3, value=time_obj)
+                    cell.border = BORDER_RIGHT
+                    flag_is_answered = False
+
+                if flag_is_answered:
+                    cell = ws.cell(row=row, column=current_col, value="")
+                    cell.border = BORDER_LEFT
+                    ws.merge_cells(start_row=row, start_column=current_col, end_row=row,
+                                   end_column=current_col + 2)
+                    cell = ws.cell(row=row, column=current_col + 3, value="")
+                    cell.border = BORDER_RIGHT
+
+                current_col += 4
+
+        ws.flush(before_row=row + 1)
+
+    # 5. Подсчет ответивших (строка после последнего участника)
+    stats_row = 15 + len(data.body) + 1 + 1
+    cell = ws.cell(row=stats_row, column=11, value="Общие показатели вопроса")
+    cell.font = BOLD_FONT
+    cell.fill = STATISTIC_FILL
+    cell.border = BORDER_RIGHT
+    ws.merge_cells(start_row=stats_row, start_column=11, end_row=stats_row, end_column=13)
+
+    cell = ws.cell(row=stats_row + 1, column=11, value="Количество ответивших")
+    cell.fill = STATISTIC_FILL
+    cell.border = BORDER_RIGHT
+    ws.merge_cells(start_row=stats_row + 1, start_column=11, end_row=stats_row + 1, end_column=13)
+
+    cell = ws.cell(row=stats_row + 2, column=11, value="Среднее время ответа на вопрос")
+    cell.fill = STATISTIC_FILL
+    cell.border = BORDER_RIGHT
+    ws.merge_cells(start_row=stats_row + 2, start_column=11, end_row=stats_row + 2, end_column=13)
+
+    current_col = 14
+    for question in sorted(data.header.question, key=lambda q: q.position):
+        if question.type == InteractiveType.one or question.type == InteractiveType.many:
+            answer_count = len(question.answers)
+            first_row = 16
+            last_row = 15 + len(data.body)
+
+            for j, a in enumerate(question.answers):
+                col = current_col + j
+                cell = ws.cell(row=stats_row + 1, column=col,
+                               value=f"=SUM({get_column_letter(col)}{first_row}:{get_column_letter(col)}{last_row})")
+                cell2 = ws.cell(row=stats_row + 2, column=col, value="")
+                cell2.fill = STATISTIC_FILL
+                cell1 = ws.cell(row=stats_row, column=col, value="")
+                cell1.fill = STATISTIC_FILL
+                cell0 = ws.cell(row=stats_row - 1, column=col, value="")
+
+                if a.is_correct:
+                    cell.fill = CORRECT_ANSWER_FILL
+                else:
+                    cell.fill = STATISTIC_FILL
+
+                if j == 0:
+                    cell0.border = BORDER_LEFT
+                    cell1.border = BORDER_LEFT
+                    cell.border = BORDER_LEFT
+                    cell2.border = BORDER_LEFT_BOTTOM
+                else:
+                    cell0.border = BORDER_THIN
+                    cell1.border = BORDER_THIN
+                    cell.border = BORDER_THIN
+                    cell2.border = BORDER_BOTTOM
+
+            cell = ws.cell(row=stats_row - 1, column=current_col + answer_count, value="")
+            cell.border = BORDER_RIGHT
+            cell1 = ws.cell(row=stats_row, column=current_col + answer_count, value="")
+            cell1.fill = STATISTIC_FILL
+            cell1.border = BORDER_RIGHT
+            cell2 = ws.cell(row=stats_row + 1, column=current_col + answer_count, value="")
+            cell2.fill = STATISTIC_FILL
+            cell2.border = BORDER_RIGHT
+
+            cell3 = ws.cell(row=stats_row + 2, column=current_col + answer_count,
+                            value=f"=AVERAGE({get_column_letter(current_col + answer_count)}{first_row}:{get_column_letter(current_col + answer_count)}{last_row})")
+            cell3.fill = STATISTIC_TIME_FILL
+            cell3.number_format = 'mm:ss'
+            cell3.border = BORDER_RIGHT_BOTTOM
+            current_col += answer_count + 1
+        else:
+            first_row = 16
+            last_row = 15 + len(data.body)
+
+            # dict_text_true_answer
+            cell00 = ws.cell(row=stats_row - 1, column=current_col, value="")
+            cell01 = ws.cell(row=stats_row - 1, column=current_col + 1, value="")
+            cell02 = ws.cell(row=stats_row - 1, column=current_col + 2, value="")
+            cell03 = ws.cell(row=stats_row - 1, column=current_col + 3, value="")
+            cell00.border = BORDER_LEFT
+            cell01.border = BORDER_THIN
+            cell02.border = BORDER_THIN
+            cell03.border = BORDER_RIGHT
+
+            cell10 = ws.cell(row=stats_row, column=current_col, value="")
+            cell11 = ws.cell(row=stats_row, column=current_col + 1, value="")
+            cell12 = ws.cell(row=stats_row, column=current_col + 2, value="")
+            cell13 = ws.cell(row=stats_row, column=current_col + 3, value="")
+            cell10.fill = STATISTIC_FILL
+            cell11.fill = STATISTIC_FILL
+            cell12.fill = STATISTIC_FILL
+            cell13.fill = STATISTIC_FILL
+            cell10.border = BORDER_LEFT
+            cell11.border = BORDER_THIN
+            cell12.border = BORDER_THIN
+            cell13.border = BORDER_RIGHT
+
+            cell20 = ws.cell(row=stats_row + 1, column=current_col, value="")
+            if question.id in dict_text_true_answer:
+                cell21 = ws.cell(row=stats_row + 1, column=current_col + 1,
+                                 value=dict_text_true_answer[question.id])
+            else:
+                cell21 = ws.cell(row=stats_row + 1, column=current_col + 1, value=0)
+            cell22 = ws.cell(row=stats_row + 1, column=current_col + 2, value="")
+            cell23 = ws.cell(row=stats_row + 1, column=current_col + 3, value="")
+            cell20.fill = STATISTIC_FILL
+            cell21.fill = CORRECT_ANSWER_FILL
+            cell22.fill = STATISTIC_FILL
+            cell23.fill = STATISTIC_FILL
+            cell20.border = BORDER_LEFT
+            cell21.border = BORDER_THIN
+            cell22.border = BORDER_THIN
+            cell23.border = BORDER_RIGHT
+
+            cell30 = ws.cell(row=stats_row + 2, column=current_col, value="")
+            cell31 = ws.cell(row=stats_row + 2, column=current_col + 1, value="")
+            cell32 = ws.cell(row=stats_row + 2, column=current_col + 2, value="")
+            cell30.fill = STATISTIC_FILL
+            cell31.fill = STATISTIC_FILL
+            cell32.fill = STATISTIC_FILL
+            cell30.border = BORDER_LEFT_BOTTOM
+            cell31.border = BORDER_BOTTOM
+            cell32.border = BORDER_BOTTOM
+            cell33 = ws.cell(row=stats_row + 2, column=current_col + 3,
+                             value=f"=AVERAGE({get_column_letter(current_col + 3)}{first_row}:{get_column_letter(current_col + 3)}{last_row})")
+            cell33.fill = STATISTIC_TIME_FILL
+            cell33.border = BORDER_RIGHT_BOTTOM
+            cell33.number_format = 'mm:ss'
+
+            current_col += 4
+
+    return ws.save()
+
+
+async def render_leader_sheets(interactive_ids: list[int]) -> list[str]:
+    """Данные интерактивов грузятся по очереди, а листы рисуются параллельно в пуле процессов"""
+    loop = asyncio.get_running_loop()
+    workers = min(len(interactive_ids), RENDER_PROCESSES)
+    paths = []
+    try:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = []
+            try:
+                for interactive_id in interactive_ids:
+                    data = await Repository.get_export_for_leader(interactive_id)
+                    futures.append(loop.run_in_executor(pool, render_leader_sheet, data))
+            finally:
+                paths = await asyncio.gather(*futures, return_exceptions=True)
+
+        errors = [path for path in paths if isinstance(path, BaseException)]
+        if errors:
+            raise errors[0]
+        return paths
+    except BaseException:
+        for path in paths:
+            if isinstance(path, str):
+                os.remove(path)  # планы уже нарисованных листов
+        raise
+
+
+def smart_translit(text):
+    # Разделяем текст на слова и символы
+    words = re.findall(r'([а-яА-ЯёЁ]+|\w+|[^\w\s]+|\s+)', text)
+    result = []
+
+    for word in words:
+        # Если слово содержит кириллицу — транслитерируем
+        if re.search(r'[а-яА-ЯёЁ]', word):
+            try:
+                # Указываем язык явно (русский) и включаем строгий режим
+                translit_word = transliterate.translit(word, 'ru', reversed=True)
+                # Заменяем мягкий/твёрдый знаки на апостроф или удаляем
+                translit_word = translit_word.replace("'", "").replace('"', '')
+                result.append(translit_word)
+            except Exception as e:
+                print(f"Transliteration error for '{word}': {e}")
+                result.append(word)  # Если ошибка — оставляем как есть
+        else:
+            result.append(word)  # Английские слова и символы оставляем
+
+    return ''.join(result)
@@ -0,0 +1,25 @@
+import redis
+from rq import Queue
+from rq.exceptions import NoSuchJobError
+from rq.job import Job
+from config import REDIS_HOST, REDIS_PORT
+
+REPORT_JOB_TIMEOUT = 600  # секунд на построение одного отчёта
+REPORT_RESULT_TTL = 3600  # секунд хранения результата и ошибки задачи
+
+# Подключение к Redis, без decode_responses: rq хранит задачи в бинарном виде
+redis_conn = redis.Redis(
+    host=REDIS_HOST,
+    port=REDIS_PORT,
+    db=0
+)
+
+# Очередь отчётов, её разбирает воркер reports_worker
+report_queue = Queue('reports', connection=redis_conn)
+
+
+def get_report_job(job_id: str) -> Job | None:
+    try:
+        return Job.fetch(job_id, connection=redis_conn)
+    except NoSuchJobError:
+        return None
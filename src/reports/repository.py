@@ -1,5 +1,5 @@
 import pytz
-from sqlalchemy import select
+from sqlalchemy import select, or_
 from database import new_session
 from exceptions import InteractiveNotConductedException
 from models import *
@@ -27,139 +27,143 @@ class Repository:
         return date_obj.strftime('%d.%m.%y')
 
     @classmethod
-    async def get_interactive_export_for_analise(cls, interactive_id: int) -> list[ExportForAnalise]:
-        async with new_session() as session:
-            # 1. Получаем базовую информацию об интерактиве
-            interactive = await session.get(Interactive, interactive_id)
-            if not interactive:
-                raise InteractiveNotConductedException()
-
-            responsible_full_name = await session.get(OrganizationParticipant, interactive.created_by_id)
-            if not responsible_full_name:
-                raise InteractiveNotConductedException()
-            responsible_full_name = responsible_full_name.name
-
-            # 2. Получаем всех участников интерактива
-            participants = await session.execute(
-                select(QuizParticipant)
-                .where(QuizParticipant.interactive_id == interactive_id)
+    async def _get_interactive_header(cls, session, interactive_id: int):
+        """Интерактив, ФИО ответственного, количество участников и вопросов одним запросом"""
+        participant_count = (
+            select(func.count(QuizParticipant.id))
+            .where(QuizParticipant.interactive_id == interactive_id)
+            .scalar_subquery()
+        )
+        question_count = (
+            select(func.count(Question.id))
+            .where(Question.interactive_id == interactive_id)
+            .scalar_subquery()
+        )
+        result = await session.execute(
+            select(
+                Interactive,
+                OrganizationParticipant.name,
+                participant_count.label("participant_count"),
+                question_count.label("question_count"),
             )
-            participants = participants.scalars().all()
+            .join(OrganizationParticipant, Interactive.created_by_id == OrganizationParticipant.id)
+            .where(Interactive.id == interactive_id)
+        )
+        header = result.one_or_none()
+        if header is None:
+            raise InteractiveNotConductedException()
+        return header
 
-            if not participants:
-                return []
+    @staticmethod
+    def _participant_totals(interactive_id: int):
+        """Подзапрос: правильные ответы и сумма баллов по каждому участнику интерактива"""
+        return (
+            select(
+                UserAnswer.participant_id.label("participant_id"),
+                func.count(UserAnswer.id).filter(UserAnswer.is_correct == True).label("correct_answers_count"),
+                func.coalesce(
+                    func.sum(Question.score).filter(UserAnswer.is_correct == True), 0
+                ).label("total_score"),
+            )
+            .join(Question, UserAnswer.question_id == Question.id)
+            .where(Question.interactive_id == interactive_id)
+            .group_by(UserAnswer.participant_id)
+            .subquery()
+        )
 
-            # 3. Собираем аналитику по каждому участнику
-            analytics_data = []
-
-            for participant in participants:
-                # Получаем информацию о пользователе
-                user = await session.get(User, participant.user_id)
-                if not user:
-                    continue
-
-                vk_id = None
-                first_name = None
-                last_name = None
-                email = None
-                phone_number = None
-
-                if user.provider == "vk":
-                    vk_user = await session.execute(
-                        select(VkUser)
-                        .where(
-                            VkUser.user_id == user.id
-                        )
-                    )
-                    existing_vk_user = vk_user.scalar_one_or_none()
-                    if not existing_vk_user:
-                        continue
-
-                    vk_id = existing_vk_user.vk_user_id
-                    first_name = existing_vk_user.first_name
-                    last_name = existing_vk_user.last_name
-                    email = existing_vk_user.email if existing_vk_user.email is not None else ""
-                    phone_number = existing_vk_user.phone_number if existing_vk_user.phone_number is not None else ""
-                elif user.provider == "email":
-                    email_user = await session.execute(
-                        select(EmailUser)
-                        .where(
-                            EmailUser.user_id == user.id
-                        )
-                    )
-                    email_user = email_user.scalar_one_or_none()
-                    if not email_user:
-                        continue
-
-                    email = email_user.email
-
-                # Считаем количество правильных ответов для участника
-                correct_answers_count = await session.scalar(
-                    select(func.count(UserAnswer.id))
-                    .where(
-                        UserAnswer.participant_id == participant.id,
-                        UserAnswer.is_correct == True
-                    )
-                )
+    @classmethod
+    async def _get_participant_rows(cls, session, interactive_id: int):
+        """Участники с данными провайдера и итогами одним запросом, от лучшего к худшему.
+        Участники vk/email без записи провайдера пропускаются"""
+        totals = cls._participant_totals(interactive_id)
+        correct_answers_count = func.coalesce(totals.c.correct_answers_count, 0)
+        total_score = func.coalesce(totals.c.total_score, 0)
+        result = await session.execute(
+            select(
+                QuizParticipant.id,
+                QuizParticipant.name,
+                QuizParticipant.is_hidden,
+                QuizParticipant.is_blocked,
+                QuizParticipant.total_time,
+                User.provider,
+                VkUser.vk_user_id,
+                VkUser.first_name,
+                VkUser.last_name,
+                VkUser.email.label("vk_email"),
+                VkUser.phone_number,
+                EmailUser.email,
+                correct_answers_count.label("correct_answers_count"),
+                total_score.label("total_score"),
+            )
+            .join(User, QuizParticipant.user_id == User.id)
+            .outerjoin(VkUser, VkUser.user_id == User.id)
+            .outerjoin(EmailUser, EmailUser.user_id == User.id)
+            .outerjoin(totals, totals.c.participant_id == QuizParticipant.id)
+            .where(
+                QuizParticipant.interactive_id == interactive_id,
+                or_(User.provider != "vk", VkUser.id.is_not(None)),
+                or_(User.provider != "email", EmailUser.id.is_not(None)),
+            )
+            .order_by(total_score.desc(), QuizParticipant.total_time, QuizParticipant.id)
+        )
+        return result.all()
 
-                # Получаем время ответов участника
-                total_time = f"{participant.total_time // 60}:{participant.total_time % 60:02d}"
-
-                # Получаем сумму баллов за правильные ответы участника
-                stmt = (
-                    select(func.coalesce(func.sum(Question.score), 0))
-                    .select_from(UserAnswer)
-                    .join(Question, UserAnswer.question_id == Question.id)
-                    .where(
-                        UserAnswer.participant_id == participant.id,
-                        UserAnswer.is_correct == True
-                    )
-                )
+    @staticmethod
+    def _provider_fields(row) -> dict:
+        """Поля провайдера так, как их отдавал экспорт: пустые строки для vk, только email для email"""
+        if row.provider == "vk":
+            return dict(
+                vk_id=row.vk_user_id,
+                first_name=row.first_name,
+                last_name=row.last_name,
+                email=row.vk_email if row.vk_email is not None else "",
+                phone_number=row.phone_number if row.phone_number is not None else "",
+            )
+        if row.provider == "email":
+            return dict(vk_id=None, first_name=None, last_name=None, email=row.email, phone_number=None)
+        return dict(vk_id=None, first_name=None, last_name=None, email=None, phone_number=None)
+
+    @staticmethod
+    def _format_time(seconds: int) -> str:
+        return f"{seconds // 60}:{seconds % 60:02d}"
+
+    @classmethod
+    async def get_interactive_export_for_analise(cls, interactive_id: int) -> list[ExportForAnalise]:
+        async with new_session() as session:
+            # 1. Интерактив, ответственный и счётчики одним запросом
+            interactive, responsible_full_name, participant_count, question_count = \
+                await cls._get_interactive_header(session, interactive_id)
+
+            if not participant_count:
+                return []
 
-                result = await session.scalar(stmt)
-                total_score = result or 0
+            # 2. Участники с итогами, уже отсортированные
+            rows = await cls._get_participant_rows(session, interactive_id)
 
-                # Собираем данные для экспорта
-                analytics_data.append(ExportForAnalise(
+            return [
+                ExportForAnalise(
                     interactive_id=interactive_id,
                     title=interactive.title,
                     date_completed=cls._format_date2(interactive.date_completed),
-                    participant_count=len(participants),
-                    question_count=await cls._get_question_count(session, interactive_id),
+                    participant_count=participant_count,
+                    question_count=question_count,
                     target_audience=interactive.target_audience,
                     location=interactive.location,
                     responsible_full_name=responsible_full_name,
 
-                    provider=user.provider,
+                    provider=row.provider,
+                    **cls._provider_fields(row),
 
-                    vk_id=vk_id,
-                    first_name=first_name,
-                    last_name=last_name,
-                    email=email,
-                    phone_number=phone_number,
+                    name=row.name,
+                    is_hidden=row.is_hidden,
+                    is_blocked=row.is_blocked,
 
-                    name=participant.name,
-                    is_hidden=participant.is_hidden,
-                    is_blocked=participant.is_blocked,
-
-                    correct_answers_count=correct_answers_count,
-                    total_time=total_time,
-                    total_score=total_score,
-                ))
-
-            analytics_data.sort(key=lambda x: (-x.total_score, x.total_time))
-
-            return analytics_data
-
-    @classmethod
-    async def _get_question_count(cls, session, interactive_id: int) -> int:
-        """Вспомогательный метод для подсчета вопросов"""
-        result = await session.execute(
-            select(func.count())
-            .select_from(Question)
-            .where(Question.interactive_id == interactive_id)
-        )
-        return result.scalar()
+                    correct_answers_count=row.correct_answers_count,
+                    total_time=cls._format_time(row.total_time),
+                    total_score=row.total_score,
+                )
+                for row in rows
+            ]
 
     @staticmethod
     def _format_date2(date_obj: datetime | None) -> str | None:
@@ -182,189 +186,100 @@ class Repository:
 
         return yekat_time.strftime('%d.%m.%Y_%H-%M')
 
+    @staticmethod
+    def _answer_value(answer_data: dict) -> int | list[int] | str | None:
+        """Выбранный ответ так же, как UserAnswer.selected_answer_ids / text_answer, без загрузки сущности"""
+        answer_type = answer_data.get('type')
+        if answer_type == 'text':
+            return answer_data.get('answer_text')
+        if answer_type == 'one':
+            return answer_data.get('answer_id')
+        if answer_type == 'many':
+            return answer_data.get('answer_ids', [])
+        return None
+
     @classmethod
     async def get_export_for_leader(cls, interactive_id: int) -> ExportForLeaderData:
         async with new_session() as session:
-            # 1. Получаем информацию об интерактиве
-            interactive = await session.get(Interactive, interactive_id)
-            if not interactive:
-                raise InteractiveNotConductedException()
-
-            responsible_full_name = await session.get(OrganizationParticipant, interactive.created_by_id)
-            if not responsible_full_name:
-                raise InteractiveNotConductedException()
-            responsible_full_name = responsible_full_name.name
-
-            # 2. Получаем всех участников
-            participants = await session.execute(
-                select(QuizParticipant)
-                .where(QuizParticipant.interactive_id == interactive_id)
-            )
-            participants = participants.scalars().all()
+            # 1. Интерактив, ответственный и количество участников
+            interactive, responsible_full_name, participant_count, _ = \
+                await cls._get_interactive_header(session, interactive_id)
 
-            # 3. Получаем все вопросы и ответы для интерактива
+            # 2. Все вопросы с вариантами ответов одним запросом
             questions_result = await session.execute(
-                select(Question)
+                select(Question, Answer)
+                .outerjoin(Answer, Answer.question_id == Question.id)
                 .where(Question.interactive_id == interactive_id)
-                .order_by(Question.position)
+                .order_by(Question.position, Answer.id)
             )
-            questions = questions_result.scalars().all()
-
-            # 4. Формируем header
-            questions_data = []
-            for question in questions:
-                answers_result = await session.execute(
-                    select(Answer)
-                    .where(Answer.question_id == question.id)
-                )
-                answers = answers_result.scalars().all()
-
-                answers_data = [
-                    AnswerForLeaderHeader(
-                        id=answer.id,
-                        text=answer.text,
-                        is_correct=answer.is_correct
-                    )
-                    for answer in answers
-                ]
-
-                questions_data.append(
-                    QuestionForLeaderHeader(
+            questions_data: dict[int, QuestionForLeaderHeader] = {}
+            for question, answer in questions_result.all():
+                question_data = questions_data.get(question.id)
+                if question_data is None:
+                    question_data = questions_data[question.id] = QuestionForLeaderHeader(
                         id=question.id,
                         position=question.position,
                         text=question.text,
                         type=question.type,
                         score=question.score,
-                        answers=answers_data
+                        answers=[]
+                    )
+                if answer is not None:
+                    question_data.answers.append(
+                        AnswerForLeaderHeader(id=answer.id, text=answer.text, is_correct=answer.is_correct)
                     )
-                )
 
             header = ExportForLeaderHeader(
                 title=interactive.title,
                 interactive_id=interactive.id,
                 date_completed=cls._format_date(interactive.date_completed),
-                participant_count=len(participants),
+                participant_count=participant_count,
                 target_audience=interactive.target_audience,
                 location=interactive.location,
                 responsible_full_name=responsible_full_name,
-                question=questions_data
+                question=list(questions_data.values())
             )
 
-            # 5. Формируем body с ответами участников
-            body_data = []
-            for participant in participants:
-                user = await session.get(User, participant.user_id)
-                if not user:
-                    continue
-
-                vk_id = None
-                first_name = None
-                last_name = None
-                email = None
-                phone_number = None
-
-                if user.provider == "vk":
-                    vk_user = await session.execute(
-                        select(VkUser)
-                        .where(
-                            VkUser.user_id == user.id
-                        )
-                    )
-                    existing_vk_user = vk_user.scalar_one_or_none()
-                    if not existing_vk_user:
-                        continue
-
-                    vk_id = existing_vk_user.vk_user_id
-                    first_name = existing_vk_user.first_name
-                    last_name = existing_vk_user.last_name
-                    email = existing_vk_user.email if existing_vk_user.email is not None else ""
-                    phone_number = existing_vk_user.phone_number if existing_vk_user.phone_number is not None else ""
-                elif user.provider == "email":
-                    email_user = await session.execute(
-                        select(EmailUser)
-                        .where(
-                            EmailUser.user_id == user.id
-                        )
-                    )
-                    email_user = email_user.scalar_one_or_none()
-                    if not email_user:
-                        continue
-
-                    email = email_user.email
-
-                # Получаем все ответы участника
-                user_answers_result = await session.execute(
-                    select(UserAnswer)
-                    .where(UserAnswer.participant_id == participant.id)
+            # 3. Все ответы всех участников одним запросом, по участнику и вопросу
+            user_answers_result = await session.execute(
+                select(
+                    UserAnswer.participant_id,
+                    UserAnswer.question_id,
+                    UserAnswer.answer_data,
+                    UserAnswer.time,
+                    UserAnswer.is_correct,
                 )
-                user_answers = user_answers_result.scalars().all()
-
-                # Считаем правильные ответы
-                correct_answers = 0
-                participant_answers = []
-                for ua in user_answers:
-                    if ua.is_correct:
-                        correct_answers += 1
-
-                    answer_id = None
-                    if ua.answer_type == 'text':
-                        answer_id = ua.text_answer
-                    if ua.answer_type == 'one':
-                        answer_id = ua.selected_answer_ids[0]
-                    if ua.answer_type == 'many':
-                        answer_id = ua.selected_answer_ids
-
-                    time = f"{ua.time // 60}:{ua.time % 60:02d}"
-                    participant_answers.append(
-                        ParticipantAnswer(
-                            question_id=ua.question_id,
-                            answer_id=answer_id,
-                            time=time,
-                            is_correct=ua.is_correct,
-                        )
-                    )
-
-
-                # Получаем время ответов участника
-                total_time = f"{participant.total_time // 60}:{participant.total_time % 60:02d}"
-
-                # Получаем сумму баллов за правильные ответы участника
-                stmt = (
-                    select(func.coalesce(func.sum(Question.score), 0))
-                    .select_from(UserAnswer)
-                    .join(Question, UserAnswer.question_id == Question.id)
-                    .where(
-                        UserAnswer.participant_id == participant.id,
-                        UserAnswer.is_correct == True
-                    )
+                .join(QuizParticipant, UserAnswer.participant_id == QuizParticipant.id)
+                .where(QuizParticipant.interactive_id == interactive_id)
+            )
+            answers_by_participant: dict[int, dict[int, ParticipantAnswer]] = {}
+            for ua in user_answers_result.all():
+                answers_by_participant.setdefault(ua.participant_id, {})[ua.question_id] = ParticipantAnswer(
+                    question_id=ua.question_id,
+                    answer_id=cls._answer_value(ua.answer_data),
+                    time=cls._format_time(ua.time),
+                    is_correct=ua.is_correct,
                 )
 
-                result = await session.scalar(stmt)
-                total_score = result or 0
+            # 4. Участники с итогами, уже отсортированные
+            rows = await cls._get_participant_rows(session, interactive_id)
+            body_data = [
+                ExportForLeaderBody(
+                    provider=row.provider,
+                    **cls._provider_fields(row),
 
-                body_data.append(
-                    ExportForLeaderBody(
-                        provider=user.provider,
+                    name=row.name,
+                    is_blocked=row.is_blocked,
+                    is_hidden=row.is_hidden,
 
-                        vk_id=vk_id,
-                        first_name=first_name,
-                        last_name=last_name,
-                        email=email,
-                        phone_number=phone_number,
+                    correct_answers_count=row.correct_answers_count,
+                    total_time=cls._format_time(row.total_time),
+                    total_score=row.total_score,
 
-                        name=participant.name,
-                        is_blocked=participant.is_blocked,
-                        is_hidden=participant.is_hidden,
-
-                        correct_answers_count=correct_answers,
-                        total_time=total_time,
-                        total_score=total_score,
-
-                        answers=participant_answers
-                    )
+                    answers=answers_by_participant.get(row.id, {})
                 )
-
-            body_data.sort(key=lambda x: (-x.total_score, x.total_time))
+                for row in rows
+            ]
 
             return ExportForLeaderData(
                 header=header,
@@ -107,7 +107,7 @@ class ExportForLeaderBody(BaseModel):
     total_time: str
     total_score: int
 
-    answers: list[ParticipantAnswer]
+    answers: dict[int, ParticipantAnswer]  # question_id : ответ участника
 
 class ExportForLeaderData(BaseModel):
     header: ExportForLeaderHeader
@@ -120,4 +120,21 @@ class DateTitleSH(BaseModel):
 
 class ReturnUrl(BaseModel):
     url: str
-    name: str
\ No newline at end of file
+    name: str
+
+
+class ReportJobStatus(str, enum.Enum):
+    queued = "queued"
+    started = "started"
+    finished = "finished"
+    failed = "failed"
+
+
+class ExportJob(BaseModel):
+    job_id: str
+
+
+class ExportJobStatus(BaseModel):
+    status: ReportJobStatus
+    url: str | None = None  # ссылка на отчёт в MinIO, когда status = finished
+    name: str | None = None
\ No newline at end of file
@@ -0,0 +1,240 @@
+import abc
+import io
+import os
+import pickle
+import tempfile
+from datetime import time
+from typing import BinaryIO, NamedTuple
+
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+BORDER_STYLES = {"thin": 1, "medium": 2}
+TIME_FORMAT = "h:mm:ss"  # формат времени по умолчанию, как у openpyxl
+
+
+class Side(NamedTuple):
+    border_style: str | None = None
+    color: str | None = None
+
+
+class Border(NamedTuple):
+    left: Side | None = None
+    right: Side | None = None
+    top: Side | None = None
+    bottom: Side | None = None
+
+
+class PatternFill(NamedTuple):
+    start_color: str | None = None
+    end_color: str | None = None
+    fill_type: str | None = None
+
+
+class Font(NamedTuple):
+    bold: bool = False
+
+
+def get_column_letter(column: int) -> str:
+    """Буква колонки по номеру с 1, как в openpyxl"""
+    return xl_col_to_name(column - 1)
+
+
+class _Cell:
+    __slots__ = ("value", "border", "fill", "font", "number_format")
+
+    def __init__(self):
+        self.value = None
+        self.border: Border | None = None
+        self.fill: PatternFill | None = None
+        self.font: Font | None = None
+        self.number_format: str | None = None
+
+
+def _style_key(cell: _Cell) -> tuple | None:
+    """Стиль ячейки как ключ общего формата книги: одинаковые стили пишутся одним форматом"""
+    number_format = cell.number_format
+    if number_format is None and isinstance(cell.value, time):
+        number_format = TIME_FORMAT
+    key = (cell.border, cell.fill, cell.font, number_format)
+    return None if key == (None, None, None, None) else key
+
+
+class _BufferedSheet(abc.ABC):
+    """Лист с интерфейсом ячеек openpyxl, строки которого копятся в буфере.
+
+    Строка уходит дальше при flush(), после чего её менять нельзя: в памяти держатся только
+    ещё не записанные строки, а не весь лист."""
+
+    def __init__(self):
+        self._rows: dict[int, dict[int, _Cell]] = {}
+        self._merges: dict[int, dict[int, int]] = {}  # строка : {первая колонка : последняя колонка}
+        self._flushed = 0  # номер последней записанной строки
+
+    def cell(self, row: int, column: int, value=None) -> _Cell:
+        if row <= self._flushed:
+            raise ValueError(f"Row {row} is already written")
+        cells = self._rows.setdefault(row, {})
+        cell = cells.get(column)
+        if cell is None:
+            cell = cells[column] = _Cell()
+        if value is not None:
+            cell.value = value
+        return cell
+
+    def merge_cells(self, start_row: int, start_column: int, end_row: int, end_column: int):
+        if start_row != end_row:
+            raise ValueError("Only single-row merges are supported")
+        self.cell(start_row, start_column)
+        if end_column > start_column:
+            self._merges.setdefault(start_row, {})[start_column] = end_column
+
+    def append(self, values: list):
+        row = max(self._flushed, max(self._rows, default=0)) + 1
+        for column, value in enumerate(values, start=1):
+            self.cell(row, column, value)
+        self.flush()
+
+    @abc.abstractmethod
+    def set_column_width(self, column: int, width: float):
+        """Ширина колонки, номер с 1"""
+
+    def flush(self, before_row: int | None = None):
+        """Записывает строки буфера до before_row (все, если не задано)"""
+        for row in sorted(r for r in self._rows if before_row is None or r < before_row):
+            self._write_row(row, self._row_records(self._rows.pop(row), self._merges.pop(row, {})))
+            self._flushed = row
+        if before_row is not None:
+            self._flushed = max(self._flushed, before_row - 1)
+
+    @staticmethod
+    def _row_records(cells: dict[int, _Cell], merges: dict[int, int]) -> list[tuple]:
+        """Строка как список (колонка, значение, стиль, последняя колонка объединения или None)"""
+        covered = {c for start, end in merges.items() for c in range(start + 1, end + 1)}
+        return [
+            (column, cells[column].value, _style_key(cells[column]), merges.get(column))
+            for column in sorted(cells)
+            if column not in covered  # как в openpyxl: значение объединённой области берётся из первой ячейки
+        ]
+
+    @abc.abstractmethod
+    def _write_row(self, row: int, records: list[tuple]):
+        """Запись строки в виде списка из _row_records()"""
+
+
+class StreamingSheet(_BufferedSheet):
+    """Лист книги StreamingWorkbook, строки сразу пишутся XlsxWriter"""
+
+    def __init__(self, book: "StreamingWorkbook", worksheet):
+        super().__init__()
+        self._book = book
+        self._worksheet = worksheet
+
+    def set_column_width(self, column: int, width: float):
+        self._worksheet.set_column(column - 1, column - 1, width)
+
+    def _write_row(self, row: int, records: list[tuple]):
+        self._book.write_row(self._worksheet, row, records)
+
+
+class SheetRecorder(_BufferedSheet):
+    """Лист, строки которого по одной сериализуются в файл-план на диске.
+
+    Так лист можно нарисовать в другом процессе, а в книгу перенести через
+    StreamingWorkbook.replay_sheet(), не держа его целиком в памяти ни там, ни там."""
+
+    def __init__(self):
+        super().__init__()
+        self._file = tempfile.NamedTemporaryFile(suffix=".plan", delete=False)
+
+    def set_column_width(self, column: int, width: float):
+        pickle.dump(("width", column, width), self._file)
+
+    def _write_row(self, row: int, records: list[tuple]):
+        pickle.dump(("row", row, records), self._file)
+
+    def save(self) -> str:
+        """Дописывает буфер и возвращает путь к плану, файл удаляет replay_sheet()"""
+        self.flush()
+        self._file.close()
+        return self._file.name
+
+
+class StreamingWorkbook:
+    """Книга XlsxWriter в режиме constant_memory, которая пишется во временный файл на диске"""
+
+    def __init__(self):
+        self._output = tempfile.TemporaryFile()
+        self._workbook = xlsxwriter.Workbook(self._output, {"constant_memory": True, "strings_to_urls": False})
+        self._sheets: list[StreamingSheet] = []
+        self._formats: dict[tuple, object] = {}
+
+    def create_sheet(self, title: str) -> StreamingSheet:
+        sheet = StreamingSheet(self, self._workbook.add_worksheet(title))
+        self._sheets.append(sheet)
+        return sheet
+
+    def replay_sheet(self, title: str, path: str):
+        """Переносит в книгу лист, записанный SheetRecorder, и удаляет план"""
+        worksheet = self._workbook.add_worksheet(title)
+        try:
+            with open(path, "rb") as plan:
+                while True:
+                    try:
+                        record = pickle.load(plan)
+                    except EOFError:
+                        break
+                    if record[0] == "width":
+                        _, column, width = record
+                        worksheet.set_column(column - 1, column - 1, width)
+                    else:
+                        _, row, records = record
+                        self.write_row(worksheet, row, records)
+        finally:
+            os.remove(path)
+
+    def write_row(self, worksheet, row: int, records: list[tuple]):
+        for column, value, style, end in records:
+            cell_format = self.get_format(style)
+            if end is not None:
+                value = "" if value is None else value
+                worksheet.merge_range(row - 1, column - 1, row - 1, end - 1, value, cell_format)
+            else:
+                worksheet.write(row - 1, column - 1, value, cell_format)
+
+    def get_format(self, style: tuple | None):
+        if style is None:
+            return None
+        if style not in self._formats:
+            self._formats[style] = self._workbook.add_format(self._format_properties(*style))
+        return self._formats[style]
+
+    @staticmethod
+    def _format_properties(border: Border | None, fill: PatternFill | None, font: Font | None,
+                           number_format: str | None) -> dict:
+        properties = {}
+        if border is not None:
+            for edge in ("left", "right", "top", "bottom"):
+                side = getattr(border, edge)
+                if side is None or side.border_style is None:
+                    continue
+                properties[edge] = BORDER_STYLES[side.border_style]
+                if side.color:
+                    properties[f"{edge}_color"] = f"#{side.color}"
+        if fill is not None and fill.fill_type == "solid":
+            properties["pattern"] = 1
+            properties["bg_color"] = f"#{fill.start_color}"
+        if font is not None and font.bold:
+            properties["bold"] = True
+        if number_format is not None:
+            properties["num_format"] = number_format
+        return properties
+
+    def save(self) -> tuple[BinaryIO, int]:
+        """Дописывает все листы и возвращает открытый файл с начала и его размер, файл закрывает вызывающий"""
+        for sheet in self._sheets:
+            sheet.flush()
+        self._workbook.close()
+        size = self._output.seek(0, io.SEEK_END)
+        self._output.seek(0)
+        return self._output, size
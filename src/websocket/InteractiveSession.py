@@ -1,12 +1,18 @@
-from typing import List, Callable, Any
+from typing import Callable, Any
 import asyncio
 import weakref
 from enum import Enum
 
-from websocket.schemas import InteractiveInfo, Question, StageCountdown, DataStageCountdown, DataStageQuestion, \
+from websocket.schemas import InteractiveSnapshot, InteractiveResultData, Question, StageCountdown, DataStageCountdown, DataStageQuestion, \
     StageQuestion, DataStageDiscussion, StageDiscussion, DataStageEnd, StageEnd, DataStageWaiting, \
     StageWaiting, AnswerGet, Answer, InteractiveStatus, StatePause, DataPause, QuestionType
 from websocket.repository import Repository
+from websocket.scoreboard import Scoreboard
+from websocket.answer_stats import AnswerHistogram
+from websocket.answer_key import AnswerKey
+from websocket.answer_buffer import AnswerBuffer
+from websocket.checkpoint import CheckpointStore
+from websocket.scheduler import scheduler
 
 
 class Stage(str, Enum):
@@ -20,12 +26,15 @@ class Stage(str, Enum):
 class InteractiveSession:
     def __init__(
             self,
-            meta_data: InteractiveInfo,
-            questions: List[Question],
+            snapshot: InteractiveSnapshot,
+            standings: list[dict],
             broadcast_callback: Callable[[int, str], Any],
             get_participants_count: Callable[[int], Any],
-            session_manager
+            session_manager,
+            checkpoints: CheckpointStore | None = None
     ):
+        meta_data = snapshot.info
+        self.snapshot = snapshot  # вопросы и ответы из бд, больше в бд за ними не ходим
         self.interactive_id: int = meta_data.interactive_id  # из бд
         self.code: str = meta_data.code  # из бд
         self.title: str = meta_data.title  # из бд
@@ -36,7 +45,6 @@ class InteractiveSession:
 
         self.stage: Stage = Stage.WAITING  # фаза, нужна для обработки логики
 
-        self.time_task: asyncio.Task | None = None  # цикл интерактива
         self.timer_duration: int = 0  # таймер изначально, на текущей фазе
         self.remaining_time: int = 0  # оставшееся время, на текущей фазе
 
@@ -44,9 +52,13 @@ class InteractiveSession:
         self.second_step: int = 1  # для постановки интерактива на паузу
 
         self.question_index: int = -1  # индекс текущий вопрос
-        self.questions: List[Question] = questions  # сохраняю в оперативу сразу все вопросы
+        self.questions: tuple[Question, ...] = snapshot.questions  # сохраняю в оперативу сразу все вопросы
         self.current_question: Question | None = None  # для простаты запоминаю текущий вопрос
-        self.current_answers: list[AnswerGet] | None = None  # оптимизация получения вопросов
+        self.current_answers: tuple[AnswerGet, ...] | None = None  # оптимизация получения вопросов
+        self.histogram: AnswerHistogram | None = None  # счётчики ответов на текущий вопрос
+        self.answer_key: AnswerKey | None = None  # проверка ответов на текущий вопрос
+        self.final_result: InteractiveResultData | None = None  # итоги, считаются один раз на фазе END
+        self.answer_buffer = AnswerBuffer()  # ответы участников, которые ещё не записаны в бд
 
         self.get_participants_count = get_participants_count  # callback для получения кол-во активных пользователей
         self.broadcast_callback = broadcast_callback  # callback для отправки сообщения
@@ -57,6 +69,24 @@ class InteractiveSession:
 
         self.timer_for_rating = 0  # для подсчёта кол-во секунд которые затратили участники
 
+        self.checkpoints = checkpoints  # контрольные точки для продолжения после перезапуска
+        self._checkpoint_task: asyncio.Task | None = None  # запись последней точки
+        self._checkpoint_version = -1  # версия таблицы баллов в последней точке
+
+        self._ticked = False  # на текущей фазе уже был тик, следующий начинается с отсчёта секунды
+        self._end_ticks = 0  # сколько раз разослан итог
+
+        self.scoreboard = Scoreboard()  # живая таблица баллов и времени участников
+        for w in standings:
+            self.scoreboard.add(
+                participant_id=w["participant_id"],
+                user_id=w["user_id"],
+                username=w["username"],
+                is_hidden=w["is_hidden"],
+                score=w["score"],
+                total_time=w["total_time"]
+            )
+
     async def get_stage(self) -> Stage:
         """Получение текущей фазы"""
         return self.stage
@@ -113,25 +143,141 @@ class InteractiveSession:
         return
 
     async def start(self):
-        self.time_task = asyncio.create_task(self._main_loop())
-        self.time_task.add_done_callback(self._task_done)
+        self.answer_buffer.start()
+        scheduler.add(self.interactive_id, self.tick, on_done=self._finished)
 
     async def stop(self):
-        if self.time_task is not None:
-            self.time_task.cancel()  # Отправляем запрос на отмену задачи
-            try:
-                await self.time_task  # Ждём завершения задачи (нужно для обработки исключения отмены)
-            except asyncio.CancelledError:
-                pass  # Ожидаемое исключение при отмене задачи
-            self.time_task = None
+        if await scheduler.remove(self.interactive_id):  # отменяет и выполняющийся тик
+            await self.answer_buffer.stop()
+            await self.delete_checkpoint()
             manager = self._manager_ref()
             if manager is not None:
                 asyncio.create_task(manager.remove_session(self.interactive_id))
 
-    def _task_done(self, task):
+    async def demote(self):
+        """Сессию ведёт другой процесс: тики снимаются, ответы дописываются в бд, контрольная точка остаётся ему"""
+        await scheduler.remove(self.interactive_id)
+        if self._checkpoint_task is not None:
+            self._checkpoint_task.cancel()
+            await asyncio.gather(self._checkpoint_task, return_exceptions=True)
+        await self.answer_buffer.stop()
+
+    def dump_state(self) -> dict:
+        """Фаза и таймеры для контрольной точки"""
+        return {
+            "stage": self.stage.value,
+            "question_index": self.question_index,
+            "timer_duration": self.timer_duration,
+            "remaining_time": self.remaining_time,
+            "waiting_timer_flag": self.waiting_timer_flag,
+            "second_step": self.second_step,
+            "timer_n": self.timer_n,
+            "state": self.state.value,
+            "timer_for_rating": self.timer_for_rating,
+        }
+
+    def dump_results(self) -> dict:
+        """Таблица баллов и выбор вариантов на текущий вопрос для контрольной точки"""
+        return {
+            "scoreboard": self.scoreboard.dump(),
+            "question_id": self.histogram.question_id if self.histogram is not None else None,
+            "selected": self.histogram.selected if self.histogram is not None else {},
+        }
+
+    async def restore(self, checkpoint: dict):
+        """Продолжение сессии с контрольной точки, таймер фазы идёт с сохранённого значения"""
+        state = checkpoint["state"]
+        self.stage = Stage(state["stage"])
+        self.question_index = state["question_index"]
+        self.timer_duration = state["timer_duration"]
+        self.remaining_time = state["remaining_time"]
+        self.waiting_timer_flag = state["waiting_timer_flag"]
+        self.second_step = state["second_step"]
+        self.timer_n = state["timer_n"]
+        self.state = StatePause(state["state"])
+        self.timer_for_rating = state["timer_for_rating"]
+        self._ticked = False  # первый тик повторит сохранённый таймер
+
+        results = checkpoint["results"]
+        self.scoreboard = Scoreboard.load(results["scoreboard"])
+        if 0 <= self.question_index < len(self.questions):
+            self.current_question = self.questions[self.question_index]
+            self.current_answers = self.snapshot.answers[self.current_question.id]
+            self.histogram = AnswerHistogram(question_id=self.current_question.id, answers=self.current_answers)
+            self.answer_key = AnswerKey(question=self.current_question, answers=self.current_answers)
+            if results.get("question_id") == self.current_question.id:  # выбор к прошлому вопросу не переносим
+                for participant_id, answer_ids in results["selected"].items():
+                    self.histogram.record(participant_id=int(participant_id), answer_ids=answer_ids)
+        self.answer_buffer.load(checkpoint.get("pending", []))
+
+    def _checkpoint(self):
+        """Снимок состояния на границе тика, запись в фоне, пока идёт предыдущая - пропуск"""
+        if self.checkpoints is None or self.stage == Stage.END:
+            return
+        if self._checkpoint_task is not None and not self._checkpoint_task.done():
+            return
+        results = None
+        if self.scoreboard.version != self._checkpoint_version:
+            results = self.dump_results()
+            self._checkpoint_version = self.scoreboard.version
+        self._checkpoint_task = asyncio.create_task(
+            self._write_checkpoint(self.dump_state(), self.answer_buffer.dump(), results)
+        )
+
+    async def _write_checkpoint(self, state: dict, pending: list[dict], results: dict | None):
+        try:
+            await self.checkpoints.save(self.interactive_id, state=state, pending=pending, results=results)
+        except Exception as e:
+            self._checkpoint_version = -1  # таблицу запишем заново следующей точкой
+            print(f"Failed to save checkpoint {self.interactive_id}: {e}")
+
+    async def save_checkpoint(self):
+        """Последняя точка перед остановкой процесса"""
+        if self.checkpoints is None or self.stage == Stage.END:
+            return
+        if self._checkpoint_task is not None:
+            await asyncio.gather(self._checkpoint_task, return_exceptions=True)
+        await self.checkpoints.save(
+            self.interactive_id,
+            state=self.dump_state(),
+            pending=self.answer_buffer.dump(),
+            results=self.dump_results()
+        )
+
+    async def delete_checkpoint(self):
+        if self.checkpoints is None:
+            return
+        if self._checkpoint_task is not None:
+            self._checkpoint_task.cancel()
+            await asyncio.gather(self._checkpoint_task, return_exceptions=True)
+        try:
+            await self.checkpoints.delete(self.interactive_id)
+        except Exception as e:
+            print(f"Failed to delete checkpoint {self.interactive_id}: {e}")
+
+    async def _tick(self, message, stage: Stage, question_type: QuestionType | None = None):
+        """Рассылка кадра тика и контрольная точка"""
+        if question_type is None:
+            await self.broadcast_callback(self.interactive_id, message, stage)
+        else:
+            await self.broadcast_callback(self.interactive_id, message, stage, question_type=question_type)
+        self._checkpoint()
+
+    async def _finished(self):
+        """Интерактив закончился или тик упал с ошибкой"""
+        await self.answer_buffer.stop()
         manager = self._manager_ref()
         if manager is not None:
-            asyncio.create_task(manager.remove_session(self.interactive_id))
+            await manager.remove_session(self.interactive_id)
+
+    async def _flush_answers(self) -> bool:
+        """Сброс буфера ответов посреди интерактива. Ошибка бд не завершает сессию: ответы остаются
+        в буфере, их запишет следующий сброс"""
+        try:
+            await self.answer_buffer.flush()
+        except Exception:
+            return False  # уже залогировано в flush
+        return True
 
     async def _change_stage(self, new_stage: Stage):
         """Смена фазы интерактива"""
@@ -143,17 +289,24 @@ class InteractiveSession:
                 else:
                     self.question_index += 1
                     self.current_question = self.questions[self.question_index]
-                    self.current_answers = await Repository.get_question_answers(question_id=self.current_question.id)
+                    self.current_answers = self.snapshot.answers[self.current_question.id]
+                    self.histogram = AnswerHistogram(question_id=self.current_question.id, answers=self.current_answers)
+                    self.answer_key = AnswerKey(question=self.current_question, answers=self.current_answers)
                     self.stage = new_stage
                     self.timer_for_rating = 0
+                    self._checkpoint_version = -1  # пустой выбор нового вопроса пишется следующей точкой
                     return
             elif new_stage == Stage.DISCUSSION:
-                await asyncio.sleep(1)
-                await Repository.add_time_for_question(
-                    interactive_id=self.interactive_id,
+                await self._flush_answers()
+                self.scoreboard.close_question(  # время участников копится в памяти до конца интерактива
                     question_id=self.current_question.id,
                     time_question=self.timer_for_rating
                 )
+                await Repository.save_question_result(
+                    question_id=self.histogram.question_id,
+                    answered_count=self.histogram.total,
+                    distribution=self.histogram.counts
+                )
                 self.stage = new_stage
                 return
             else:
@@ -161,154 +314,166 @@ class InteractiveSession:
                 return
         return
 
-    async def _main_loop(self):
-        """Основной цикл программы"""
-        try:
-            while self.stage != Stage.END:
-                if self.stage == Stage.WAITING:
-                    await self._waiting_timer()
-
-                elif self.stage == Stage.COUNTDOWN:
-                    self.timer_duration = self.countdown_duration
-                    self.remaining_time = self.countdown_duration
-                    await self._countdonw_timer()
-
-                elif self.stage == Stage.QUESTION:
-                    self.timer_duration = self.answer_duration
-                    self.remaining_time = self.answer_duration
-                    await self._question_timer()
-
-                elif self.stage == Stage.DISCUSSION:
-                    self.timer_duration = self.discussion_duration
-                    self.remaining_time = self.discussion_duration
-                    await self._discussion_timer()
-            await self._end_interactive()
-        finally:
-            pass
-
-    async def _waiting_timer(self):
-        """Цикл для фазы ожидания"""
-        while self.waiting_timer_flag and self.stage != Stage.END:
-            stage_now = self.stage
-            await asyncio.sleep(1)
-            participants_count = await  self.get_participants_count(self.interactive_id)
-            data = DataStageWaiting(
-                title=self.title,
-                description=self.description,
-                code=self.code,
-                participants_active=participants_count
-            )
+    async def tick(self) -> bool:
+        """Один тик сессии из общего планировщика, False - интерактив завершён"""
+        while True:
+            if self.stage == Stage.WAITING:
+                if await self._waiting_tick():
+                    return True
+                await self._change_stage(Stage.COUNTDOWN)
+            elif self.stage == Stage.COUNTDOWN:
+                if await self._countdown_tick():
+                    return True
+                await self._change_stage(Stage.QUESTION)
+            elif self.stage == Stage.QUESTION:
+                if await self._question_tick():
+                    return True
+                await self._change_stage(Stage.DISCUSSION)
+            elif self.stage == Stage.DISCUSSION:
+                if await self._discussion_tick():
+                    return True
+                await self._change_stage(Stage.QUESTION)
+            else:
+                return await self._end_tick()
+            self._enter_stage()
+
+    def _enter_stage(self):
+        """Таймер новой фазы, первый тик фазы уходит сразу"""
+        self._ticked = False
+        if self.stage == Stage.COUNTDOWN:
+            self.timer_duration = self.countdown_duration
+        elif self.stage == Stage.QUESTION:
+            self.timer_duration = self.answer_duration
+        elif self.stage == Stage.DISCUSSION:
+            self.timer_duration = self.discussion_duration
+        else:
+            return
+        self.remaining_time = self.timer_duration
 
+    def _pause_tick(self):
+        """Отсчёт таймера паузы на вопросе и обсуждении"""
+        if self.second_step == 0:
             self.timer_n -= 1
             if self.timer_n <= 0:
                 if self.state == StatePause.yes:
-                    self.timer_n = 15 * 60
+                    self.timer_n = 5 * 60
                     self.state = StatePause.timer_n
-                elif self.state == StatePause.timer_n:
-                    manager = self._manager_ref()
-                    if manager is not None:
-                        asyncio.create_task(manager.disconnect_delete(self.interactive_id))
-
-            pause = DataPause(state=self.state, timer_n=self.timer_n)
 
-            result = StageWaiting(stage=stage_now, pause=pause, data=data)
-            await self.broadcast_callback(self.interactive_id, result, stage_now)
-        await self._change_stage(Stage.COUNTDOWN)
-        return
-
-    async def _countdonw_timer(self):
-        """цикл для фазы обратного отчёта"""
-        while self.remaining_time >= 0 and self.stage != Stage.END:
-            stage_now = self.stage
-            await self.broadcast_callback(
-                self.interactive_id,
-                StageCountdown(stage=stage_now, data=DataStageCountdown(timer=self.remaining_time)),
-                stage_now
-            )
-            await asyncio.sleep(1)
+    async def _waiting_tick(self) -> bool:
+        """Тик фазы ожидания"""
+        if not (self.waiting_timer_flag and self.stage != Stage.END):
+            return False
+        stage_now = self.stage
+        participants_count = await self.get_participants_count(self.interactive_id)
+        data = DataStageWaiting(
+            title=self.title,
+            description=self.description,
+            code=self.code,
+            participants_active=participants_count
+        )
+
+        self.timer_n -= 1
+        if self.timer_n <= 0:
+            if self.state == StatePause.yes:
+                self.timer_n = 15 * 60
+                self.state = StatePause.timer_n
+            elif self.state == StatePause.timer_n:
+                manager = self._manager_ref()
+                if manager is not None:
+                    asyncio.create_task(manager.disconnect_delete(self.interactive_id))
+
+        pause = DataPause(state=self.state, timer_n=self.timer_n)
+
+        result = StageWaiting(stage=stage_now, pause=pause, data=data)
+        await self._tick(result, stage_now)
+        return True
+
+    async def _countdown_tick(self) -> bool:
+        """Тик фазы обратного отчёта"""
+        if self._ticked:
             self.remaining_time -= self.second_step
-        await self._change_stage(Stage.QUESTION)
-        return
-
-    async def _question_timer(self):
-        """цикл для фазы вопроса"""
-        while self.remaining_time >= 0 and self.stage != Stage.END:
-            stage_now = self.stage
-            question_type = self.current_question.type
-
-            answer = None
-            if question_type == QuestionType.one or question_type == QuestionType.many:
-                answer = [Answer(**ans.dict(include={'id', 'text'})) for ans in self.current_answers]
-
-            data = DataStageQuestion(
-                questions_count=len(self.questions),
-                timer=self.remaining_time,
-                timer_duration=self.timer_duration,
-                title=self.title,
-                code=self.code,
-                question=self.current_question
-            )
-
-            if self.second_step == 0:
-                self.timer_n -= 1
-                if self.timer_n <= 0:
-                    if self.state == StatePause.yes:
-                        self.timer_n = 5 * 60
-                        self.state = StatePause.timer_n
-            pause = DataPause(state=self.state, timer_n=self.timer_n)
-
-            result = StageQuestion(stage=stage_now, pause=pause, data=data, data_answers=answer)
-            await self.broadcast_callback(self.interactive_id, result, stage_now)
-            await asyncio.sleep(1)
+        if not (self.remaining_time >= 0 and self.stage != Stage.END):
+            return False
+        stage_now = self.stage
+        await self._tick(StageCountdown(stage=stage_now, data=DataStageCountdown(timer=self.remaining_time)), stage_now)
+        self._ticked = True
+        return True
+
+    async def _question_tick(self) -> bool:
+        """Тик фазы вопроса"""
+        if self._ticked:
             self.remaining_time -= self.second_step
             self.timer_for_rating += 1
-
             if self.second_step == 0 and self.timer_n <= 0 and self.state == StatePause.timer_n:
                 self.stage = Stage.END
-
-        await self._change_stage(Stage.DISCUSSION)
-        return
-
-    async def _discussion_timer(self):
-        """цикл для фазы обсуждения"""
-        while self.remaining_time >= 0 and self.stage != Stage.END:
-            stage_now = self.stage
-            question_type = self.current_question.type
-            winners = await Repository.get_winners_discussion(interactive_id=self.interactive_id)
-            data = DataStageDiscussion(
-                questions_count=len(self.questions),
-                timer=self.remaining_time,
-                timer_duration=self.timer_duration,
-                title=self.title,
-                code=self.code,
-                question=self.current_question
-            )
-            if self.second_step == 0:
-                self.timer_n -= 1
-                if self.timer_n <= 0:
-                    if self.state == StatePause.yes:
-                        self.timer_n = 5 * 60
-                        self.state = StatePause.timer_n
-            pause = DataPause(state=self.state, timer_n=self.timer_n)
-            result = StageDiscussion(stage=stage_now, pause=pause, data=data, data_answers=None, winners=winners)
-            await self.broadcast_callback(self.interactive_id, result, stage_now, question_type=question_type)
-            await asyncio.sleep(1)
+        if not (self.remaining_time >= 0 and self.stage != Stage.END):
+            return False
+
+        stage_now = self.stage
+        question_type = self.current_question.type
+
+        answer = None
+        if question_type == QuestionType.one or question_type == QuestionType.many:
+            answer = [Answer(**ans.dict(include={'id', 'text'})) for ans in self.current_answers]
+
+        data = DataStageQuestion(
+            questions_count=len(self.questions),
+            timer=self.remaining_time,
+            timer_duration=self.timer_duration,
+            title=self.title,
+            code=self.code,
+            question=self.current_question
+        )
+
+        self._pause_tick()
+        pause = DataPause(state=self.state, timer_n=self.timer_n)
+
+        result = StageQuestion(stage=stage_now, pause=pause, data=data, data_answers=answer)
+        await self._tick(result, stage_now)
+        self._ticked = True
+        return True
+
+    async def _discussion_tick(self) -> bool:
+        """Тик фазы обсуждения"""
+        if self._ticked:
             self.remaining_time -= self.second_step
-
             if self.second_step == 0 and self.timer_n <= 0 and self.state == StatePause.timer_n:
                 self.stage = Stage.END
-
-        await self._change_stage(Stage.QUESTION)
-        return
-
-    async def _end_interactive(self):
-        """Обработка завершения интерактива"""
-        await Repository.mark_interactive_conducted(interactive_id=self.interactive_id)
-        for i in range(60):
-            stage_now = self.stage
-            participants_total = await Repository.get_participant_count(interactive_id=self.interactive_id)
-            data = DataStageEnd(title=self.title, participants_total=participants_total)
-            await self.broadcast_callback(self.interactive_id, StageEnd(stage=stage_now, data=data), stage_now)
-            await asyncio.sleep(1)
-        # Помечаем интерактив как завершённый в БД
-
+        if not (self.remaining_time >= 0 and self.stage != Stage.END):
+            return False
+
+        stage_now = self.stage
+        question_type = self.current_question.type
+        winners = self.scoreboard.top(3)
+        data = DataStageDiscussion(
+            questions_count=len(self.questions),
+            timer=self.remaining_time,
+            timer_duration=self.timer_duration,
+            title=self.title,
+            code=self.code,
+            question=self.current_question
+        )
+        self._pause_tick()
+        pause = DataPause(state=self.state, timer_n=self.timer_n)
+        result = StageDiscussion(stage=stage_now, pause=pause, data=data, data_answers=None, winners=winners)
+        await self._tick(result, stage_now, question_type=question_type)
+        self._ticked = True
+        return True
+
+    async def _end_tick(self) -> bool:
+        """Тик завершения: итог рассылается ещё минуту, потом сессия закрывается"""
+        if self._end_ticks == 0:
+            if not await self._flush_answers():
+                return True  # итоги считаются по бд, без всех ответов их не строим - повтор на следующем тике
+            await Repository.save_total_times(total_times=self.scoreboard.total_times())  # до итогов, они читают бд
+            self.final_result = await Repository.build_interactive_result(interactive_id=self.interactive_id)
+            await Repository.save_interactive_result(interactive_id=self.interactive_id, result=self.final_result)
+            await Repository.mark_interactive_conducted(interactive_id=self.interactive_id)  # Помечаем интерактив как завершённый в БД
+            await self.delete_checkpoint()
+        if self._end_ticks >= 60:
+            return False
+        stage_now = self.stage
+        data = DataStageEnd(title=self.title, participants_total=self.final_result.participants_total)
+        await self.broadcast_callback(self.interactive_id, StageEnd(stage=stage_now, data=data), stage_now)
+        self._end_ticks += 1
+        return True
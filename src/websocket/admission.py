@@ -0,0 +1,64 @@
+import asyncio
+
+from websocket.repository import Repository
+from websocket.schemas import AdmittedParticipant
+
+ADMISSION_WINDOW = 0.005  # секунд, за которые новые участники собираются в один INSERT
+ADMISSION_BATCH_SIZE = 500  # участников в одном INSERT, больше - запись сразу
+
+
+class AdmissionBatcher:
+    """Пакетная запись новых участников.
+
+    Когда ведущий показывает QR-код, за секунды подключаются сотни человек. Вместо INSERT на каждого
+    подключения ждут общий INSERT ... RETURNING, который уходит раз в ADMISSION_WINDOW секунд,
+    повторное подключение того же пользователя ждёт ту же запись, в том числе уже отправленную."""
+
+    def __init__(self):
+        self._pending: dict[tuple[int, int], asyncio.Future] = {}  # (interactive_id, user_id) : ожидание записи
+        self._inflight: dict[tuple[int, int], asyncio.Future] = {}  # отправленные, INSERT ещё не вернулся
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    async def register(self, interactive_id: int, user_id: int) -> AdmittedParticipant:
+        key = (interactive_id, user_id)
+        future = self._pending.get(key) or self._inflight.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._pending[key] = future
+            if len(self._pending) >= ADMISSION_BATCH_SIZE:
+                self._flush()
+            elif self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(ADMISSION_WINDOW, self._flush)
+        return await asyncio.shield(future)  # отключившийся клиент не отменяет запись остальных
+
+    def _flush(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch, self._pending = self._pending, {}
+        if batch:
+            self._inflight.update(batch)
+            asyncio.create_task(self._insert(batch))
+
+    async def _insert(self, batch: dict[tuple[int, int], asyncio.Future]):
+        try:
+            participants = await Repository.register_quiz_participants(pending=list(batch))
+        except Exception as e:
+            print(f"Failed to register participants: {e}")
+            for future in batch.values():
+                if not future.done():
+                    future.set_exception(e)
+                    future.exception()  # ожидающего могли уже отключить, без предупреждения в лог
+            return
+        finally:
+            for key, future in batch.items():
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
+        for participant in participants:
+            future = batch.pop((participant.interactive_id, participant.user_id), None)
+            if future is not None and not future.done():
+                future.set_result(participant)
+        for future in batch.values():
+            if not future.done():
+                future.set_exception(RuntimeError("Participant was not registered"))
+                future.exception()
@@ -0,0 +1,98 @@
+import asyncio
+
+from models import UserAnswer
+from websocket.repository import Repository
+from websocket.schemas import QuestionType
+
+FLUSH_INTERVAL = 1  # секунд между сбросами буфера в бд
+
+
+class AnswerBuffer:
+    """Буфер ответов участников с отложенной записью.
+
+    Ответы копятся в памяти по (participant_id, question_id), побеждает последний,
+    и сбрасываются в бд пачкой одним INSERT ... ON CONFLICT DO UPDATE."""
+
+    def __init__(self):
+        self._pending: dict[tuple[int, int], UserAnswer] = {}  # (participant_id, question_id) : ответ
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, participant_id: int, question_id: int, time: int, is_correct: bool, question_type: QuestionType,
+            answer_id: int = None, answer_ids: list[int] = None, answer_text: str = None,
+            matched_answer_id: int = None):
+        user_answer = UserAnswer(
+            participant_id=participant_id,
+            question_id=question_id,
+            time=time,
+            is_correct=is_correct
+        )
+        if question_type == QuestionType.one:
+            user_answer.set_single_choice(answer_id)
+        elif question_type == QuestionType.many:
+            user_answer.set_multiple_choice(answer_ids)
+        elif question_type == QuestionType.text:
+            user_answer.set_text_answer(answer_text, matched_answer_id=matched_answer_id)
+        self._pending[(participant_id, question_id)] = user_answer
+
+    async def flush(self):
+        """Запись накопленных ответов, при ошибке они вернутся в буфер до следующего сброса"""
+        async with self._lock:
+            if not self._pending:
+                return
+            batch, self._pending = self._pending, {}
+            try:
+                await Repository.put_user_answers(user_answers=list(batch.values()))
+            except Exception as e:
+                print(f"Failed to flush user answers: {e}")
+                for key, user_answer in batch.items():
+                    self._pending.setdefault(key, user_answer)  # более свежий ответ не затираем
+                raise
+
+    def start(self):
+        self._task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception:
+            pass  # ошибка уже залогирована в flush
+
+    def dump(self) -> list[dict]:
+        """Неотправленные ответы для контрольной точки сессии"""
+        return [
+            {
+                "participant_id": a.participant_id,
+                "question_id": a.question_id,
+                "time": a.time,
+                "is_correct": a.is_correct,
+                "answer_data": a.answer_data,
+            } for a in self._pending.values()
+        ]
+
+    def load(self, rows: list[dict]):
+        """Возврат ответов из контрольной точки после перезапуска"""
+        for row in rows:
+            self._pending.setdefault((row["participant_id"], row["question_id"]), UserAnswer(**row))
+
+    def clear(self):
+        """Сброс без записи, когда участники интерактива удаляются"""
+        self._pending.clear()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception:
+                pass  # ответы остались в буфере, повторим на следующем цикле
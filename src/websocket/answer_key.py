@@ -0,0 +1,117 @@
+import unicodedata
+
+from websocket.schemas import Question, AnswerGet, QuestionType
+
+MAX_TYPOS = 2  # наибольшее число опечаток в текстовом ответе, 0 - только точное совпадение
+
+
+def normalize_text(text: str) -> str:
+    """Текстовый ответ для сравнения: NFKC, без регистра, ё как е, без пунктуации и лишних пробелов"""
+    text = unicodedata.normalize("NFKC", text).casefold().replace("ё", "е")
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in text)
+    return " ".join(text.split())
+
+
+def allowed_typos(text: str) -> int:
+    """Опечатки, допустимые для ответа такой длины: в коротких словах опечатка меняет смысл"""
+    if len(text) < 5:
+        return 0
+    if len(text) < 10:
+        return min(1, MAX_TYPOS)
+    return MAX_TYPOS
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Расстояние Левенштейна, больше limit не считается точно и возвращается limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Дерево Буркхарда-Келлера для поиска ближайшего ответа с опечатками"""
+
+    def __init__(self):
+        self._root: tuple[str, dict] | None = None  # (слово, {расстояние : поддерево})
+
+    def add(self, word: str):
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            distance = edit_distance(word, node[0], len(word) + len(node[0]))
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def closest(self, word: str, limit: int) -> str | None:
+        """Ближайшее слово на расстоянии не больше limit"""
+        if self._root is None or limit <= 0:
+            return None
+        best, best_distance = None, limit + 1
+        stack = [self._root]
+        while stack:
+            node_word, children = stack.pop()
+            distance = edit_distance(word, node_word, len(word) + len(node_word))  # для отсечения нужно точное
+            if distance < best_distance:
+                best, best_distance = node_word, distance
+            for edge, child in children.items():
+                if distance - limit <= edge <= distance + limit:
+                    stack.append(child)
+        return best if best_distance <= limit else None
+
+
+class AnswerKey:
+    """Ключ ответов вопроса, собирается один раз при старте вопроса.
+
+    Варианты и правильные ответы лежат во frozenset, текстовые ответы - в словаре нормализованный
+    текст : id ответа, так что проверка ответа участника не зависит от числа вариантов.
+    Опечатки в текстовых ответах ищутся в BK-дереве, если точного совпадения нет."""
+
+    def __init__(self, question: Question, answers: tuple[AnswerGet, ...]):
+        self.question_type = question.type
+        self.answer_ids = frozenset(answer.id for answer in answers)
+        self.correct_ids = frozenset(answer.id for answer in answers if answer.is_correct)
+        self._texts: dict[str, int] = {}  # нормализованный текст : id ответа
+        self._typos: BKTree | None = None
+        if question.type == QuestionType.text:
+            for answer in answers:
+                self._texts.setdefault(normalize_text(answer.text), answer.id)
+            if MAX_TYPOS > 0:
+                self._typos = BKTree()
+                for text in self._texts:
+                    self._typos.add(text)
+
+    def check_one(self, answer_id: int) -> bool | None:
+        """Правильность выбора одного варианта, None - такого варианта нет"""
+        if answer_id not in self.answer_ids:
+            return None
+        return answer_id in self.correct_ids
+
+    def check_many(self, answer_ids: list[int]) -> bool | None:
+        selected = frozenset(answer_ids)
+        if not selected <= self.answer_ids:
+            return None
+        return selected == self.correct_ids
+
+    def match_text(self, text: str) -> int | None:
+        """id принятого текстового ответа, совпавшего с ответом участника"""
+        normalized = normalize_text(text)
+        answer_id = self._texts.get(normalized)
+        if answer_id is not None or self._typos is None:
+            return answer_id
+        closest = self._typos.closest(normalized, allowed_typos(normalized))
+        return self._texts[closest] if closest is not None else None
@@ -0,0 +1,49 @@
+from websocket.schemas import AnswerGet, Percentage, PercentageTypeText
+
+
+class AnswerHistogram:
+    """Живые счётчики выбора вариантов ответа на вопрос.
+
+    Обновляются при каждом ответе участника, повторный ответ заменяет предыдущий,
+    поэтому проценты для фазы обсуждения считаются из памяти."""
+
+    def __init__(self, question_id: int, answers: list[AnswerGet]):
+        self.question_id = question_id
+        self.answers = answers
+        self.counts: dict[int, int] = {a.id: 0 for a in answers}  # answer_id : сколько раз выбран
+        self.selected: dict[int, tuple[int, ...]] = {}  # participant_id : выбранные answer_id
+
+    @property
+    def total(self) -> int:
+        """Количество ответивших участников"""
+        return len(self.selected)
+
+    def record(self, participant_id: int, answer_ids: list[int]):
+        previous = self.selected.get(participant_id, ())
+        for answer_id in previous:
+            if answer_id in self.counts:
+                self.counts[answer_id] -= 1
+
+        current = tuple(answer_ids)
+        for answer_id in current:
+            if answer_id in self.counts:
+                self.counts[answer_id] += 1
+        self.selected[participant_id] = current
+
+    def matched_answer_id(self, participant_id: int) -> int | None:
+        """Вариант, с которым совпал текстовый ответ участника"""
+        selected = self.selected.get(participant_id)
+        if selected:
+            return selected[0]
+        return None
+
+    def _percentage(self, answer_id: int) -> float:
+        if self.total == 0:
+            return 0.0
+        return round((self.counts[answer_id] / self.total) * 100, 2)
+
+    def percentages(self) -> list[Percentage]:
+        return [Percentage(id=a.id, percentage=self._percentage(a.id)) for a in self.answers]
+
+    def percentages_for_text(self) -> list[PercentageTypeText]:
+        return [PercentageTypeText(id=a.id, text=a.text, percentage=self._percentage(a.id)) for a in self.answers]
@@ -0,0 +1,55 @@
+import redis.asyncio as redis
+
+from config import REDIS_HOST, REDIS_PORT
+from websocket.codec import dumps, loads
+
+CHECKPOINT_TTL = 2 * 60 * 60  # секунд, сколько хранится точка брошенной сессии
+CHECKPOINTS_KEY = "session_checkpoints"  # множество interactive_id с контрольными точками
+
+
+def checkpoint_key(interactive_id: int) -> str:
+    return f"session_checkpoint:{interactive_id}"
+
+
+class CheckpointStore:
+    """Контрольные точки живых сессий в Redis.
+
+    Точка - hash из трёх частей: state (фаза и таймеры, пишется каждый тик), results (таблица
+    баллов и выбор вариантов, пишется только после изменений) и pending (ответы, ещё не
+    записанные в бд). После перезапуска процесса сессия продолжается с последнего тика."""
+
+    def __init__(self):
+        self.redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+
+    async def save(self, interactive_id: int, state: dict, pending: list[dict], results: dict | None = None):
+        mapping = {
+            "state": dumps(state),
+            "pending": dumps(pending),
+        }
+        if results is not None:
+            mapping["results"] = dumps(results)
+        key = checkpoint_key(interactive_id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.expire(key, CHECKPOINT_TTL)
+            pipe.sadd(CHECKPOINTS_KEY, interactive_id)
+            await pipe.execute()
+
+    async def load(self, interactive_id: int) -> dict | None:
+        data = await self.redis.hgetall(checkpoint_key(interactive_id))
+        if not data or b"state" not in data or b"results" not in data:
+            return None
+        return {key.decode(): loads(value) for key, value in data.items()}
+
+    async def delete(self, interactive_id: int):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(checkpoint_key(interactive_id))
+            pipe.srem(CHECKPOINTS_KEY, interactive_id)
+            await pipe.execute()
+
+    async def live_ids(self) -> list[int]:
+        """Интерактивы, которые шли в момент остановки процесса"""
+        return [int(i) for i in await self.redis.smembers(CHECKPOINTS_KEY)]
+
+    async def close(self):
+        await self.redis.aclose()
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Callable, Awaitable
+
+import redis.asyncio as redis
+
+from config import REDIS_HOST, REDIS_PORT
+from websocket.codec import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+NODE_ID = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"  # процесс в кластере
+
+OWNER_LEASE = 15  # секунд, через сколько сессия упавшего процесса считается свободной
+LEASE_REFRESH = 5  # секунд между продлениями аренды
+DELETE_POLL = 0.2  # секунд между проверками, снял ли владелец аренду при удалении
+
+LIVE_SESSIONS_KEY = "live_sessions"  # hash interactive_id : текущая фаза
+MODERATION_CHANNEL = "live_sessions:moderation"  # дельты списка участников для модератора
+
+# продление и снятие аренды, только если сессией всё ещё владеет этот процесс
+_RENEW_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('EXPIRE', KEYS[2], ARGV[2] * 4)
+    return redis.call('EXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('HDEL', KEYS[2], ARGV[2])
+    redis.call('DEL', KEYS[3])
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def owner_key(interactive_id: int) -> str:
+    return f"live_session:{interactive_id}:owner"
+
+
+def online_key(interactive_id: int) -> str:
+    return f"live_session:{interactive_id}:online"
+
+
+def blocked_key(interactive_id: int) -> str:
+    """Заблокированные участники, по ним пересылающие процессы проверяют resume-токены"""
+    return f"live_session:{interactive_id}:blocked"
+
+
+def frames_channel(interactive_id: int) -> str:
+    """Владелец -> все процессы: кадры тика и служебные события"""
+    return f"live_session:{interactive_id}:frames"
+
+
+def inbox_channel(interactive_id: int) -> str:
+    """Процессы -> владелец: действия участников, ведущего и модератора"""
+    return f"live_session:{interactive_id}:inbox"
+
+
+Handler = Callable[[int, dict], Awaitable[None]]
+LeaseLost = Callable[[int], Awaitable[None]]
+
+
+class SessionBus:
+    """Шина живых сессий в Redis для запуска нескольких воркеров.
+
+    У каждого интерактива ровно один процесс-владелец (аренда SET NX EX), он ведёт цикл таймеров
+    и публикует кадры тика. Остальные процессы держат сокеты своих клиентов, рассылают им кадры
+    владельца и пересылают ему сообщения клиентов.
+
+    Если аренду продлить не удалось, сессию мог забрать другой процесс: вызывается on_lease_lost,
+    и этот процесс должен перестать вести сессию."""
+
+    def __init__(self, on_lease_lost: LeaseLost | None = None):
+        self.redis = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, db=0)
+        self._renew = self.redis.register_script(_RENEW_SCRIPT)
+        self._release = self.redis.register_script(_RELEASE_SCRIPT)
+        self._leases: dict[int, asyncio.Task] = {}  # interactive_id : продление аренды
+        self._listeners: dict[str, asyncio.Task] = {}  # канал : задача подписки
+        self.on_lease_lost = on_lease_lost
+
+    async def acquire(self, interactive_id: int) -> bool:
+        """Попытка стать владельцем сессии"""
+        acquired = await self.redis.set(owner_key(interactive_id), NODE_ID, nx=True, ex=OWNER_LEASE)
+        if acquired:
+            self._leases[interactive_id] = asyncio.create_task(self._renew_loop(interactive_id))
+        return bool(acquired)
+
+    async def release(self, interactive_id: int):
+        task = self._leases.pop(interactive_id, None)
+        if task is not None:
+            task.cancel()
+        await self._release(
+            keys=[owner_key(interactive_id), LIVE_SESSIONS_KEY, blocked_key(interactive_id)],
+            args=[NODE_ID, interactive_id]
+        )
+
+    def owns(self, interactive_id: int) -> bool:
+        return interactive_id in self._leases
+
+    async def is_live(self, interactive_id: int) -> bool:
+        return bool(await self.redis.exists(owner_key(interactive_id)))
+
+    async def get_owner(self, interactive_id: int) -> str | None:
+        """Процесс, который сейчас ведёт сессию"""
+        owner = await self.redis.get(owner_key(interactive_id))
+        return owner.decode() if owner is not None else None
+
+    async def get_stage(self, interactive_id: int) -> str | None:
+        """Фаза живой сессии по данным владельца"""
+        if not await self.is_live(interactive_id):
+            return None
+        stage = await self.redis.hget(LIVE_SESSIONS_KEY, interactive_id)
+        return stage.decode() if stage is not None else None
+
+    async def set_stage(self, interactive_id: int, stage: str):
+        await self.redis.hset(LIVE_SESSIONS_KEY, interactive_id, stage)
+
+    async def add_blocked(self, interactive_id: int, *participant_ids: int):
+        """Владелец отмечает заблокированных участников для остальных процессов"""
+        if not participant_ids:
+            return
+        key = blocked_key(interactive_id)
+        await self.redis.sadd(key, *participant_ids)
+        await self.redis.expire(key, OWNER_LEASE * 4)  # продлевается вместе с арендой
+
+    async def is_blocked(self, interactive_id: int, participant_id: int) -> bool:
+        return bool(await self.redis.sismember(blocked_key(interactive_id), participant_id))
+
+    async def set_online(self, interactive_id: int, count: int):
+        """Сколько участников интерактива подключено к этому процессу"""
+        key = online_key(interactive_id)
+        if count:
+            await self.redis.hset(key, NODE_ID, count)
+            await self.redis.expire(key, OWNER_LEASE * 4)
+        else:
+            await self.redis.hdel(key, NODE_ID)
+
+    async def online_total(self, interactive_id: int) -> int:
+        return sum(int(v) for v in await self.redis.hvals(online_key(interactive_id)))
+
+    async def publish(self, interactive_id: int, payload: dict):
+        """Событие владельца для всех процессов"""
+        payload["node"] = NODE_ID
+        await self.redis.publish(frames_channel(interactive_id), dumps(payload))
+
+    async def send_to_owner(self, interactive_id: int, payload: dict):
+        payload["node"] = NODE_ID
+        await self.redis.publish(inbox_channel(interactive_id), dumps(payload))
+
+    async def publish_moderation(self, interactive_id: int, frame: str):
+        """Кадр для модератора, подключённого к другому процессу"""
+        payload = {"interactive_id": interactive_id, "frame": frame, "node": NODE_ID}
+        await self.redis.publish(MODERATION_CHANNEL, dumps(payload))
+
+    def listen_frames(self, interactive_id: int, handler: Handler):
+        self._listen(frames_channel(interactive_id), interactive_id, handler)
+
+    def listen_inbox(self, interactive_id: int, handler: Handler):
+        self._listen(inbox_channel(interactive_id), interactive_id, handler)
+
+    def listen_moderation(self, handler: Handler):
+        self._listen(MODERATION_CHANNEL, None, handler)
+
+    def stop_listening(self, interactive_id: int):
+        for channel in (frames_channel(interactive_id), inbox_channel(interactive_id)):
+            self._stop_channel(channel)
+
+    def _stop_channel(self, channel: str):
+        task = self._listeners.pop(channel, None)
+        if task is not None:
+            task.cancel()
+
+    async def close(self):
+        for task in [*self._leases.values(), *self._listeners.values()]:
+            task.cancel()
+        for interactive_id in list(self._leases):
+            try:
+                await self.release(interactive_id)
+            except Exception:
+                pass
+        await self.redis.aclose()
+
+    def _listen(self, channel: str, interactive_id: int | None, handler: Handler):
+        if channel not in self._listeners:
+            self._listeners[channel] = asyncio.create_task(self._listen_loop(channel, interactive_id, handler))
+
+    async def _listen_loop(self, channel: str, interactive_id: int | None, handler: Handler):
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(channel)
+        try:
+            async for message in pubsub.listen():
+                if message["type"] != "message":
+                    continue
+                payload = loads(message["data"])
+                if payload.get("node") == NODE_ID:
+                    continue  # своё событие уже обработано локально
+                try:
+                    await handler(interactive_id if interactive_id is not None else payload["interactive_id"], payload)
+                except Exception:
+                    logger.exception("Failed to handle %s message", channel)
+        finally:
+            await pubsub.aclose()
+
+    async def _renew_loop(self, interactive_id: int):
+        renewed_at = time.monotonic()
+        while True:
+            await asyncio.sleep(LEASE_REFRESH)
+            try:
+                renewed = bool(await self._renew(
+                    keys=[owner_key(interactive_id), blocked_key(interactive_id)],
+                    args=[NODE_ID, OWNER_LEASE]
+                ))
+            except Exception as e:
+                logger.warning("Failed to renew session lease %s: %s", interactive_id, e)
+                # пока redis недоступен, аренда могла истечь и уйти другому процессу
+                if time.monotonic() - renewed_at < OWNER_LEASE:
+                    continue
+                renewed = False
+            if renewed:
+                renewed_at = time.monotonic()
+                continue
+
+            logger.error("Session lease %s lost, the session is stopped on this node", interactive_id)
+            self._leases.pop(interactive_id, None)
+            self._stop_channel(inbox_channel(interactive_id))
+            if self.on_lease_lost is not None:
+                try:
+                    await self.on_lease_lost(interactive_id)
+                except Exception:
+                    logger.exception("Failed to stop session %s after losing its lease", interactive_id)
+            return
@@ -0,0 +1,134 @@
+from typing import TypeVar
+
+import msgpack
+import orjson
+from fastapi import WebSocket, WebSocketDisconnect
+from pydantic import BaseModel
+
+from websocket.schemas import WireFormat
+
+M = TypeVar("M", bound=BaseModel)
+
+MSGPACK_SUBPROTOCOL = "quiz.msgpack.v1"  # Sec-WebSocket-Protocol бинарного формата
+
+# Ключи объектов, которые в msgpack передаются номером в этом списке. Список только дополняется:
+# клиент получает его первым кадром после подключения.
+FIELD_TAGS = (
+    "stage", "pause", "data", "state", "timer_n", "title", "description", "code", "participants_active",
+    "timer", "timer_duration", "questions_count", "question", "id", "text", "type", "position", "image",
+    "question_weight", "data_answers", "answers", "winners", "username", "score", "time", "participant_id",
+    "is_hidden", "is_blocked", "percentages", "id_correct_answer", "correct_answers", "percentage",
+    "is_correct", "answer", "participants_total", "server_time", "deadline", "pause_deadline", "changes",
+    "added", "updated", "removed", "resume_token",
+)
+_TAG_OF = {name: tag for tag, name in enumerate(FIELD_TAGS)}
+
+
+def dumps(value) -> str:
+    """Компактный json без экранирования кириллицы, как json.dumps(ensure_ascii=False, separators=(",", ":")).
+    Нестроковые ключи словаря, как и в json.dumps, становятся строками"""
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
+def loads(data: str | bytes):
+    return orjson.loads(data)
+
+
+def encode_model(model: BaseModel) -> str:
+    """Исходящий кадр из схемы, сериализация в pydantic-core без промежуточного dict"""
+    return model.model_dump_json()
+
+
+def get_wire_format(websocket: WebSocket) -> WireFormat:
+    """Бинарный формат, если клиент предложил его в Sec-WebSocket-Protocol, иначе json"""
+    if MSGPACK_SUBPROTOCOL in websocket.scope.get("subprotocols", []):
+        return WireFormat.msgpack
+    return WireFormat.json
+
+
+async def accept(websocket: WebSocket, wire: WireFormat):
+    """Принятие вебсокета с выбранным подпротоколом, бинарному клиенту сразу уходит таблица ключей"""
+    if wire == WireFormat.msgpack:
+        await websocket.accept(subprotocol=MSGPACK_SUBPROTOCOL)
+        await websocket.send_bytes(tags_frame())
+    else:
+        await websocket.accept()
+
+
+def tags_frame() -> bytes:
+    return msgpack.packb({"type": "tags", "tags": list(FIELD_TAGS)})
+
+
+def _tag(value):
+    if isinstance(value, dict):
+        return {_TAG_OF.get(key, key): _tag(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_tag(item) for item in value]
+    return value
+
+
+def _untag(value):
+    if isinstance(value, dict):
+        return {
+            FIELD_TAGS[key] if isinstance(key, int) and 0 <= key < len(FIELD_TAGS) else key: _untag(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_untag(item) for item in value]
+    return value
+
+
+def pack(value) -> bytes:
+    return msgpack.packb(_tag(value))
+
+
+def json_to_msgpack(frame: str) -> bytes:
+    """Готовый json-кадр в msgpack с номерами ключей"""
+    return pack(orjson.loads(frame))
+
+
+def pack_fields(fields: dict) -> tuple[int, bytes]:
+    """Пары ключ-значение map без заголовка, чтобы склеивать их как json-фрагменты в frames.splice"""
+    packer = msgpack.Packer()
+    body = b"".join(packer.pack(_TAG_OF.get(key, key)) + packer.pack(_tag(value)) for key, value in fields.items())
+    return len(fields), body
+
+
+def map_header(size: int) -> bytes:
+    if size < 16:
+        return bytes((0x80 | size,))
+    if size < 0x10000:
+        return b"\xde" + size.to_bytes(2, "big")
+    return b"\xdf" + size.to_bytes(4, "big")
+
+
+def splice_packed(base: tuple[int, bytes], fields: tuple[int, bytes]) -> bytes:
+    """Общая часть кадра и конверт участника одним msgpack map"""
+    return map_header(base[0] + fields[0]) + base[1] + fields[1]
+
+
+def encode_for(wire: WireFormat, frame: str) -> str | bytes:
+    return json_to_msgpack(frame) if wire == WireFormat.msgpack else frame
+
+
+async def send_frame(websocket: WebSocket, wire: WireFormat, frame: str):
+    """Отправка json-кадра в формате клиента"""
+    if wire == WireFormat.msgpack:
+        await websocket.send_bytes(json_to_msgpack(frame))
+    else:
+        await websocket.send_text(frame)
+
+
+async def receive_model(websocket: WebSocket, schema: type[M], wire: WireFormat = WireFormat.json) -> M:
+    """Следующее сообщение клиента, сырой текст или байты валидируются сразу в схему.
+    Бинарный клиент присылает msgpack, ключи строками или номерами из FIELD_TAGS"""
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    raw = message.get("text")
+    if raw is not None:
+        return schema.model_validate_json(raw)
+    raw = message.get("bytes")
+    if wire == WireFormat.msgpack:
+        return schema.model_validate(_untag(msgpack.unpackb(raw)))
+    return schema.model_validate_json(raw)
@@ -0,0 +1,44 @@
+from users.schemas import UserRoleEnum
+
+from websocket.schemas import WebSocketConnection
+
+
+class ConnectionRegistry:
+    """Соединения одного интерактива.
+
+    Поиск по (role, user_id) и по participant_id за O(1), ведущие и участники
+    лежат в отдельных корзинах, чтобы рассылка не ветвилась на каждом соединении."""
+
+    def __init__(self):
+        self._by_user: dict[tuple[UserRoleEnum, int], WebSocketConnection] = {}  # (role, user_id) : соединение
+        self.leaders: dict[tuple[UserRoleEnum, int], WebSocketConnection] = {}  # (role, user_id) : соединение
+        self.participants: dict[int, WebSocketConnection] = {}  # participant_id : соединение
+
+    def __len__(self) -> int:
+        return len(self._by_user)
+
+    def __iter__(self):
+        return iter(list(self._by_user.values()))
+
+    def add(self, connection: WebSocketConnection):
+        key = (connection.role, connection.user_id)
+        self._by_user[key] = connection
+        if connection.role == UserRoleEnum.participant:
+            self.participants[connection.participant_id] = connection
+        else:
+            self.leaders[key] = connection
+
+    def get(self, role: UserRoleEnum, user_id: int) -> WebSocketConnection | None:
+        return self._by_user.get((role, user_id))
+
+    def get_by_participant(self, participant_id: int) -> WebSocketConnection | None:
+        return self.participants.get(participant_id)
+
+    def remove(self, connection: WebSocketConnection):
+        key = (connection.role, connection.user_id)
+        if self._by_user.get(key) is connection:
+            del self._by_user[key]
+        if self.leaders.get(key) is connection:
+            del self.leaders[key]
+        if self.participants.get(connection.participant_id) is connection:
+            del self.participants[connection.participant_id]
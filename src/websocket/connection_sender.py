@@ -0,0 +1,83 @@
+import asyncio
+from collections import OrderedDict
+from typing import Callable, Awaitable
+
+from fastapi import WebSocket
+
+SEND_TIMEOUT = 5  # секунд на отправку одного кадра, дольше - клиент завис
+MAX_PENDING_FRAMES = 8  # размер исходящей очереди соединения
+MAX_DROPPED_FRAMES = 10  # сколько кадров подряд можно вытеснить, пока клиент не принял ни одного
+
+
+class ConnectionSender:
+    """Исходящая очередь соединения со своей задачей-писателем.
+
+    Кадры с одинаковым ключом вытесняют друг друга (побеждает последний), поэтому медленный
+    клиент пропускает промежуточные тики таймера и не задерживает рассылку остальным.
+    Клиент, который не принимает кадры, отключается через on_evict."""
+
+    def __init__(self, websocket: WebSocket, on_evict: Callable[[], Awaitable[None]]):
+        self.websocket = websocket
+        self._on_evict = on_evict
+        self._pending: OrderedDict[str, str | bytes] = OrderedDict()  # ключ кадра : кадр, bytes - бинарный
+        self._ready = asyncio.Event()
+        self._dropped = 0  # вытесненные подряд кадры
+        self._closed = False
+        self._task = asyncio.create_task(self._writer())
+
+    def send(self, frame: str | bytes, key: str = "stage"):
+        """Постановка кадра в очередь, не ждёт отправки"""
+        if self._closed:
+            return
+
+        if key in self._pending:
+            self._pending.pop(key)
+            self._dropped += 1
+        self._pending[key] = frame
+
+        if self._dropped > MAX_DROPPED_FRAMES or len(self._pending) > MAX_PENDING_FRAMES:
+            self._evict()
+            return
+        self._ready.set()
+
+    def discard(self, key: str):
+        """Снятие неотправленного кадра, который устарел"""
+        self._pending.pop(key, None)
+
+    def attach(self, websocket: WebSocket):
+        """Переподключение: очередь остаётся, кадры уходят в новый вебсокет"""
+        self.websocket = websocket
+        self._dropped = 0
+
+    def close(self):
+        self._closed = True
+        self._pending.clear()
+        if not self._task.done():
+            self._task.cancel()
+
+    def _evict(self):
+        if self._closed:
+            return
+        self.close()
+        asyncio.create_task(self._on_evict())
+
+    async def _writer(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while self._pending:
+                key, frame = self._pending.popitem(last=False)
+                websocket = self.websocket
+                try:
+                    if isinstance(frame, bytes):
+                        await asyncio.wait_for(websocket.send_bytes(frame), SEND_TIMEOUT)
+                    else:
+                        await asyncio.wait_for(websocket.send_text(frame), SEND_TIMEOUT)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    if websocket is self.websocket:
+                        self._evict()
+                        return
+                    continue  # вебсокет уже заменён переподключением
+                self._dropped = 0
@@ -0,0 +1,105 @@
+from pydantic import BaseModel
+
+from websocket.codec import dumps, loads, pack_fields, splice_packed
+
+
+class StageFrames:
+    """Кадры одного тика рассылки.
+
+    Общая часть сообщения фазы сериализуется в json один раз, участнику дописывается
+    только небольшой конверт (баллы, место, правильность ответа)."""
+
+    def __init__(self):
+        self.variants: dict[str, str] = {}  # ключ варианта : json общей части сообщения
+        self.leader_variant: str | None = None  # вариант для ведущего
+        self.participant_variant: str | None = None  # вариант для участника без своего конверта
+        self.envelopes: dict[int, tuple[str, str]] = {}  # participant_id : (ключ варианта, json конверта)
+        self._packed: dict[str, tuple[int, bytes]] = {}  # ключ варианта : поля в msgpack, считаются по требованию
+        self._packed_frames: dict[str, bytes] = {}  # ключ варианта : кадр в msgpack без конверта
+
+    def add_variant(self, key: str, message: BaseModel) -> str:
+        """Сериализация общей части сообщения, один раз на тик"""
+        if key not in self.variants:
+            self.variants[key] = message.model_dump_json()
+        return key
+
+    def set_envelope(self, participant_id: int, variant: str, **fields):
+        """Конверт участника: поля, которые дописываются в конец общей части"""
+        self.envelopes[participant_id] = (variant, encode_fields(**fields))
+
+    def to_dict(self) -> dict:
+        """Кадры тика для пересылки другим процессам"""
+        return {
+            "variants": self.variants,
+            "leader_variant": self.leader_variant,
+            "participant_variant": self.participant_variant,
+            "envelopes": {str(k): list(v) for k, v in self.envelopes.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "StageFrames":
+        frames = cls()
+        frames.variants = data["variants"]
+        frames.leader_variant = data["leader_variant"]
+        frames.participant_variant = data["participant_variant"]
+        frames.envelopes = {int(k): (v[0], v[1]) for k, v in data["envelopes"].items()}
+        return frames
+
+    def frame_for_leader(self) -> str | None:
+        if self.leader_variant is None:
+            return None
+        return self.variants[self.leader_variant]
+
+    def packed_for_leader(self) -> bytes | None:
+        if self.leader_variant is None:
+            return None
+        return self._packed_frame(self.leader_variant)
+
+    def packed_for_participant(self, participant_id: int | None) -> bytes | None:
+        """Кадр участника в msgpack: общая часть кодируется один раз, конверт дописывается"""
+        envelope = self.envelopes.get(participant_id)
+        if envelope is not None:
+            variant, fields = envelope
+            return splice_packed(self._packed_variant(variant), pack_fields(loads("{" + fields + "}")))
+        if self.participant_variant is None:
+            return None
+        return self._packed_frame(self.participant_variant)
+
+    def _packed_frame(self, key: str) -> bytes:
+        if key not in self._packed_frames:
+            self._packed_frames[key] = splice_packed(self._packed_variant(key), (0, b""))
+        return self._packed_frames[key]
+
+    def _packed_variant(self, key: str) -> tuple[int, bytes]:
+        if key not in self._packed:
+            self._packed[key] = pack_fields(loads(self.variants[key]))
+        return self._packed[key]
+
+    def frame_for_participant(self, participant_id: int | None) -> str | None:
+        envelope = self.envelopes.get(participant_id)
+        if envelope is not None:
+            variant, fields = envelope
+            return splice(self.variants[variant], fields)
+        if self.participant_variant is None:
+            return None
+        return self.variants[self.participant_variant]
+
+
+def encode_value(value) -> str:
+    if isinstance(value, BaseModel):
+        return value.model_dump_json()
+    return dumps(value)
+
+
+def encode_fields(**fields) -> str:
+    """Поля конверта в виде фрагмента json-объекта без фигурных скобок"""
+    return ",".join(f"{dumps(key)}:{encode_value(value)}" for key, value in fields.items())
+
+
+def splice(base: str, fields: str) -> str:
+    """Дописывает поля конверта в конец уже сериализованного json-объекта"""
+    if not fields:
+        return base
+    if base == "{}":
+        return "{" + fields + "}"
+    return base[:-1] + "," + fields + "}"
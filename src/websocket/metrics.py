@@ -0,0 +1,30 @@
+import os
+import resource
+
+import database
+from websocket.cluster import NODE_ID
+from websocket.scheduler import scheduler
+
+
+def rss_bytes() -> int:
+    """Текущая резидентная память процесса, без /proc - пиковая"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def collect(manager) -> dict:
+    """Счётчики процесса для нагрузочного теста: сессии, соединения, запросы к бд, память, тики"""
+    registries = list(manager.active_connections.values())
+    return {
+        "node": NODE_ID,
+        "pid": os.getpid(),
+        "sessions": len(manager.interactive_sessions),
+        "participants": sum(len(registry.participants) for registry in registries),
+        "leaders": sum(len(registry.leaders) for registry in registries),
+        "db_queries": database.query_count,
+        "rss_bytes": rss_bytes(),
+        "scheduler": scheduler.stats(),
+    }
@@ -1,25 +1,29 @@
 from fastapi import WebSocket
 
-from websocket.repository import Repository
+from websocket.codec import accept, send_frame
+from websocket.schemas import WireFormat
 
 
 class ModerationManager:
     def __init__(self):
         self.active_connections : dict[int, WebSocket] = {} # interactive_id : WebSocket to leader
+        self.wire_formats: dict[int, WireFormat] = {}  # interactive_id : формат кадров модератора
 
-    async def connect(self, websocket: WebSocket, interactive_id: int):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, interactive_id: int, wire: WireFormat = WireFormat.json):
+        await accept(websocket, wire)
         self.active_connections[interactive_id] = websocket
+        self.wire_formats[interactive_id] = wire
 
-    async def broadcast(self, interactive_id:int):
+    async def send(self, interactive_id: int, frame: str):
+        """Отправка списка участников или дельты модератору, если он подключён к этому процессу"""
         if interactive_id in self.active_connections:
-            message = await Repository.get_moderation_data(interactive_id=interactive_id)
             try:
-                await self.active_connections[interactive_id].send_json(message.model_dump())
+                await send_frame(self.active_connections[interactive_id], self.wire_formats[interactive_id], frame)
             except:
                 await self.disconnect(interactive_id=interactive_id)
 
     async def disconnect(self, interactive_id: int):
         if interactive_id in self.active_connections:
             ws = self.active_connections.pop(interactive_id)
+            self.wire_formats.pop(interactive_id, None)
             await ws.close()
\ No newline at end of file
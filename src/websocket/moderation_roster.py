@@ -0,0 +1,90 @@
+import asyncio
+from typing import Callable, Awaitable
+
+from websocket.schemas import Moderation, ModerationData, ModerationDiff
+
+MODERATION_DEBOUNCE = 0.5  # секунд, за которые изменения списка собираются в одну дельту
+
+
+class ModerationRoster:
+    """Список участников интерактива для модератора.
+
+    Держится в памяти в порядке присоединения. Изменения копятся MODERATION_DEBOUNCE секунд
+    и уходят одной дельтой (added/updated/removed), весь список - только при подключении модератора."""
+
+    def __init__(self, moderation: Moderation, send_diff: Callable[[ModerationDiff], Awaitable[None]]):
+        self._rows: dict[int, ModerationData] = {row.participant_id: row for row in moderation.data}  # participant_id : строка
+        self._send_diff = send_diff
+        self._added: set[int] = set()
+        self._updated: set[int] = set()
+        self._removed: set[int] = set()
+        self._flush_handle: asyncio.TimerHandle | None = None
+
+    def snapshot(self) -> Moderation:
+        return Moderation(data=list(self._rows.values()))
+
+    def get(self, participant_id: int) -> ModerationData | None:
+        return self._rows.get(participant_id)
+
+    def upsert(self, row: ModerationData):
+        """Новый участник или повторное подключение, одинаковая строка ничего не меняет"""
+        previous = self._rows.get(row.participant_id)
+        if previous == row:
+            return
+        self._rows[row.participant_id] = row
+        if previous is None:
+            self._added.add(row.participant_id)
+            self._removed.discard(row.participant_id)
+        else:
+            self._updated.add(row.participant_id)
+        self._schedule()
+
+    def update(self, participant_id: int, **fields):
+        row = self._rows.get(participant_id)
+        if row is None:
+            return
+        self.upsert(row.model_copy(update=fields))
+
+    def toggle_hidden(self, participant_id: int):
+        row = self._rows.get(participant_id)
+        if row is not None:
+            self.update(participant_id, is_hidden=not row.is_hidden)
+
+    def remove(self, participant_id: int):
+        if self._rows.pop(participant_id, None) is None:
+            return
+        if participant_id in self._added:
+            self._added.discard(participant_id)  # модератор его ещё не видел
+        else:
+            self._removed.add(participant_id)
+        self._updated.discard(participant_id)
+        self._schedule()
+
+    def take_diff(self) -> ModerationDiff | None:
+        """Накопленные изменения, после вызова они считаются отправленными"""
+        if not (self._added or self._updated or self._removed):
+            return None
+        diff = ModerationDiff(
+            added=[self._rows[i] for i in self._rows if i in self._added],
+            updated=[self._rows[i] for i in self._updated if i not in self._added],
+            removed=list(self._removed)
+        )
+        self._added.clear()
+        self._updated.clear()
+        self._removed.clear()
+        return diff
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def _schedule(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_running_loop().call_later(MODERATION_DEBOUNCE, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        diff = self.take_diff()
+        if diff is not None:
+            asyncio.create_task(self._send_diff(diff))
@@ -1,15 +1,19 @@
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends
 from typing import Annotated
 
+from dependencies import verify_key
 from exceptions import InteractiveNotFoundWSException, InteractiveAlreadyEndWSException, UserAccessDeniedWSException
 from models import UserRoleEnum
 from auth.router import get_current_active_token_ws, get_current_active_token_for_participant_ws
-from auth.schemas import TokenData, ParticipantTokenData
+from auth.schemas import TokenData
+from auth.untils import decode_resume_token
 
+from websocket.codec import receive_model, encode_model, get_wire_format, accept, send_frame
+from websocket.metrics import collect
 from websocket.moderation_manager import ModerationManager
 from websocket.repository import Repository
 from websocket.session_manager import SessionManager
-from websocket.schemas import LeaderSent, ParticipantSent, CreateQuizParticipant, ModerationSent
+from websocket.schemas import LeaderSent, ParticipantSent, ModerationSent, ProtocolMode, AdmittedParticipant
 
 router = APIRouter(
     prefix="/ws",
@@ -19,49 +23,71 @@ router = APIRouter(
 moderation_manager = ModerationManager()
 manager = SessionManager(moderation_manager=moderation_manager)
 
+
+def get_protocol_mode(websocket: WebSocket) -> ProtocolMode:
+    """Режим рассылки из query-параметра mode, по умолчанию полный кадр каждый тик"""
+    try:
+        return ProtocolMode(websocket.query_params.get("mode", ProtocolMode.snapshot))
+    except ValueError:
+        return ProtocolMode.snapshot
+
+
+async def get_resumed_participant(websocket: WebSocket, interactive_id: int) -> AdmittedParticipant | None:
+    """Участник по query-параметру resumeToken, без авторизации и запросов в бд"""
+    token = websocket.query_params.get("resumeToken")
+    if not token:
+        return None
+    token_data = decode_resume_token(token)
+    if token_data is None:
+        return None
+    return await manager.resume(interactive_id=interactive_id, token=token_data)
+
+
+def wants_resume_token(websocket: WebSocket) -> bool:
+    """Клиент умеет переподключаться по resume-токену: resume=1 или уже присланный resumeToken"""
+    return websocket.query_params.get("resume") == "1" or "resumeToken" in websocket.query_params
+
+
 @router.websocket("/{interactive_id}")
 async def websocket_endpoint(
         websocket: WebSocket,
-        current_token: Annotated[ParticipantTokenData, Depends(get_current_active_token_for_participant_ws)],
         interactive_id: int,
 ):
     role = UserRoleEnum.participant
-
-    conducted = await Repository.get_interactive_conducted(interactive_id=interactive_id)
-    if conducted is None:
-        raise InteractiveNotFoundWSException()
-    if conducted:
-        raise InteractiveAlreadyEndWSException()
-
-    block_participant = await Repository.get_blocket_participant(interactive_id=interactive_id, user_id=current_token.user_id)
-    if block_participant is not None:
+    wire = get_wire_format(websocket)
+
+    participant = await get_resumed_participant(websocket=websocket, interactive_id=interactive_id)
+    if participant is None:
+        current_token = await get_current_active_token_for_participant_ws(websocket)
+        participant = await manager.admit(interactive_id=interactive_id, user_id=current_token.user_id)
+    user_id = participant.user_id
+    if participant.is_blocked:
         message = await manager.get_waiting_stage_to_blocked(interactive_id=interactive_id)
-        await websocket.accept()
+        await accept(websocket, wire)
         try:
-            await websocket.send_json(message.model_dump())
+            await send_frame(websocket, wire, encode_model(message))
         except:
             return
         await websocket.close(
             code=4006,
             reason='{"detail":{"message": "You have been removed from the interactive","code": "YOU_BEEN_REMOVED"}}'
         )
+        return
 
     await manager.connect(
         websocket=websocket,
         interactive_id=interactive_id,
-        user_id=current_token.user_id,
-        role=role
+        user_id=user_id,
+        role=role,
+        mode=get_protocol_mode(websocket),
+        participant=participant,
+        issue_resume=wants_resume_token(websocket),
+        wire=wire
     )
     try:
-        participant_data = await Repository.register_quiz_participant(
-            user_id=current_token.user_id,
-            interactive_id=interactive_id,
-            total_time=0
-        )
-        participant_id = participant_data.id
+        participant_id = participant.participant_id
         while True:
-            data = await websocket.receive_json()
-            participant_sent = ParticipantSent(**data)
+            participant_sent = await receive_model(websocket, ParticipantSent, wire)
             await manager.handle_participant_message(
                 participant=participant_sent,
                 participant_id=participant_id,
@@ -71,13 +97,13 @@ async def websocket_endpoint(
     except WebSocketDisconnect:
         await manager.disconnect(
             interactive_id=interactive_id,
-            user_id=current_token.user_id,
+            user_id=user_id,
             role=role
         )
     except Exception as e:
         await manager.disconnect(
             interactive_id=interactive_id,
-            user_id=current_token.user_id,
+            user_id=user_id,
             role=role
         )
 
@@ -88,6 +114,8 @@ async def websocket_endpoint2(
         current_token: Annotated[TokenData, Depends(get_current_active_token_ws)],
         interactive_id: int,
 ):
+    wire = get_wire_format(websocket)
+
     conducted = await Repository.get_interactive_conducted(interactive_id=interactive_id)
     if conducted is None:
         raise InteractiveNotFoundWSException()
@@ -105,12 +133,13 @@ async def websocket_endpoint2(
         websocket=websocket,
         interactive_id=interactive_id,
         user_id=current_token.participant_id,
-        role=current_token.role
+        role=current_token.role,
+        mode=get_protocol_mode(websocket),
+        wire=wire
     )
     try:
         while True:
-            data = await websocket.receive_json()
-            leader_sent = LeaderSent(**data)
+            leader_sent = await receive_model(websocket, LeaderSent, wire)
             await manager.handle_leader_message(leader_sent=leader_sent, interactive_id=interactive_id)
 
     except WebSocketDisconnect:
@@ -132,6 +161,8 @@ async def websocket_endpoint3(
         current_token: Annotated[TokenData, Depends(get_current_active_token_ws)],
         interactive_id: int,
 ):
+    wire = get_wire_format(websocket)
+
     conducted = await Repository.get_interactive_conducted(interactive_id=interactive_id)
     if conducted is None:
         raise InteractiveNotFoundWSException()
@@ -145,12 +176,11 @@ async def websocket_endpoint3(
     if not creates_flag:
         raise UserAccessDeniedWSException()
 
-    await moderation_manager.connect(interactive_id=interactive_id, websocket=websocket)
-    await moderation_manager.broadcast(interactive_id=interactive_id)
+    await moderation_manager.connect(interactive_id=interactive_id, websocket=websocket, wire=wire)
+    await manager.send_moderation_snapshot(interactive_id=interactive_id)
     try:
         while True:
-            data = await websocket.receive_json()
-            moderation_sent = ModerationSent(**data)
+            moderation_sent = await receive_model(websocket, ModerationSent, wire)
             if moderation_sent.hide is not None:
                 await manager.handle_leader_message(leader_sent=LeaderSent(hide=moderation_sent.hide), interactive_id=interactive_id)
             elif moderation_sent.block is not None:
@@ -163,4 +193,10 @@ async def websocket_endpoint3(
     except Exception as e:
         await moderation_manager.disconnect(
             interactive_id=interactive_id
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/metrics", dependencies=[Depends(verify_key)])
+async def get_metrics() -> dict:
+    """Счётчики этого процесса: сессии, соединения, запросы к бд, память и опоздание тиков"""
+    return collect(manager)
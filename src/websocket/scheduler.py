@@ -0,0 +1,142 @@
+import asyncio
+import math
+import time
+from typing import Callable, Awaitable, Hashable
+
+TICK_INTERVAL = 1.0  # секунд между тиками одной сессии
+WHEEL_RESOLUTION = 0.05  # секунд на слот колеса
+WHEEL_SLOTS = 256  # слотов в колесе, дальние дедлайны ждут несколько оборотов
+LAG_WARNING = 0.25  # секунд опоздания тика, после которых пишем в лог
+
+
+class _Entry:
+    __slots__ = ("key", "callback", "on_done", "deadline", "slot", "rounds", "task")
+
+    def __init__(self, key: Hashable, callback: Callable[[], Awaitable[bool]],
+                 on_done: Callable[[], Awaitable[None]] | None, deadline: float):
+        self.key = key
+        self.callback = callback
+        self.on_done = on_done
+        self.deadline = deadline  # time.monotonic() следующего тика
+        self.slot = 0
+        self.rounds = 0  # сколько оборотов колеса осталось до срабатывания
+        self.task: asyncio.Task | None = None
+
+
+class TickScheduler:
+    """Общий планировщик тиков всех сессий процесса на хешированном колесе таймеров.
+
+    Дедлайны считаются от time.monotonic() и не зависят от длительности рассылки: следующий тик
+    сессии назначается на прошлый дедлайн + TICK_INTERVAL, поэтому фазы длятся ровно столько,
+    сколько задано. Тики разных сессий выполняются отдельными задачами, опоздание тика
+    относительно дедлайна копится в статистике."""
+
+    def __init__(self, interval: float = TICK_INTERVAL, resolution: float = WHEEL_RESOLUTION,
+                 slots: int = WHEEL_SLOTS):
+        self.interval = interval
+        self.resolution = resolution
+        self._slots: list[dict[Hashable, _Entry]] = [{} for _ in range(slots)]
+        self._entries: dict[Hashable, _Entry] = {}
+        self._current = self._slot_number(time.monotonic())  # номер последнего обработанного слота
+        self._task: asyncio.Task | None = None
+        self.last_lag = 0.0  # опоздание последнего тика, секунд
+        self.max_lag = 0.0  # наибольшее опоздание с последнего чтения stats()
+        self.ticks = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key: Hashable, callback: Callable[[], Awaitable[bool]],
+            on_done: Callable[[], Awaitable[None]] | None = None):
+        """Тики каждые interval секунд, пока callback возвращает True"""
+        entry = _Entry(key, callback, on_done, time.monotonic() + self.interval)
+        self._entries[key] = entry
+        self._place(entry)
+        if self._task is None or self._task.done():
+            self._current = self._slot_number(time.monotonic())
+            self._task = asyncio.create_task(self._run())
+
+    async def remove(self, key: Hashable) -> bool:
+        """Снятие сессии, выполняющийся тик отменяется. False - её уже нет"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return False
+        self._slots[entry.slot].pop(key, None)
+        task = entry.task
+        if task is not None and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return True
+
+    def stats(self) -> dict:
+        stats = {
+            "sessions": len(self._entries),
+            "ticks": self.ticks,
+            "tick_lag_ms": round(self.last_lag * 1000, 1),
+            "tick_lag_max_ms": round(self.max_lag * 1000, 1),
+        }
+        self.max_lag = 0.0
+        return stats
+
+    def _slot_number(self, moment: float) -> int:
+        return int(moment / self.resolution)
+
+    def _place(self, entry: _Entry):
+        """Слот по дедлайну, просроченный дедлайн - в ближайший слот"""
+        number = max(math.ceil(entry.deadline / self.resolution), self._current + 1)
+        entry.rounds = (number - self._current - 1) // len(self._slots)
+        entry.slot = number % len(self._slots)
+        self._slots[entry.slot][entry.key] = entry
+
+    async def _run(self):
+        while self._entries:
+            next_slot = (self._current + 1) * self.resolution
+            delay = next_slot - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            now = time.monotonic()
+            target = self._slot_number(now)
+            while self._current < target:
+                self._current += 1
+                slot = self._slots[self._current % len(self._slots)]
+                for key, entry in list(slot.items()):
+                    if entry.rounds > 0:
+                        entry.rounds -= 1
+                        continue
+                    del slot[key]
+                    self._fire(entry, now)
+
+    def _fire(self, entry: _Entry, now: float):
+        lag = max(0.0, now - entry.deadline)
+        self.last_lag = lag
+        self.max_lag = max(self.max_lag, lag)
+        self.ticks += 1
+        if lag > LAG_WARNING:
+            print(f"Tick of {entry.key} is late by {lag:.3f}s")
+        entry.task = asyncio.create_task(self._run_entry(entry))
+
+    async def _run_entry(self, entry: _Entry):
+        try:
+            keep = await entry.callback()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Tick of {entry.key} failed: {e}")
+            keep = False
+
+        if self._entries.get(entry.key) is not entry:
+            return  # сессию сняли во время тика
+        if keep:
+            entry.deadline += self.interval  # от дедлайна, а не от конца тика: без накопления сдвига
+            self._place(entry)
+            return
+
+        del self._entries[entry.key]
+        if entry.on_done is not None:
+            await entry.on_done()
+
+
+scheduler = TickScheduler()  # один на процесс
@@ -4,6 +4,7 @@ from fastapi import WebSocket
 
 from interactivities.schemas import InteractiveType as QuestionType
 from users.schemas import UserRoleEnum
+from websocket.connection_sender import ConnectionSender
 
 
 # enum для обработки логики
@@ -28,6 +29,16 @@ class StatePause(str, enum.Enum):
     timer_n = "timer_n"
 
 
+class ProtocolMode(str, enum.Enum):
+    snapshot = "snapshot"  # полный кадр каждый тик
+    delta = "delta"  # снимок при смене состояния, между ними дельты
+
+
+class WireFormat(str, enum.Enum):
+    json = "json"  # текстовые кадры, по умолчанию
+    msgpack = "msgpack"  # бинарные кадры с номерами ключей, подпротокол в Sec-WebSocket-Protocol
+
+
 # обработка паузы
 class DataPause(BaseModel):
     state: StatePause
@@ -88,6 +99,15 @@ class Question(BaseModel):
     image: str | None = None
 
 
+class InteractiveSnapshot(BaseModel):
+    """Неизменяемые данные интерактива для сессии, загружаются один раз при её создании"""
+    info: InteractiveInfo
+    questions: tuple[Question, ...]
+    answers: dict[int, tuple[AnswerGet, ...]]  # question_id : варианты ответа
+
+    model_config = ConfigDict(frozen=True)
+
+
 class DataStageQuestion(BaseModel):
     questions_count: int
     timer: int
@@ -201,6 +221,12 @@ class StageEndParticipant(StageEnd):
     score: ScoreStageEnd
 
 
+class InteractiveResultData(BaseModel):
+    """Итоги интерактива, считаются один раз при завершении"""
+    participants_total: int
+    winners: list[Winner]
+
+
 # отправка сообщений модератору
 class ModerationData(BaseModel):
     username: str
@@ -210,9 +236,17 @@ class ModerationData(BaseModel):
 
 
 class Moderation(BaseModel):
+    type: str = "snapshot"
     data: list[ModerationData]
 
 
+class ModerationDiff(BaseModel):
+    type: str = "diff"
+    added: list[ModerationData] = []  # строки добавляются в конец списка
+    updated: list[ModerationData] = []
+    removed: list[int] = []  # participant_id
+
+
 # обработка сообщений отправленных на бек по websocket
 class LeaderSent(BaseModel):
     interactive_status: InteractiveStatus | None = None
@@ -232,9 +266,13 @@ class ParticipantSent(BaseModel):
 
 
 # добавление в бд участника интерактива
-class CreateQuizParticipant(BaseModel):
-    user_id: int
+class AdmittedParticipant(BaseModel):
+    participant_id: int
     interactive_id: int
+    user_id: int
+    username: str | None
+    is_hidden: bool
+    is_blocked: bool
     total_time: int
 
 
@@ -246,5 +284,8 @@ class WebSocketConnection(BaseModel):
     role: UserRoleEnum
     is_hidden: bool
     is_blocked: bool
+    sender: ConnectionSender | None = None  # исходящая очередь со своей задачей-писателем
+    mode: ProtocolMode = ProtocolMode.snapshot
+    wire: WireFormat = WireFormat.json
 
     model_config = ConfigDict(arbitrary_types_allowed=True)
@@ -0,0 +1,178 @@
+from bisect import bisect_left
+
+from websocket.schemas import WinnerDiscussion
+
+
+class ParticipantScore:
+    """Строка таблицы результатов"""
+    __slots__ = ("participant_id", "user_id", "username", "is_hidden", "score", "total_time", "answers")
+
+    def __init__(self, participant_id: int, user_id: int, username: str, is_hidden: bool, score: int,
+                 total_time: int):
+        self.participant_id = participant_id
+        self.user_id = user_id
+        self.username = username
+        self.is_hidden = is_hidden
+        self.score = score
+        self.total_time = total_time
+        self.answers: dict[int, tuple[bool, int, int]] = {}  # question_id : (is_correct, вес вопроса, время)
+
+    @property
+    def key(self) -> tuple[int, int, int]:
+        # сортировка по score DESC, total_time ASC
+        return -self.score, self.total_time, self.participant_id
+
+
+class Scoreboard:
+    """Живая таблица баллов и времени участников интерактива.
+
+    Обновляется при проверке ответов за O(1), поэтому топ и место участника читаются из памяти без запросов в бд.
+    Порядок мест пересчитывается один раз при первом чтении после изменений, то есть не чаще раза за тик:
+    сортировка почти упорядоченного списка близка к O(n), дальше место за O(log n)."""
+
+    def __init__(self):
+        self._entries: dict[int, ParticipantScore] = {}  # participant_id : ParticipantScore
+        self._order: list[tuple[int, int, int]] = []  # отсортированные ключи ParticipantScore.key
+        self._ranked = True  # _order соответствует текущим баллам и времени
+        self.version = 0  # растёт при каждом изменении, чтобы не сохранять таблицу без изменений
+
+    def __contains__(self, participant_id: int) -> bool:
+        return participant_id in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, participant_id: int, user_id: int, username: str | None, is_hidden: bool, score: int = 0,
+            total_time: int = 0):
+        """Новый участник, повторное добавление ничего не меняет"""
+        if participant_id in self._entries:
+            return
+        entry = ParticipantScore(
+            participant_id=participant_id,
+            user_id=user_id,
+            username=username or "",
+            is_hidden=is_hidden,
+            score=score,
+            total_time=total_time
+        )
+        self._entries[participant_id] = entry
+        self._ranked = False
+        self.version += 1
+
+    def remove(self, participant_id: int):
+        """Заблокированный участник выбывает из таблицы"""
+        entry = self._entries.pop(participant_id, None)
+        if entry is not None:
+            self._ranked = False
+            self.version += 1
+
+    def rename(self, participant_id: int, username: str):
+        entry = self._entries.get(participant_id)
+        if entry is not None:
+            entry.username = username
+            self.version += 1
+
+    def toggle_hidden(self, participant_id: int):
+        entry = self._entries.get(participant_id)
+        if entry is not None:
+            entry.is_hidden = not entry.is_hidden
+            self.version += 1
+
+    def record_answer(self, participant_id: int, question_id: int, is_correct: bool, weight: int, time: int):
+        """Учёт ответа, повторный ответ на тот же вопрос заменяет предыдущий"""
+        entry = self._entries.get(participant_id)
+        if entry is None:
+            return
+        previous = entry.answers.get(question_id)
+        entry.answers[question_id] = (is_correct, weight, time)
+        self.version += 1
+
+        delta = weight if is_correct else 0
+        if previous is not None and previous[0]:
+            delta -= previous[1]
+        if delta != 0:
+            entry.score += delta
+            self._ranked = False
+
+    def close_question(self, question_id: int, time_question: int):
+        """Конец вопроса: участникам добавляется время ответа, не ответившим - всё время вопроса"""
+        for entry in self._entries.values():
+            answer = entry.answers.get(question_id)
+            entry.total_time += answer[2] if answer is not None else time_question
+        self._ranked = False
+        self.version += 1
+
+    def total_times(self) -> list[tuple[int, int]]:
+        """(participant_id, total_time) всех участников для записи в бд"""
+        return [(entry.participant_id, entry.total_time) for entry in self._entries.values()]
+
+    def score(self, participant_id: int) -> int:
+        entry = self._entries.get(participant_id)
+        return entry.score if entry is not None else 0
+
+    def total_time(self, participant_id: int) -> int:
+        entry = self._entries.get(participant_id)
+        return entry.total_time if entry is not None else 0
+
+    def is_correct(self, participant_id: int, question_id: int) -> bool:
+        entry = self._entries.get(participant_id)
+        if entry is None or question_id not in entry.answers:
+            return False
+        return entry.answers[question_id][0]
+
+    def position(self, participant_id: int) -> int | None:
+        entry = self._entries.get(participant_id)
+        if entry is None:
+            return None
+        return bisect_left(self._ranking(), entry.key) + 1
+
+    def top(self, count: int = 3) -> list[WinnerDiscussion]:
+        winners = []
+        for i, key in enumerate(self._ranking()[:count]):
+            entry = self._entries[key[2]]
+            winners.append(
+                WinnerDiscussion(
+                    position=i + 1,
+                    username=entry.username,
+                    score=entry.score,
+                    participant_id=entry.participant_id,
+                    is_hidden=entry.is_hidden,
+                )
+            )
+        return winners
+
+    def dump(self) -> list[list]:
+        """Таблица для контрольной точки сессии"""
+        return [
+            [e.participant_id, e.user_id, e.username, e.is_hidden, e.score, e.total_time,
+             [[qid, *answer] for qid, answer in e.answers.items()]]
+            for e in self._entries.values()
+        ]
+
+    @classmethod
+    def load(cls, rows: list[list]) -> "Scoreboard":
+        scoreboard = cls()
+        for participant_id, user_id, username, is_hidden, score, total_time, answers in rows:
+            scoreboard.add(
+                participant_id=participant_id,
+                user_id=user_id,
+                username=username,
+                is_hidden=is_hidden,
+                score=score,
+                total_time=total_time
+            )
+            scoreboard._entries[participant_id].answers = {qid: (c, w, t) for qid, c, w, t in answers}
+        return scoreboard
+
+    def participant_ids(self) -> list[int]:
+        return list(self._entries)
+
+    def standings(self) -> list[ParticipantScore]:
+        """Все участники по местам"""
+        return [self._entries[key[2]] for key in self._ranking()]
+
+    def _ranking(self) -> list[tuple[int, int, int]]:
+        if not self._ranked:
+            self._order = sorted(entry.key for entry in self._entries.values())
+            self._ranked = True
+        return self._order
@@ -1,127 +1,474 @@
+import asyncio
+import time
+
 from fastapi import WebSocket
 
-from exceptions import InteractiveRunningNowWSException, NameIsTooLongWSException
+from config import CLUSTER_MODE
+from exceptions import InteractiveRunningNowWSException, NameIsTooLongWSException, InteractiveNotFoundWSException, \
+    InteractiveAlreadyEndWSException
 from users.schemas import UserRoleEnum
+from auth.schemas import ResumeTokenData
+from auth.untils import create_resume_token
 
 from websocket.InteractiveSession import InteractiveSession, Stage
 from websocket.moderation_manager import ModerationManager
 from websocket.repository import Repository
-from websocket.schemas import LeaderSent, ParticipantSent, WebSocketConnection, CreateQuizParticipant, \
+from websocket.schemas import LeaderSent, ParticipantSent, WebSocketConnection, AdmittedParticipant, \
     QuestionType, StageWaiting, StageCountdown, StageQuestion, StageDiscussion, StageEnd, \
     DataAnswersStageDiscussionTypeOne, DataAnswersStageDiscussionTypeMany, DataAnswersStageDiscussionTypeTextLeader, \
     DataAnswersStageDiscussionTypeTextParticipantTrue, DataAnswersStageDiscussionTypeTextParticipantFalse, \
-    StageDiscussionParticipant, CorrectAnswerStageDiscussionTypeTextLeader, StageEndParticipant, Winner, ScoreStageEnd, \
-    DataPause, StatePause, DataStageWaiting
+    CorrectAnswerStageDiscussionTypeTextLeader, ScoreStageEnd, DataPause, StatePause, DataStageWaiting, \
+    ProtocolMode, WireFormat, Moderation, ModerationData, InteractiveResultData
+from websocket.frames import StageFrames
+from websocket.state_push import StatePush
+from websocket.connection_sender import ConnectionSender, SEND_TIMEOUT
+from websocket.connection_registry import ConnectionRegistry
+from websocket.cluster import SessionBus, OWNER_LEASE, LEASE_REFRESH, DELETE_POLL
+from websocket.checkpoint import CheckpointStore
+from websocket.moderation_roster import ModerationRoster
+from websocket.admission import AdmissionBatcher
+from websocket.codec import dumps, encode_model, encode_for, json_to_msgpack, accept, send_frame
 
 
 class SessionManager:
     def __init__(self, moderation_manager: ModerationManager):
-        self.active_connections: dict[int, list[WebSocketConnection]] = {}  # interactive_id : list WebSocketConnection
+        self.active_connections: dict[int, ConnectionRegistry] = {}  # interactive_id : ConnectionRegistry
         self.interactive_sessions: dict[int, InteractiveSession] = {}  # interactive_id : InteractiveSession
+        self.push_states: dict[int, StatePush] = {}  # interactive_id : последнее состояние фазы
+        self.rosters: dict[int, ModerationRoster] = {}  # interactive_id : список участников для модератора
+        self.admitted: dict[int, dict[int, int]] = {}  # interactive_id : {user_id : participant_id}
+        self.blocked: dict[int, set[int]] = {}  # interactive_id : participant_id, заблокированные при этом процессе
+        self.admission = AdmissionBatcher()
+        self._opening: dict[int, asyncio.Task] = {}  # interactive_id : загрузка сессии
+        self._watchers: dict[int, asyncio.Task] = {}  # interactive_id : ожидание аренды упавшего владельца
+        self._retry_restore: asyncio.Task | None = None
         self.moderation_manager = moderation_manager
+        self.bus: SessionBus | None = SessionBus(on_lease_lost=self._lease_lost) if CLUSTER_MODE else None  # сессии других процессов
+        self.checkpoints = CheckpointStore()
+
+    async def start(self):
+        """Запуск при старте процесса: восстановление сессий, которые шли до перезапуска"""
+        if self.bus is not None:
+            self.bus.listen_moderation(self._handle_bus_moderation)
+        try:
+            live_ids = await self.checkpoints.live_ids()
+        except Exception as e:
+            print(f"Failed to read session checkpoints: {e}")
+            return
+        skipped = []
+        for interactive_id in live_ids:
+            if interactive_id in self.active_connections:
+                continue
+            if self.bus is not None and not await self.bus.acquire(interactive_id):
+                skipped.append(interactive_id)  # ведёт другой процесс или аренда упавшего ещё не истекла
+                continue
+            await self._restore_owned(interactive_id)
+        if skipped:
+            self._retry_restore = asyncio.create_task(self._restore_after_lease(skipped))
+
+    async def _restore_owned(self, interactive_id: int) -> bool:
+        """Сессия с контрольной точки под уже взятой арендой. False - вести нечего или не удалось"""
+        try:
+            conducted = await Repository.get_interactive_conducted(interactive_id=interactive_id)
+            if conducted is None or conducted:
+                await self.checkpoints.delete(interactive_id)  # интерактив удалён или уже завершён
+                await self._close_local(interactive_id=interactive_id)
+            else:
+                await self._create_session(interactive_id)
+                return True
+        except Exception as e:
+            print(f"Failed to restore session {interactive_id}: {e}")
+        if self.bus is not None:
+            await self.bus.release(interactive_id)
+        return False
+
+    async def _restore_after_lease(self, interactive_ids: list[int]):
+        """Повтор восстановления, когда аренда упавшего владельца точно истекла"""
+        await asyncio.sleep(OWNER_LEASE)
+        for interactive_id in interactive_ids:
+            try:
+                if interactive_id in self.interactive_sessions:
+                    continue
+                if interactive_id not in await self.checkpoints.live_ids():
+                    continue  # сессия уже закончилась
+                if not await self.bus.acquire(interactive_id):
+                    continue  # владелец жив
+                self.bus.stop_listening(interactive_id)
+                if not await self._restore_owned(interactive_id) and interactive_id in self.active_connections:
+                    self.bus.listen_frames(interactive_id, self._handle_bus_frames)
+            except Exception as e:
+                print(f"Failed to restore session {interactive_id}: {e}")
+
+    def _watch_owner(self, interactive_id: int):
+        if interactive_id not in self._watchers:
+            task = asyncio.create_task(self._watch_owner_loop(interactive_id))
+            self._watchers[interactive_id] = task
+            task.add_done_callback(lambda _: self._watchers.pop(interactive_id, None))
+
+    async def _watch_owner_loop(self, interactive_id: int):
+        """Пересылающий процесс, пока у него есть клиенты интерактива: если владелец упал, после
+        истечения его аренды сессию поднимает этот процесс с контрольной точки"""
+        while True:
+            await asyncio.sleep(LEASE_REFRESH)
+            if interactive_id not in self.active_connections or interactive_id in self.interactive_sessions:
+                return
+            try:
+                if not await self.bus.acquire(interactive_id):
+                    continue  # владелец продлевает аренду
+            except Exception as e:
+                print(f"Failed to acquire session {interactive_id}: {e}")
+                continue
+            print(f"Session {interactive_id} has no owner, restoring it here")
+            self.bus.stop_listening(interactive_id)
+            if await self._restore_owned(interactive_id):
+                return
+            if interactive_id in self.active_connections:
+                self.bus.listen_frames(interactive_id, self._handle_bus_frames)
+
+    async def close(self):
+        """Остановка процесса: последняя контрольная точка каждой сессии"""
+        for task in [*self._watchers.values(), self._retry_restore]:
+            if task is not None:
+                task.cancel()
+        for session in list(self.interactive_sessions.values()):
+            try:
+                await session.save_checkpoint()
+            except Exception as e:
+                print(f"Failed to save checkpoint {session.interactive_id}: {e}")
+        await self.checkpoints.close()
+        if self.bus is not None:
+            await self.bus.close()
+
+    async def _create_session(self, interactive_id: int):
+        """Сессия интерактива в этом процессе, с контрольной точки, если она есть"""
+        checkpoint = None
+        try:
+            checkpoint = await self.checkpoints.load(interactive_id)
+        except Exception as e:
+            print(f"Failed to load checkpoint {interactive_id}: {e}")
+
+        queries = [
+            Repository.get_interactive_snapshot(interactive_id=interactive_id),
+            Repository.get_quiz_participants(interactive_id=interactive_id)
+        ]
+        if checkpoint is None:
+            queries.append(Repository.get_winners(interactive_id=interactive_id))  # с точки таблица берётся из неё
+        snapshot, participants, *rest = await asyncio.gather(*queries)
+        standings = rest[0] if rest else []
+        if snapshot is None:
+            raise InteractiveNotFoundWSException()
+
+        session = InteractiveSession(
+            snapshot=snapshot,
+            standings=standings,
+            broadcast_callback=self._broadcast_callback,
+            get_participants_count=self._get_participants_count_callback,
+            session_manager=self,
+            checkpoints=self.checkpoints
+        )
+        if checkpoint is not None:
+            await session.restore(checkpoint)
+
+        moderation = Moderation(data=[
+            ModerationData(
+                username=participant.username or "",
+                participant_id=participant.participant_id,
+                is_hidden=participant.is_hidden,
+                is_blocked=participant.is_blocked
+            )
+            for participant in participants
+        ])
+        self.admitted[interactive_id] = {participant.user_id: participant.participant_id for participant in participants}
+        self.rosters[interactive_id] = ModerationRoster(
+            moderation=moderation,
+            send_diff=lambda diff: self._send_moderation(interactive_id, diff.model_dump_json())
+        )
+        self.interactive_sessions[interactive_id] = session
+        self.active_connections.setdefault(interactive_id, ConnectionRegistry())  # сокеты пересылающего процесса остаются
+        self.push_states.setdefault(interactive_id, StatePush())
+        if self.bus is not None:
+            await self.bus.set_stage(interactive_id, session.stage.value)
+            await self.bus.add_blocked(interactive_id, *(p.participant_id for p in participants if p.is_blocked))
+            self.bus.listen_inbox(interactive_id, self._handle_bus_inbox)
+        await session.start()
+
+    async def _open_session(self, interactive_id: int):
+        """Одна загрузка сессии на интерактив: одновременные первые подключения ждут её же"""
+        opening = self._opening.get(interactive_id)
+        if opening is None:
+            opening = asyncio.create_task(self._do_open_session(interactive_id))
+            self._opening[interactive_id] = opening
+            opening.add_done_callback(lambda _: self._opening.pop(interactive_id, None))
+        await asyncio.shield(opening)
+
+    async def _do_open_session(self, interactive_id: int):
+        if interactive_id in self.active_connections:
+            return
+        if self.bus is None or await self.bus.acquire(interactive_id):
+            try:
+                await self._create_session(interactive_id)
+            except Exception:
+                if self.bus is not None:
+                    await self.bus.release(interactive_id)
+                raise
+        else:
+            # сессией владеет другой процесс, здесь только сокеты и пересылка
+            self.active_connections[interactive_id] = ConnectionRegistry()
+            self.push_states[interactive_id] = StatePush()
+            self.bus.listen_frames(interactive_id, self._handle_bus_frames)
+            self._watch_owner(interactive_id)
+
+    async def admit(self, interactive_id: int, user_id: int) -> AdmittedParticipant:
+        """Допуск участника до подключения: проверки по памяти сессии, новые участники записываются пачками"""
+        if interactive_id not in self.active_connections:
+            conducted = await Repository.get_interactive_conducted(interactive_id=interactive_id)
+            if conducted is None:
+                raise InteractiveNotFoundWSException()
+            if conducted:
+                raise InteractiveAlreadyEndWSException()
+            await self._open_session(interactive_id)
 
-    async def connect(self, websocket: WebSocket, interactive_id: int, user_id: int, role: UserRoleEnum):
-        """Создание интерактива, если его нет. Подключение вебсокета к интерактиву"""
-        if interactive_id not in self.interactive_sessions:
-            meta_data = await Repository.get_interactive_info(interactive_id=interactive_id)
-            questions = await Repository.get_interactive_question(interactive_id=interactive_id)
-
-            self.interactive_sessions[interactive_id] = InteractiveSession(
-                meta_data=meta_data,
-                questions=questions,
-                broadcast_callback=self._broadcast_callback,
-                get_participants_count=self._get_participants_count_callback,
-                session_manager=self
+        stage_now = await self.get_live_stage(interactive_id)
+        if stage_now == Stage.END:
+            raise InteractiveAlreadyEndWSException()
+
+        if interactive_id in self.interactive_sessions:
+            participant = self._known_participant(interactive_id=interactive_id, user_id=user_id)
+        else:
+            # сессия в другом процессе, список участников есть только в бд
+            found = await Repository.get_quiz_participants(interactive_id=interactive_id, user_id=user_id)
+            participant = found[0] if found else None
+
+        if participant is None:
+            if stage_now != Stage.WAITING:
+                raise InteractiveRunningNowWSException()
+            participant = await self.admission.register(interactive_id=interactive_id, user_id=user_id)
+        if not participant.is_blocked:
+            await self._participant_joined(
+                interactive_id=interactive_id,
+                is_blocked=participant.is_blocked,
+                participant={
+                    "participant_id": participant.participant_id,
+                    "user_id": user_id,
+                    "username": participant.username,
+                    "is_hidden": participant.is_hidden,
+                    "total_time": participant.total_time,
+                }
             )
-            self.active_connections[interactive_id] = []
-            await self.interactive_sessions[interactive_id].start()
+        return participant
 
-        if role != UserRoleEnum.participant:
-            await websocket.accept()
+    async def resume(self, interactive_id: int, token: ResumeTokenData) -> AdmittedParticipant | None:
+        """Переподключение по resume-токену без обращения к бд, None - нужен обычный допуск"""
+        if token.interactive_id != interactive_id or token.role != UserRoleEnum.participant:
+            return None
+        if interactive_id not in self.active_connections:
+            return None  # сессия не в этом процессе или уже закрыта
+        if token.participant_id in self.blocked.get(interactive_id, ()):
+            return None
+        if await self.get_live_stage(interactive_id) in (None, Stage.END):
+            return None
+
+        if interactive_id in self.interactive_sessions:
+            participant = self._known_participant(interactive_id=interactive_id, user_id=token.user_id)
+            if participant is None or participant.participant_id != token.participant_id or participant.is_blocked:
+                return None
+            return participant
+        # блокировки могли пройти до подключения этого процесса, их список ведёт владелец
+        try:
+            if await self.bus.is_blocked(interactive_id, token.participant_id):
+                return None
+        except Exception:
+            return None  # без redis проверить нельзя, пусть решит обычный допуск
+        # пересылающему процессу для сокета нужен только participant_id, остальное знает владелец
+        return AdmittedParticipant(
+            participant_id=token.participant_id,
+            interactive_id=interactive_id,
+            user_id=token.user_id,
+            username=None,
+            is_hidden=False,
+            is_blocked=False,
+            total_time=0
+        )
+
+    def _known_participant(self, interactive_id: int, user_id: int) -> AdmittedParticipant | None:
+        """Уже записанный участник по списку модератора и таблице результатов"""
+        participant_id = self.admitted[interactive_id].get(user_id)
+        if participant_id is None:
+            return None
+        row = self.rosters[interactive_id].get(participant_id)
+        if row is None:
+            return None
+        return AdmittedParticipant(
+            participant_id=participant_id,
+            interactive_id=interactive_id,
+            user_id=user_id,
+            username=row.username,
+            is_hidden=row.is_hidden,
+            is_blocked=row.is_blocked,
+            total_time=self.interactive_sessions[interactive_id].scoreboard.total_time(participant_id)
+        )
 
-            target_conn = None
-            connections = self.active_connections.get(interactive_id, [])
-            for conn in connections:
-                if conn.role == role and conn.user_id == user_id:
-                    target_conn = conn
-                    break
+    async def connect(self, websocket: WebSocket, interactive_id: int, user_id: int, role: UserRoleEnum,
+                      mode: ProtocolMode = ProtocolMode.snapshot, participant: AdmittedParticipant | None = None,
+                      issue_resume: bool = False, wire: WireFormat = WireFormat.json):
+        """Создание интерактива, если его нет. Подключение вебсокета к интерактиву.
+        Участник подключается после admit или resume, при issue_resume ему отправляется новый resume-токен"""
+        if interactive_id not in self.active_connections:
+            await self._open_session(interactive_id)
+
+        if role != UserRoleEnum.participant:
+            await accept(websocket, wire)
 
+            target_conn = self.active_connections[interactive_id].get(role, user_id)
             if target_conn is not None:
                 target_conn.websocket = websocket
+                target_conn.mode = mode
+                target_conn.wire = wire
+                target_conn.sender.attach(websocket)
             else:
-                self.active_connections[interactive_id].append(
-                    WebSocketConnection(
-                        websocket=websocket,
-                        user_id=user_id,
-                        role=role,
-                        is_hidden=False,
-                        is_blocked=False,
-                        participant_id=None,
-                    )
+                target_conn = self._new_connection(
+                    interactive_id=interactive_id,
+                    websocket=websocket,
+                    user_id=user_id,
+                    role=role,
+                    is_hidden=False,
+                    is_blocked=False,
+                    participant_id=None,
+                    mode=mode,
+                    wire=wire
                 )
+                self.active_connections[interactive_id].add(target_conn)
+            self._send_snapshot(interactive_id=interactive_id, connection=target_conn)
 
         else:
-            target_conn = None
-            connections = self.active_connections.get(interactive_id, [])
-            for conn in connections:
-                if conn.role == role and conn.user_id == user_id:
-                    target_conn = conn
-                    break
-
+            target_conn = self.active_connections[interactive_id].get(role, user_id)
             if target_conn is not None:
-                await websocket.accept()
+                await accept(websocket, wire)
                 target_conn.websocket = websocket
+                target_conn.mode = mode
+                target_conn.wire = wire
+                target_conn.sender.attach(websocket)
             else:
-                stage_now = await self.interactive_sessions[interactive_id].get_stage()
-                register_flag = await Repository.check_register_quiz_participant(
-                    data=CreateQuizParticipant(
-                        user_id=user_id,
-                        interactive_id=interactive_id,
-                        total_time=0
-                    )
+                await accept(websocket, wire)
+                target_conn = self._new_connection(
+                    interactive_id=interactive_id,
+                    websocket=websocket,
+                    user_id=user_id,
+                    role=role,
+                    participant_id=participant.participant_id,
+                    is_hidden=participant.is_hidden,
+                    is_blocked=participant.is_blocked,
+                    mode=mode,
+                    wire=wire
                 )
-                if stage_now != Stage.WAITING and not register_flag:
-                    raise InteractiveRunningNowWSException()
-                else:
-                    await websocket.accept()
-                    participant_data = await Repository.register_quiz_participant(
-                        user_id=user_id,
-                        interactive_id=interactive_id,
-                        total_time=0
-                    )
-                    self.active_connections[interactive_id].append(
-                        WebSocketConnection(
-                            websocket=websocket,
-                            user_id=user_id,
-                            role=role,
-                            participant_id=participant_data.id,
-                            is_hidden=participant_data.is_hidden,
-                            is_blocked=participant_data.is_blocked
-                        )
-                    )
-
-            await self.moderation_manager.broadcast(interactive_id=interactive_id)
+                self.active_connections[interactive_id].add(target_conn)
+            if issue_resume:
+                token = create_resume_token(ResumeTokenData(
+                    user_id=user_id,
+                    participant_id=participant.participant_id,
+                    interactive_id=interactive_id,
+                    role=role
+                ))
+                target_conn.sender.send(encode_for(wire, dumps({"type": "resume", "resume_token": token})), key="resume")
+            self._send_snapshot(interactive_id=interactive_id, connection=target_conn)
+            await self._publish_online(interactive_id)
 
     async def disconnect(self, interactive_id: int, user_id: int, role: UserRoleEnum):
         """Отключение вебсокета от интерактива"""
         if interactive_id in self.active_connections:
-            flag = False
-            if interactive_id in self.interactive_sessions:
-                stage_now = await self.interactive_sessions[interactive_id].get_stage()
-                flag = stage_now == Stage.WAITING
+            stage_now = await self.get_live_stage(interactive_id)
+            flag = stage_now == Stage.WAITING
             if role != UserRoleEnum.participant and flag:
-                await self.interactive_sessions[interactive_id].stop()
+                if interactive_id in self.interactive_sessions:
+                    await self.interactive_sessions[interactive_id].stop()
+                elif self.bus is not None:
+                    await self.bus.send_to_owner(interactive_id, {"type": "stop"})
             else:
-                target_conn = None
-                connections = self.active_connections.get(interactive_id, [])
-                for conn in connections:
-                    if conn.role == role and conn.user_id == user_id:
-                        target_conn = conn
-                        break
-
+                target_conn = self.active_connections[interactive_id].get(role, user_id)
                 if target_conn is not None:
+                    target_conn.sender.close()
                     self.active_connections[interactive_id].remove(target_conn)
-                    await self.moderation_manager.broadcast(interactive_id=interactive_id)
+                    await self._publish_online(interactive_id)
+                    if interactive_id not in self.interactive_sessions and not self.active_connections[interactive_id]:
+                        await self._close_local(interactive_id=interactive_id)  # последний клиент ушёл с этого процесса
+
+    async def get_live_stage(self, interactive_id: int) -> Stage | None:
+        """Фаза интерактива, который сейчас идёт в этом или другом процессе"""
+        if interactive_id in self.interactive_sessions:
+            return await self.interactive_sessions[interactive_id].get_stage()
+        if self.bus is not None:
+            stage = await self.bus.get_stage(interactive_id)
+            if stage is not None:
+                return Stage(stage)
+        return None
+
+    async def is_live(self, interactive_id: int) -> bool:
+        """Идёт ли интерактив сейчас в каком-либо процессе"""
+        if interactive_id in self.interactive_sessions:
+            return True
+        return self.bus is not None and await self.bus.is_live(interactive_id)
+
+    def get_final_result(self, interactive_id: int) -> InteractiveResultData | None:
+        """Итоги интерактива, который сейчас на фазе END в этом процессе"""
+        session = self.interactive_sessions.get(interactive_id)
+        return session.final_result if session is not None else None
+
+    async def _participant_joined(self, interactive_id: int, participant: dict, is_blocked: bool):
+        """Новый участник в таблице результатов и списке модератора владельца сессии"""
+        if interactive_id not in self.interactive_sessions:
+            if self.bus is not None:
+                await self.bus.send_to_owner(interactive_id, {
+                    "type": "join",
+                    "participant": participant,
+                    "is_blocked": is_blocked
+                })
+            return
+        self.admitted[interactive_id][participant["user_id"]] = participant["participant_id"]
+        if not is_blocked:
+            self.interactive_sessions[interactive_id].scoreboard.add(**participant)
+        self.rosters[interactive_id].upsert(
+            ModerationData(
+                username=participant["username"] or "",
+                participant_id=participant["participant_id"],
+                is_hidden=participant["is_hidden"],
+                is_blocked=is_blocked
+            )
+        )
+
+    async def _publish_online(self, interactive_id: int):
+        if self.bus is not None and interactive_id in self.active_connections:
+            await self.bus.set_online(interactive_id, len(self.active_connections[interactive_id].participants))
+
+    async def _send_moderation(self, interactive_id: int, frame: str):
+        """Дельта списка участников модератору, где бы он ни был подключён"""
+        await self.moderation_manager.send(interactive_id=interactive_id, frame=frame)
+        if self.bus is not None:
+            await self.bus.publish_moderation(interactive_id, frame)
+
+    async def send_moderation_snapshot(self, interactive_id: int):
+        """Весь список участников при подключении модератора"""
+        if interactive_id in self.rosters:
+            moderation = self.rosters[interactive_id].snapshot()
+        else:
+            moderation = await Repository.get_moderation_data(interactive_id=interactive_id)
+        await self.moderation_manager.send(interactive_id=interactive_id, frame=moderation.model_dump_json())
+
+    def _new_connection(self, interactive_id: int, websocket: WebSocket, **kwargs) -> WebSocketConnection:
+        """Новое соединение со своей исходящей очередью"""
+        connection = WebSocketConnection(websocket=websocket, **kwargs)
+        connection.sender = ConnectionSender(
+            websocket=websocket,
+            on_evict=lambda: self._evict_connection(interactive_id=interactive_id, connection=connection)
+        )
+        return connection
+
+    async def _evict_connection(self, interactive_id: int, connection: WebSocketConnection):
+        """Отключение клиента, который не успевает принимать кадры"""
+        await self.disconnect(interactive_id, connection.user_id, connection.role)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=1013), SEND_TIMEOUT)
+        except:
+            pass
 
     async def _broadcast_callback(
             self,
@@ -134,203 +481,335 @@ class SessionManager:
         if interactive_id not in self.active_connections:
             return
 
+        registry = self.active_connections[interactive_id]
+        session = self.interactive_sessions.get(interactive_id)
+        if self.bus is not None and session is not None:
+            participant_ids = session.scoreboard.participant_ids()  # участники подключены и к другим процессам
+        else:
+            participant_ids = list(registry.participants)
+        frames = await self._build_frames(
+            interactive_id=interactive_id,
+            participant_ids=participant_ids,
+            message=message,
+            stage=stage,
+            question_type=question_type
+        )
+        if frames is None:
+            return
+
+        push = self.push_states.setdefault(interactive_id, StatePush())
+        previous_stage = push.stage
+        snapshot, delta = push.advance(
+            frames=frames,
+            message=message,
+            paused=session is not None and session.second_step == 0
+        )
+        self._deliver(interactive_id=interactive_id, push=push, snapshot=snapshot, delta=delta)
+
+        if self.bus is not None:
+            if push.stage != previous_stage:
+                await self.bus.set_stage(interactive_id, stage.value)
+            await self.bus.publish(interactive_id, {
+                "type": "frames",
+                "frames": frames.to_dict(),
+                "deadline": push.deadline,
+                "pause_deadline": push.pause_deadline,
+                "snapshot": snapshot,
+                "delta": delta,
+            })
+
+    def _deliver(self, interactive_id: int, push: StatePush, snapshot: bool, delta: str | None):
+        """Рассылка кадров тика соединениям этого процесса"""
+        registry = self.active_connections.get(interactive_id)
+        if registry is None:
+            return
+        frames = push.frames
+        leaders = list(registry.leaders.values())
+        participants = list(registry.participants.values())
+        packed_delta = None  # дельта в msgpack, одна на всех бинарных клиентов
+
+        for data in [*leaders, *participants]:
+            if data.mode == ProtocolMode.delta:
+                if delta is not None and data.wire == WireFormat.msgpack and packed_delta is None:
+                    packed_delta = json_to_msgpack(delta)
+                self._send_state(
+                    push=push,
+                    connection=data,
+                    snapshot=snapshot,
+                    delta=packed_delta if data.wire == WireFormat.msgpack else delta
+                )
+                continue
+            if data.role == UserRoleEnum.participant:
+                if data.wire == WireFormat.msgpack:
+                    frame = frames.packed_for_participant(data.participant_id)
+                else:
+                    frame = frames.frame_for_participant(data.participant_id)
+            elif data.wire == WireFormat.msgpack:
+                frame = frames.packed_for_leader()
+            else:
+                frame = frames.frame_for_leader()
+            if frame is not None:
+                data.sender.send(frame)
+
+    @staticmethod
+    def _send_state(push: StatePush, connection: WebSocketConnection, snapshot: bool, delta: str | bytes | None):
+        """Кадр тика для клиента в режиме дельт: снимок, дельта или ничего"""
+        if snapshot:
+            frame = push.snapshot_for(connection)
+            if frame is not None:
+                connection.sender.discard("delta")  # дельты к прошлому снимку больше не нужны
+                connection.sender.send(encode_for(connection.wire, frame), key="snapshot")
+        elif delta is not None:
+            connection.sender.send(delta, key="delta")
+
+    def _send_snapshot(self, interactive_id: int, connection: WebSocketConnection):
+        """Последнее состояние фазы сразу после (пере)подключения, не дожидаясь тика"""
+        push = self.push_states.get(interactive_id)
+        if push is None or push.frames is None:
+            return
+        if connection.mode == ProtocolMode.delta:
+            frame = push.snapshot_for(connection)
+            key = "snapshot"
+        elif connection.role == UserRoleEnum.participant:
+            frame = push.frames.frame_for_participant(connection.participant_id)
+            key = "stage"
+        else:
+            frame = push.frames.frame_for_leader()
+            key = "stage"
+        if frame is not None:
+            connection.sender.discard("delta")
+            connection.sender.send(encode_for(connection.wire, frame), key=key)
+
+    async def _build_frames(
+            self,
+            interactive_id: int,
+            participant_ids: list[int],
+            message: StageWaiting | StageCountdown | StageQuestion | StageDiscussion | StageEnd,
+            stage: Stage,
+            question_type: QuestionType | None = None
+    ) -> StageFrames | None:
+        """Сборка кадров тика: общая часть каждого варианта сообщения кодируется один раз"""
+        frames = StageFrames()
+
         if stage == Stage.WAITING or stage == Stage.COUNTDOWN or stage == Stage.QUESTION:
-            for data in self.active_connections[interactive_id]:
-                try:
-                    await data.websocket.send_json(message.model_dump())
-                except:
-                    await self.disconnect(interactive_id, data.user_id, data.role)
+            frames.leader_variant = frames.add_variant("all", message)
+            frames.participant_variant = frames.leader_variant
 
         elif stage == Stage.DISCUSSION and question_type is not None:
-            if question_type == QuestionType.one:
-                persentages = await Repository.get_percentages(question_id=message.data.question.id)
-                id_correct_answer = await Repository.get_id_correct_answers(question_id=message.data.question.id)
-                data_answers = DataAnswersStageDiscussionTypeOne(
-                    id_correct_answer=id_correct_answer[0],
-                    percentages=persentages
-                )
+            scoreboard = self.interactive_sessions[interactive_id].scoreboard
+            histogram = self.interactive_sessions[interactive_id].histogram
+            if question_type == QuestionType.one or question_type == QuestionType.many:
+                persentages = histogram.percentages()
+                id_correct_answer = [i.id for i in histogram.answers if i.is_correct]
+                if question_type == QuestionType.one:
+                    message.data_answers = DataAnswersStageDiscussionTypeOne(
+                        id_correct_answer=id_correct_answer[0],
+                        percentages=persentages
+                    )
+                else:
+                    message.data_answers = DataAnswersStageDiscussionTypeMany(
+                        id_correct_answer=id_correct_answer,
+                        percentages=persentages
+                    )
+                frames.leader_variant = frames.add_variant("all", message)
+                for participant_id in participant_ids:
+                    score = scoreboard.score(participant_id)
+                    frames.set_envelope(participant_id, frames.leader_variant, score=score)
 
-                message.data_answers = data_answers
-                for data in self.active_connections[interactive_id]:
-                    if data.role != UserRoleEnum.participant:
-                        try:
-                            await data.websocket.send_json(message.model_dump())
-                        except:
-                            await self.disconnect(interactive_id, data.user_id, data.role)
-                    else:
-                        try:
-                            score = await Repository.get_user_score(user_id=data.user_id, interactive_id=interactive_id)
-                            participant = StageDiscussionParticipant(**message.model_dump(), score=score)
-                            await data.websocket.send_json(participant.model_dump())
-                        except:
-                            await self.disconnect(interactive_id, data.user_id, data.role)
-
-            elif question_type == QuestionType.many:
-                persentages = await Repository.get_percentages(question_id=message.data.question.id)
-                id_correct_answer = await Repository.get_id_correct_answers(question_id=message.data.question.id)
-                data_answers = DataAnswersStageDiscussionTypeMany(
-                    id_correct_answer=id_correct_answer,
-                    percentages=persentages
-                )
-                message.data_answers = data_answers
-                for data in self.active_connections[interactive_id]:
-                    if data.role != UserRoleEnum.participant:
-                        try:
-                            await data.websocket.send_json(message.model_dump())
-                        except:
-                            await self.disconnect(interactive_id, data.user_id, data.role)
-                    else:
-                        try:
-                            score = await Repository.get_user_score(user_id=data.user_id, interactive_id=interactive_id)
-                            participant = StageDiscussionParticipant(**message.model_dump(), score=score)
-                            await data.websocket.send_json(participant.model_dump())
-                        except:
-                            await self.disconnect(interactive_id, data.user_id, data.role)
             elif question_type == QuestionType.text:
-                persentages_text = await Repository.get_percentages_for_text(question_id=message.data.question.id)
-                for data in self.active_connections[interactive_id]:
-                    if data.role != UserRoleEnum.participant:
-                        try:
-                            list_answer_data = [CorrectAnswerStageDiscussionTypeTextLeader(
-                                text=i.text,
-                                percentage=i.percentage
-                            ) for i in persentages_text
-                            ]
-                            message.data_answers = DataAnswersStageDiscussionTypeTextLeader(
-                                correct_answers=list_answer_data
-                            )
-                            await data.websocket.send_json(message.model_dump())
-                        except:
-                            await self.disconnect(interactive_id, data.user_id, data.role)
-                    else:
-                        is_correct = await Repository.is_user_answer_correct(
-                            user_id=data.user_id,
-                            question_id=message.data.question.id
-                        )
-                        if is_correct:
-                            try:
-                                score = await Repository.get_user_score(
-                                    user_id=data.user_id,
-                                    interactive_id=interactive_id
-                                )
-                                match = await Repository.get_user_matched_answer_id(
-                                    user_id=data.user_id,
-                                    question_id=message.data.question.id
-                                )
-                                item = next((p for p in persentages_text if p.id == match), None)
-                                message.data_answers = DataAnswersStageDiscussionTypeTextParticipantTrue(
-                                    is_correct=is_correct,
+                persentages_text = histogram.percentages_for_text()
+                list_answer_data = [
+                    CorrectAnswerStageDiscussionTypeTextLeader(
+                        text=i.text,
+                        percentage=i.percentage
+                    ) for i in persentages_text
+                ]
+                frames.leader_variant = frames.add_variant(
+                    "leader",
+                    message.model_copy(update={
+                        "data_answers": DataAnswersStageDiscussionTypeTextLeader(correct_answers=list_answer_data)
+                    })
+                )
+                for participant_id in participant_ids:
+                    is_correct = scoreboard.is_correct(participant_id, message.data.question.id)
+                    score = scoreboard.score(participant_id)
+                    item = None
+                    if is_correct:
+                        match = histogram.matched_answer_id(participant_id)
+                        item = next((p for p in persentages_text if p.id == match), None)
+
+                    if item is not None:
+                        variant = frames.add_variant(
+                            f"true:{item.id}",
+                            message.model_copy(update={
+                                "data_answers": DataAnswersStageDiscussionTypeTextParticipantTrue(
+                                    is_correct=True,
                                     answer=item.text,
                                     percentage=item.percentage
                                 )
-                                participant = StageDiscussionParticipant(**message.model_dump(), score=score)
-                                await data.websocket.send_json(participant.model_dump())
-                            except:
-                                await self.disconnect(interactive_id, data.user_id, data.role)
-                        else:
-                            try:
-                                score = await Repository.get_user_score(
-                                    user_id=data.user_id,
-                                    interactive_id=interactive_id
-                                )
-                                list_answer_data = [
-                                    CorrectAnswerStageDiscussionTypeTextLeader(
-                                        text=i.text,
-                                        percentage=i.percentage
-                                    ) for i in persentages_text
-                                ]
-                                message.data_answers = DataAnswersStageDiscussionTypeTextParticipantFalse(
-                                    is_correct=is_correct,
+                            })
+                        )
+                    else:
+                        variant = frames.add_variant(
+                            "false",
+                            message.model_copy(update={
+                                "data_answers": DataAnswersStageDiscussionTypeTextParticipantFalse(
+                                    is_correct=False,
                                     answers=list_answer_data
                                 )
-                                participant = StageDiscussionParticipant(**message.model_dump(), score=score)
-                                await data.websocket.send_json(participant.model_dump())
-                            except:
-                                await self.disconnect(interactive_id, data.user_id, data.role)
+                            })
+                        )
+                    frames.set_envelope(participant_id, variant, score=score)
+            else:
+                return None
+
         elif stage == Stage.END:
-            winners_sorted_list = await Repository.get_winners(interactive_id=interactive_id)
-            winners = []
-            winners_dict = {}
-            for i, w in enumerate(winners_sorted_list):
-                winners.append(
-                    Winner(
-                        position=i + 1,
-                        username=w["username"],
-                        score=w["score"],
-                        time=w["total_time"],
-                        participant_id=w["participant_id"],
-                        is_hidden=w["is_hidden"],
-                    )
-                )
-                winners_dict[w["user_id"]] = ScoreStageEnd(
-                    position=i + 1,
-                    score=w["score"],
-                    time=w["total_time"]
-                )
+            result = self.interactive_sessions[interactive_id].final_result  # посчитаны один раз при завершении
+            winners = result.winners
+            winners_dict = {
+                w.participant_id: ScoreStageEnd(position=w.position, score=w.score, time=w.time)
+                for w in winners
+            }
             message.data.winners = winners
-            for data in self.active_connections[interactive_id]:
-                if data.role != UserRoleEnum.participant:
-                    try:
-                        await data.websocket.send_json(message.model_dump())
-                    except:
-                        await self.disconnect(interactive_id, data.user_id, data.role)
-                else:
-                    try:
-                        score = winners_dict[data.user_id]
-                        participant = StageEndParticipant(**message.model_dump(), score=score)
-                        await data.websocket.send_json(participant.model_dump())
-                    except:
-                        await self.disconnect(interactive_id, data.user_id, data.role)
+            frames.leader_variant = frames.add_variant("all", message)
+            frames.participant_variant = frames.leader_variant  # участник без места получает общий кадр без score
+            for participant_id in participant_ids:
+                if participant_id in winners_dict:
+                    frames.set_envelope(participant_id, frames.leader_variant, score=winners_dict[participant_id])
+        else:
+            return None
+
+        return frames
 
     async def _get_participants_count_callback(self, interactive_id: int) -> int:
         """Возвращает количество активных участников для указанного интерактива"""
+        if self.bus is not None:
+            return await self.bus.online_total(interactive_id)
         if interactive_id in self.active_connections:
-            return len(self.active_connections[interactive_id]) - 1
+            return len(self.active_connections[interactive_id].participants)
         return 0
 
+    async def _handle_bus_frames(self, interactive_id: int, payload: dict):
+        """События владельца сессии для соединений этого процесса"""
+        if interactive_id not in self.active_connections:
+            return
+        if payload["type"] == "frames":
+            push = self.push_states.setdefault(interactive_id, StatePush())
+            push.frames = StageFrames.from_dict(payload["frames"])
+            push.deadline = payload["deadline"]
+            push.pause_deadline = payload["pause_deadline"]
+            self._deliver(
+                interactive_id=interactive_id,
+                push=push,
+                snapshot=payload["snapshot"],
+                delta=payload["delta"]
+            )
+        elif payload["type"] == "block":
+            await self._close_blocked(interactive_id=interactive_id, participant_id=payload["participant_id"])
+        elif payload["type"] == "close":
+            await self._close_local(interactive_id=interactive_id, remove_participants=payload.get("delete", False))
+
+    async def _handle_bus_inbox(self, interactive_id: int, payload: dict):
+        """Сообщения клиентов из других процессов для владельца сессии"""
+        session = self.interactive_sessions.get(interactive_id)
+        if session is None:
+            return
+        if payload["type"] == "join":
+            await self._participant_joined(
+                interactive_id=interactive_id,
+                participant=payload["participant"],
+                is_blocked=payload["is_blocked"]
+            )
+        elif payload["type"] == "participant":
+            await self._apply_participant_message(
+                participant=ParticipantSent(**payload["data"]),
+                participant_id=payload["participant_id"],
+                interactive_id=interactive_id
+            )
+        elif payload["type"] == "leader":
+            await self.handle_leader_message(leader_sent=LeaderSent(**payload["data"]), interactive_id=interactive_id)
+        elif payload["type"] == "block":
+            await self.handle_moderation_block_participant(
+                block_participant_id=payload["participant_id"],
+                interactive_id=interactive_id
+            )
+        elif payload["type"] == "stop":
+            if await session.get_stage() == Stage.WAITING:
+                await session.stop()
+        elif payload["type"] == "delete":
+            await self.disconnect_delete(interactive_id=interactive_id)
+
+    async def _handle_bus_moderation(self, interactive_id: int, payload: dict):
+        await self.moderation_manager.send(interactive_id=interactive_id, frame=payload["frame"])
+
+    async def _lease_lost(self, interactive_id: int):
+        """Сессию забрал другой процесс: здесь она больше не ведётся, соединения переходят на его кадры"""
+        session = self.interactive_sessions.pop(interactive_id, None)
+        if session is None:
+            return
+        if interactive_id in self.rosters:
+            self.rosters.pop(interactive_id).close()
+        self.admitted.pop(interactive_id, None)
+        await session.demote()
+        if interactive_id in self.active_connections:
+            self.bus.listen_frames(interactive_id, self._handle_bus_frames)
+            self._watch_owner(interactive_id)
+
     async def handle_participant_message(self, participant: ParticipantSent, participant_id: int, interactive_id: int):
         """Обработка действий участика, запись его ответа в бд"""
-        if interactive_id not in self.interactive_sessions:
+        if interactive_id not in self.active_connections:
             return
 
-        target_conn = None
-        connections = self.active_connections.get(interactive_id, [])
-        for conn in connections:
-            if conn.participant_id == participant_id:
-                target_conn = conn
-                break
-
-        if target_conn.is_blocked:
+        target_conn = self.active_connections[interactive_id].get_by_participant(participant_id)
+        if target_conn is None or target_conn.is_blocked:
             return
 
         if participant.name is not None:
             name_len = len(participant.name)
             if name_len < 2 or name_len > 32:
                 raise NameIsTooLongWSException()
+
+        if interactive_id not in self.interactive_sessions:
+            if self.bus is not None:
+                await self.bus.send_to_owner(interactive_id, {
+                    "type": "participant",
+                    "participant_id": participant_id,
+                    "data": participant.model_dump(exclude_none=True)
+                })
+            return
+        await self._apply_participant_message(
+            participant=participant,
+            participant_id=participant_id,
+            interactive_id=interactive_id
+        )
+
+    async def _apply_participant_message(self, participant: ParticipantSent, participant_id: int, interactive_id: int):
+        """Обработка сообщения участника в процессе-владельце сессии"""
+        session = self.interactive_sessions[interactive_id]
+        row = self.rosters[interactive_id].get(participant_id)
+        if row is None or row.is_blocked:
+            return  # сообщение из другого процесса могло прийти уже после блокировки
+        if participant.name is not None:
             flag = await Repository.set_participant_name(participant_id=participant_id, name=participant.name)
             if flag:
-                await self.moderation_manager.broadcast(interactive_id=interactive_id)
+                session.scoreboard.rename(participant_id, participant.name)
+                self.rosters[interactive_id].update(participant_id, username=participant.name)
             return
 
-        question_data = await self.interactive_sessions[interactive_id].get_question_data()
-        if question_data is None:
+        question_data = await session.get_question_data()
+        if question_data is None or await session.get_stage() != Stage.QUESTION:
             return
 
-        answers_data = await self.interactive_sessions[interactive_id].get_answers_data()
-        timer = await self.interactive_sessions[interactive_id].get_timer_passed()
-        is_correct = False
+        answer_key = session.answer_key
+        timer = await session.get_timer_passed()
+        matched_answer_id = None
 
         if question_data.type == QuestionType.one and participant.answer_id is not None:
-            answers_id = [i.id for i in answers_data]
-            try_answers_id = [i.id for i in answers_data if i.is_correct][0]
-
-            if not (participant.answer_id in answers_id):
+            is_correct = answer_key.check_one(participant.answer_id)
+            if is_correct is None:
                 return
-
-            if participant.answer_id == try_answers_id:
-                is_correct = True
-
-            await Repository.put_user_answers(
+            answer_ids = [participant.answer_id]
+            session.answer_buffer.put(
                 participant_id=participant_id,
                 question_id=question_data.id,
                 time=timer,
@@ -340,17 +819,11 @@ class SessionManager:
             )
 
         elif question_data.type == QuestionType.many and participant.answer_ids is not None:
-            answers_id = [i.id for i in answers_data]
-            try_answers_id = [i.id for i in answers_data if i.is_correct]
-            set_participant_answer_ids = set(participant.answer_ids)
-
-            if not (set_participant_answer_ids.issubset(answers_id)):
+            is_correct = answer_key.check_many(participant.answer_ids)
+            if is_correct is None:
                 return
-
-            if set_participant_answer_ids == set(try_answers_id):
-                is_correct = True
-
-            await Repository.put_user_answers(
+            answer_ids = participant.answer_ids
+            session.answer_buffer.put(
                 participant_id=participant_id,
                 question_id=question_data.id,
                 time=timer,
@@ -360,14 +833,10 @@ class SessionManager:
             )
 
         elif question_data.type == QuestionType.text and participant.answer_text is not None:
-
-            matched_answer_id = None
-            for item in answers_data:
-                if item.text.casefold() == participant.answer_text.casefold():
-                    is_correct = True
-                    matched_answer_id = item.id
-                    break
-            await Repository.put_user_answers(
+            matched_answer_id = answer_key.match_text(participant.answer_text)
+            is_correct = matched_answer_id is not None
+            answer_ids = [matched_answer_id] if is_correct else []
+            session.answer_buffer.put(
                 participant_id=participant_id,
                 question_id=question_data.id,
                 time=timer,
@@ -379,49 +848,73 @@ class SessionManager:
         else:
             return
 
+        session.histogram.record(participant_id=participant_id, answer_ids=answer_ids)
+        session.scoreboard.record_answer(
+            participant_id=participant_id,
+            question_id=question_data.id,
+            is_correct=is_correct,
+            weight=question_data.question_weight,
+            time=timer
+        )
+
     async def handle_leader_message(self, leader_sent: LeaderSent, interactive_id: int):
         """Обработка действий ведущего, смена статуса интерактива"""
         if interactive_id not in self.interactive_sessions:
+            if self.bus is not None and interactive_id in self.active_connections:
+                await self.bus.send_to_owner(interactive_id, {
+                    "type": "leader",
+                    "data": leader_sent.model_dump(exclude_none=True)
+                })
             return
         if leader_sent.interactive_status is not None:
             await self.interactive_sessions[interactive_id].change_status(leader_sent.interactive_status)
         elif leader_sent.hide is not None:
             flag = await Repository.toggle_participant_hidden(participant_id=leader_sent.hide, interactive_id=interactive_id)
-            connections = self.active_connections.get(interactive_id, [])
-            for conn in connections:
-                if conn.participant_id == leader_sent.hide:
-                    conn.is_hidden = True
-                    break
-            await self.moderation_manager.broadcast(interactive_id=interactive_id)
+            if flag:
+                self.interactive_sessions[interactive_id].scoreboard.toggle_hidden(leader_sent.hide)
+                self.rosters[interactive_id].toggle_hidden(leader_sent.hide)
+            target_conn = self.active_connections[interactive_id].get_by_participant(leader_sent.hide)
+            if target_conn is not None:
+                target_conn.is_hidden = not target_conn.is_hidden
 
     async def handle_moderation_block_participant(self, block_participant_id: int, interactive_id: int):
         """Обработка действий модератора, блокировка пользователя"""
         if interactive_id not in self.interactive_sessions:
+            if self.bus is not None:
+                await self.bus.send_to_owner(interactive_id, {"type": "block", "participant_id": block_participant_id})
             return
 
         flag = await Repository.block_participant(participant_id=block_participant_id, interactive_id=interactive_id)
-
-        target_conn = None
-        connections = self.active_connections.get(interactive_id, [])
-        for conn in connections:
-            if conn.participant_id == block_participant_id:
-                target_conn = conn
-                conn.is_blocked = True
-                break
-
-
+        if flag:
+            self.interactive_sessions[interactive_id].scoreboard.remove(block_participant_id)
+            self.rosters[interactive_id].update(block_participant_id, is_blocked=True)
+        if self.bus is not None:
+            await self.bus.add_blocked(interactive_id, block_participant_id)
+            await self.bus.publish(interactive_id, {"type": "block", "participant_id": block_participant_id})
+        await self._close_blocked(interactive_id=interactive_id, participant_id=block_participant_id)
+
+    async def _close_blocked(self, interactive_id: int, participant_id: int):
+        """Отключение заблокированного участника, если он подключён к этому процессу"""
+        if interactive_id not in self.active_connections:
+            return
+        target_conn = self.active_connections[interactive_id].get_by_participant(participant_id)
+        self.blocked.setdefault(interactive_id, set()).add(participant_id)
         if target_conn is not None:
+            target_conn.is_blocked = True
+            target_conn.sender.close()
+            self.active_connections[interactive_id].remove(target_conn)
+            await self._publish_online(interactive_id)
             message = await self.get_waiting_stage_to_blocked(interactive_id=interactive_id)
             try:
-                await target_conn.websocket.send_json(message.model_dump())
+                await send_frame(target_conn.websocket, target_conn.wire, encode_model(message))
             except:
                 return
             await target_conn.websocket.close(code=4006, reason='{"detail":{"message": "You have been removed from the interactive","code": "YOU_BEEN_REMOVED"}}')
-            self.active_connections[interactive_id].remove(target_conn)
-            await self.moderation_manager.broadcast(interactive_id=interactive_id)
 
     async def get_waiting_stage_to_blocked(self, interactive_id: int) -> StageWaiting:
-        interactive = self.interactive_sessions[interactive_id]
+        interactive = self.interactive_sessions.get(interactive_id)
+        if interactive is None:
+            interactive = await Repository.get_interactive_info(interactive_id=interactive_id)
         data = DataStageWaiting(
             title=interactive.title,
             description=interactive.description,
@@ -432,21 +925,65 @@ class SessionManager:
         return message
 
     async def remove_session(self, interactive_id: int):
+        if interactive_id in self.rosters:
+            self.rosters.pop(interactive_id).close()
+        self.admitted.pop(interactive_id, None)
         if interactive_id in self.interactive_sessions:
             self.interactive_sessions.pop(interactive_id)
-
-        if interactive_id in self.active_connections:
-            for ws_data in self.active_connections.pop(interactive_id):
-                await ws_data.websocket.close()
-
-
-    async def disconnect_delete(self, interactive_id: int):
+            if self.bus is not None:
+                await self.bus.publish(interactive_id, {"type": "close"})
+                await self.bus.release(interactive_id)
+        await self._close_local(interactive_id=interactive_id)
+
+    async def _close_local(self, interactive_id: int, remove_participants: bool = False):
+        """Закрытие соединений интерактива в этом процессе"""
+        self.push_states.pop(interactive_id, None)
+        self.blocked.pop(interactive_id, None)
+        if self.bus is not None:
+            self.bus.stop_listening(interactive_id)
+        if interactive_id not in self.active_connections:
+            return
         for conn in self.active_connections.pop(interactive_id):
-            await conn.websocket.close()
-            if conn.role == UserRoleEnum.participant:
+            conn.sender.close()
+            try:
+                await conn.websocket.close()
+            except:
+                pass
+            if remove_participants and conn.role == UserRoleEnum.participant:
                 await Repository.remove_participant_from_interactive(
                     user_id=conn.user_id,
                     interactive_id=interactive_id
                 )
+        if self.bus is not None:
+            await self.bus.set_online(interactive_id, 0)
 
-        await self.interactive_sessions[interactive_id].stop()
+    async def disconnect_delete(self, interactive_id: int) -> bool:
+        """Закрытие сессии перед удалением интерактива, False - владелец так и не закрыл её"""
+        if interactive_id not in self.interactive_sessions:
+            if self.bus is not None:
+                return await self._delete_on_owner(interactive_id)
+            return True
+
+        session = self.interactive_sessions[interactive_id]
+        session.answer_buffer.clear()
+        if self.bus is not None:
+            await self.bus.publish(interactive_id, {"type": "close", "delete": True})
+        await self._close_local(interactive_id=interactive_id, remove_participants=True)
+        await session.stop()
+        return True
+
+    async def _delete_on_owner(self, interactive_id: int) -> bool:
+        """Удаление ведёт владелец: ждём, пока он закроет сессию и снимет аренду, иначе бд удалится под ним"""
+        deadline = time.monotonic() + OWNER_LEASE * 2  # упавшего владельца за это время сменит другой процесс
+        notified = None
+        while (owner := await self.bus.get_owner(interactive_id)) is not None:
+            if interactive_id in self.interactive_sessions:
+                return await self.disconnect_delete(interactive_id)  # сессию забрал этот процесс
+            if owner != notified:
+                # новый владелец мог забрать сессию после того, как прежний не успел её удалить
+                await self.bus.send_to_owner(interactive_id, {"type": "delete"})
+                notified = owner
+            if time.monotonic() > deadline:
+                return False
+            await asyncio.sleep(DELETE_POLL)
+        return True
@@ -0,0 +1,105 @@
+import time
+
+from pydantic import BaseModel
+
+from users.schemas import UserRoleEnum
+
+from websocket.codec import dumps
+from websocket.frames import StageFrames, encode_fields, splice
+from websocket.schemas import WebSocketConnection
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def strip_timers(state: dict) -> dict:
+    """Убирает из состояния фазы значения таймеров, их клиент считает сам"""
+    if isinstance(state.get("data"), dict):
+        state["data"].pop("timer", None)
+    if isinstance(state.get("pause"), dict):
+        state["pause"].pop("timer_n", None)
+    return state
+
+
+def diff_state(previous: dict, current: dict) -> dict:
+    """Поля, которые изменились, вложенные объекты сравниваются на один уровень глубже"""
+    changes = {}
+    for key, value in current.items():
+        old = previous.get(key)
+        if old == value:
+            continue
+        if isinstance(old, dict) and isinstance(value, dict):
+            changes[key] = {k: v for k, v in value.items() if old.get(k) != v}
+        else:
+            changes[key] = value
+    return changes
+
+
+class StatePush:
+    """Состояние фазы для клиентов в режиме дельт (mode=delta).
+
+    Полный снимок уходит при смене фазы или вопроса, паузе и переподключении, в нём есть
+    server_time, deadline и pause_deadline (мс unix-времени, когда таймер дойдёт до 0).
+    Между снимками уходят только дельты: поля, изменившиеся относительно последнего снимка,
+    поэтому любая следующая дельта заменяет неотправленную предыдущую."""
+
+    def __init__(self):
+        self.frames: StageFrames | None = None  # кадры последнего тика
+        self.stage: str | None = None  # фаза последнего тика
+        self.deadline: int | None = None  # когда таймер фазы дойдёт до 0
+        self.pause_deadline: int | None = None  # когда закончится таймер паузы
+        self._signature: tuple | None = None  # фаза, вопрос и пауза последнего снимка
+        self._snapshot_state: dict | None = None
+        self._state: dict | None = None
+
+    def advance(self, frames: StageFrames, message: BaseModel, paused: bool) -> tuple[bool, str | None]:
+        """Новый тик: нужен ли снимок и кадр дельты, если что-то изменилось"""
+        now = now_ms()
+        state = message.model_dump(mode="json")
+        data = state.get("data") or {}
+        pause = state.get("pause") or {}
+        timer = data.get("timer")
+        pause_state = pause.get("state")
+
+        self.frames = frames
+        self.stage = state.get("stage")
+        self.deadline = now + timer * 1000 if timer is not None and not paused else None
+        self.pause_deadline = now + pause["timer_n"] * 1000 if pause_state not in (None, "no") else None
+
+        strip_timers(state)
+        question = data.get("question") or {}
+        signature = (state.get("stage"), question.get("id"), pause_state, paused)
+        if signature != self._signature:
+            self._signature = signature
+            self._snapshot_state = state
+            self._state = state
+            return True, None
+
+        if state == self._state:
+            return False, None
+        self._state = state
+        delta = {
+            "type": "delta",
+            "stage": state.get("stage"),
+            "server_time": now,
+            "changes": diff_state(self._snapshot_state, state),
+        }
+        return False, dumps(delta)
+
+    def snapshot_for(self, connection: WebSocketConnection) -> str | None:
+        """Полный снимок последнего тика с дедлайнами для клиента"""
+        if self.frames is None:
+            return None
+        if connection.role == UserRoleEnum.participant:
+            frame = self.frames.frame_for_participant(connection.participant_id)
+        else:
+            frame = self.frames.frame_for_leader()
+        if frame is None:
+            return None
+        return splice(frame, encode_fields(
+            type="snapshot",
+            server_time=now_ms(),
+            deadline=self.deadline,
+            pause_deadline=self.pause_deadline
+        ))
@@ -0,0 +1,10 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+# config.py читает их при импорте, подключений к бд и redis тесты не делают
+os.environ.setdefault("SECRET_KEY", "0123456789abcdef0123456789abcdef")
+os.environ.setdefault("DB_PORT", "5432")
+os.environ.setdefault("EMAIL_SMTP_PORT", "0")
+os.environ.setdefault("VK_APP_ID", "0")
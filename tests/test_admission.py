@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from websocket import admission
+from websocket.admission import AdmissionBatcher
+from websocket.schemas import AdmittedParticipant
+
+
+class FakeRepository:
+    """Запись участников без бд: INSERT идёт, пока тест не откроет release"""
+
+    def __init__(self):
+        self.calls: list[list[tuple[int, int]]] = []
+        self.release = asyncio.Event()
+        self.fail = False
+
+    async def register_quiz_participants(self, pending: list[tuple[int, int]]) -> list[AdmittedParticipant]:
+        self.calls.append(pending)
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("db is down")
+        return [
+            AdmittedParticipant(participant_id=user_id * 10, interactive_id=interactive_id, user_id=user_id,
+                                username=None, is_hidden=False, is_blocked=False, total_time=0)
+            for interactive_id, user_id in pending
+        ]
+
+
+@pytest.fixture
+def repository(monkeypatch) -> FakeRepository:
+    repository = FakeRepository()
+    monkeypatch.setattr(admission, "Repository", repository)
+    return repository
+
+
+def test_connections_in_window_share_one_insert(repository):
+    async def scenario():
+        batcher = AdmissionBatcher()
+        repository.release.set()
+        return await asyncio.gather(*(batcher.register(interactive_id=1, user_id=u) for u in (1, 2, 2, 3)))
+
+    participants = asyncio.run(scenario())
+    assert [p.participant_id for p in participants] == [10, 20, 20, 30]
+    assert len(repository.calls) == 1
+    assert sorted(repository.calls[0]) == [(1, 1), (1, 2), (1, 3)]
+
+
+def test_reconnect_waits_for_insert_in_flight(repository):
+    async def scenario():
+        batcher = AdmissionBatcher()
+        first = asyncio.create_task(batcher.register(interactive_id=1, user_id=5))
+        while not repository.calls:
+            await asyncio.sleep(0.001)  # пачка ушла в бд, ответа ещё нет
+        second = asyncio.create_task(batcher.register(interactive_id=1, user_id=5))
+        await asyncio.sleep(admission.ADMISSION_WINDOW * 3)
+        repository.release.set()
+        return await first, await second
+
+    first, second = asyncio.run(scenario())
+    assert first.participant_id == second.participant_id == 50
+    assert repository.calls == [[(1, 5)]]
+
+
+def test_registration_after_insert_is_sent_again(repository):
+    async def scenario():
+        batcher = AdmissionBatcher()
+        repository.release.set()
+        await batcher.register(interactive_id=1, user_id=5)
+        await batcher.register(interactive_id=1, user_id=5)
+
+    asyncio.run(scenario())
+    assert repository.calls == [[(1, 5)], [(1, 5)]]  # повтор после записи решает ON CONFLICT в бд
+
+
+def test_failed_insert_is_reported_to_every_waiter(repository):
+    async def scenario():
+        batcher = AdmissionBatcher()
+        repository.fail = True
+        repository.release.set()
+        results = await asyncio.gather(
+            batcher.register(interactive_id=1, user_id=1),
+            batcher.register(interactive_id=1, user_id=1),
+            return_exceptions=True
+        )
+        return results, batcher._inflight
+
+    results, inflight = asyncio.run(scenario())
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert inflight == {}
@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from websocket import answer_buffer, InteractiveSession as session_module
+from websocket.answer_buffer import AnswerBuffer
+from websocket.InteractiveSession import InteractiveSession, Stage
+from websocket.schemas import AnswerGet, InteractiveInfo, InteractiveResultData, InteractiveSnapshot, Question, \
+    QuestionType
+
+
+class FakeRepository:
+    """Бд, которая может быть недоступна"""
+
+    def __init__(self):
+        self.down = False
+        self.written: list[tuple[int, int, dict]] = []
+        self.results = 0
+
+    async def put_user_answers(self, user_answers):
+        if self.down:
+            raise ConnectionError("postgres is down")
+        self.written += [(a.participant_id, a.question_id, a.answer_data) for a in user_answers]
+
+    async def save_question_result(self, **kwargs):
+        pass
+
+    async def save_total_times(self, **kwargs):
+        pass
+
+    async def build_interactive_result(self, interactive_id: int) -> InteractiveResultData:
+        self.results += 1
+        return InteractiveResultData(participants_total=len(self.written), winners=[])
+
+    async def save_interactive_result(self, **kwargs):
+        pass
+
+    async def mark_interactive_conducted(self, **kwargs):
+        pass
+
+
+@pytest.fixture
+def repository(monkeypatch) -> FakeRepository:
+    repository = FakeRepository()
+    monkeypatch.setattr(answer_buffer, "Repository", repository)
+    monkeypatch.setattr(session_module, "Repository", repository)
+    return repository
+
+
+def put(buffer: AnswerBuffer, participant_id: int, answer_id: int):
+    buffer.put(participant_id=participant_id, question_id=1, time=3, is_correct=True, question_type=QuestionType.one,
+               answer_id=answer_id)
+
+
+def test_last_answer_wins(repository):
+    buffer = AnswerBuffer()
+    put(buffer, 1, 10)
+    put(buffer, 1, 11)
+    put(buffer, 2, 10)
+    asyncio.run(buffer.flush())
+    assert len(repository.written) == 2
+    assert len(buffer) == 0
+
+
+def test_failed_flush_keeps_answers_without_overwriting_newer(repository):
+    async def scenario():
+        buffer = AnswerBuffer()
+        put(buffer, 1, 10)
+        repository.down = True
+        with pytest.raises(ConnectionError):
+            await buffer.flush()
+        put(buffer, 1, 11)  # ответ, пришедший после неудачного сброса
+        repository.down = False
+        await buffer.flush()
+
+    asyncio.run(scenario())
+    assert [(p, q) for p, q, _ in repository.written] == [(1, 1)]
+    assert repository.written[0][2] == {"type": "one", "answer_id": 11}
+
+
+class Manager:
+    """Сессия держит на менеджер только слабую ссылку"""
+
+
+def make_session(manager: Manager, frames: list) -> InteractiveSession:
+    snapshot = InteractiveSnapshot(
+        info=InteractiveInfo(interactive_id=7, code="123456", title="Квиз", description="", answer_duration=10,
+                             discussion_duration=5, countdown_duration=3),
+        questions=(Question(id=1, text="Вопрос", position=1, question_weight=1, type=QuestionType.one),),
+        answers={1: (AnswerGet(id=10, text="A", is_correct=True), AnswerGet(id=11, text="B", is_correct=False))}
+    )
+
+    async def broadcast(interactive_id, message, stage, **kwargs):
+        frames.append(stage)
+
+    return InteractiveSession(snapshot=snapshot, standings=[], broadcast_callback=broadcast,
+                              get_participants_count=None, session_manager=manager)
+
+
+def test_discussion_survives_failed_flush(repository):
+    manager = Manager()
+    session = make_session(manager, [])
+
+    async def scenario():
+        await session._change_stage(Stage.QUESTION)
+        put(session.answer_buffer, 1, 10)
+        repository.down = True
+        await session._change_stage(Stage.DISCUSSION)
+
+    asyncio.run(scenario())
+    assert session.stage == Stage.DISCUSSION
+    assert len(session.answer_buffer) == 1  # запишет следующий сброс
+
+
+def test_end_results_wait_for_answers(repository):
+    manager, frames = Manager(), []
+    session = make_session(manager, frames)
+
+    async def scenario():
+        put(session.answer_buffer, 1, 10)
+        session.stage = Stage.END
+        repository.down = True
+        first = await session._end_tick()
+        repository.down = False
+        second = await session._end_tick()
+        return first, second
+
+    assert asyncio.run(scenario()) == (True, True)
+    assert repository.results == 1  # итоги построены только после записи ответов
+    assert len(repository.written) == 1
+    assert frames == [Stage.END]
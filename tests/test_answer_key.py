@@ -0,0 +1,82 @@
+import pytest
+
+from websocket.answer_key import AnswerKey, BKTree, allowed_typos, edit_distance, normalize_text
+from websocket.schemas import AnswerGet, Question, QuestionType
+
+
+def make_key(question_type: QuestionType, answers: list[tuple[int, str, bool]]) -> AnswerKey:
+    question = Question(id=1, text="Вопрос", position=1, question_weight=1, type=question_type)
+    return AnswerKey(question=question, answers=tuple(AnswerGet(id=i, text=t, is_correct=c) for i, t, c in answers))
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("Москва", "москва"),
+    ("  МОСКВА!  ", "москва"),
+    ("Ёлка", "елка"),
+    ("Санкт-Петербург", "санкт петербург"),
+    ("ｆｕｌｌ　ｗｉｄｔｈ", "full width"),
+    ("...", ""),
+])
+def test_normalize_text(raw, expected):
+    assert normalize_text(raw) == expected
+
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0),
+    ("москва", "москва", 0),
+    ("москва", "масква", 1),
+    ("москва", "моска", 1),
+    ("kitten", "sitting", 3),
+])
+def test_edit_distance(a, b, distance):
+    assert edit_distance(a, b, 10) == distance
+
+
+def test_edit_distance_stops_at_limit():
+    assert edit_distance("abcdef", "uvwxyz", 2) == 3
+    assert edit_distance("a", "abcdef", 2) == 3
+
+
+@pytest.mark.parametrize("text, typos", [("кот", 0), ("дом!!", 1), ("москва", 1), ("санкт петербург", 2)])
+def test_allowed_typos(text, typos):
+    assert allowed_typos(text) == typos
+
+
+def test_bk_tree_closest():
+    tree = BKTree()
+    for word in ["москва", "минск", "мурманск", "москва"]:
+        tree.add(word)
+    assert tree.closest("масква", 1) == "москва"
+    assert tree.closest("мурманк", 1) == "мурманск"
+    assert tree.closest("париж", 2) is None
+    assert tree.closest("москва", 0) is None  # точные совпадения ищутся не в дереве
+
+
+def test_check_one():
+    key = make_key(QuestionType.one, [(1, "A", True), (2, "B", False)])
+    assert key.check_one(1) is True
+    assert key.check_one(2) is False
+    assert key.check_one(3) is None
+
+
+def test_check_many():
+    key = make_key(QuestionType.many, [(1, "A", True), (2, "B", True), (3, "C", False)])
+    assert key.check_many([2, 1]) is True
+    assert key.check_many([1]) is False
+    assert key.check_many([1, 2, 3]) is False
+    assert key.check_many([1, 4]) is None
+
+
+def test_match_text_exact_and_normalized():
+    key = make_key(QuestionType.text, [(10, "Москва", True), (11, "Санкт-Петербург", True)])
+    assert key.match_text("москва") == 10
+    assert key.match_text("  МОСКВА! ") == 10
+    assert key.match_text("санкт петербург") == 11
+
+
+def test_match_text_typos_depend_on_length():
+    key = make_key(QuestionType.text, [(10, "Москва", True), (11, "Санкт-Петербург", True), (12, "Кот", True)])
+    assert key.match_text("Масква") == 10  # 6 букв: одна опечатка
+    assert key.match_text("Маскво") is None  # две - уже другой ответ
+    assert key.match_text("Санкт-Питербурх") == 11  # длинный ответ: две опечатки
+    assert key.match_text("Кит") is None  # в коротком слове опечатка меняет смысл
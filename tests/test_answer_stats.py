@@ -0,0 +1,87 @@
+import asyncio
+
+from websocket.answer_stats import AnswerHistogram
+from websocket.InteractiveSession import InteractiveSession, Stage
+from websocket.schemas import AnswerGet, InteractiveInfo, InteractiveSnapshot, Percentage, PercentageTypeText, \
+    Question, QuestionType
+
+ANSWERS = (
+    AnswerGet(id=1, text="Москва", is_correct=True),
+    AnswerGet(id=2, text="Питер", is_correct=False),
+    AnswerGet(id=3, text="Казань", is_correct=False),
+)
+
+
+def test_percentages_of_single_choice():
+    histogram = AnswerHistogram(question_id=1, answers=list(ANSWERS))
+    for participant_id, answer_id in [(1, 1), (2, 1), (3, 2)]:
+        histogram.record(participant_id=participant_id, answer_ids=[answer_id])
+    assert histogram.total == 3
+    assert histogram.counts == {1: 2, 2: 1, 3: 0}
+    assert histogram.percentages() == [
+        Percentage(id=1, percentage=66.67), Percentage(id=2, percentage=33.33), Percentage(id=3, percentage=0.0)
+    ]
+
+
+def test_empty_histogram_has_zero_percentages():
+    histogram = AnswerHistogram(question_id=1, answers=list(ANSWERS))
+    assert [p.percentage for p in histogram.percentages()] == [0.0, 0.0, 0.0]
+
+
+def test_reanswer_replaces_previous_choice():
+    histogram = AnswerHistogram(question_id=1, answers=list(ANSWERS))
+    histogram.record(participant_id=1, answer_ids=[1, 2])
+    histogram.record(participant_id=1, answer_ids=[3])
+    assert histogram.total == 1
+    assert histogram.counts == {1: 0, 2: 0, 3: 1}
+    assert histogram.selected == {1: (3,)}
+
+
+def test_text_answers_count_wrong_answers_in_total():
+    histogram = AnswerHistogram(question_id=1, answers=list(ANSWERS))
+    histogram.record(participant_id=1, answer_ids=[1])  # совпал с "Москва"
+    histogram.record(participant_id=2, answer_ids=[])  # ни с чем не совпал
+    histogram.record(participant_id=3, answer_ids=[1])
+    histogram.record(participant_id=4, answer_ids=[])
+    assert histogram.total == 4
+    assert histogram.matched_answer_id(1) == 1
+    assert histogram.matched_answer_id(2) is None
+    assert histogram.percentages_for_text() == [
+        PercentageTypeText(id=1, text="Москва", percentage=50.0),
+        PercentageTypeText(id=2, text="Питер", percentage=0.0),
+        PercentageTypeText(id=3, text="Казань", percentage=0.0),
+    ]
+
+
+def test_unknown_answer_id_is_ignored_in_counts():
+    histogram = AnswerHistogram(question_id=1, answers=list(ANSWERS))
+    histogram.record(participant_id=1, answer_ids=[99])
+    assert histogram.counts == {1: 0, 2: 0, 3: 0}
+
+
+class Manager:
+    """Сессия держит на менеджер только слабую ссылку"""
+
+
+def test_next_question_starts_empty_histogram():
+    questions = (
+        Question(id=1, text="Первый", position=1, question_weight=1, type=QuestionType.one),
+        Question(id=2, text="Второй", position=2, question_weight=1, type=QuestionType.text),
+    )
+    snapshot = InteractiveSnapshot(
+        info=InteractiveInfo(interactive_id=7, code="123456", title="Квиз", description="", answer_duration=10,
+                             discussion_duration=5, countdown_duration=3),
+        questions=questions,
+        answers={1: ANSWERS, 2: (AnswerGet(id=4, text="Нева", is_correct=True),)}
+    )
+    manager = Manager()
+    session = InteractiveSession(snapshot=snapshot, standings=[], broadcast_callback=None,
+                                 get_participants_count=None, session_manager=manager)
+    asyncio.run(session._change_stage(Stage.QUESTION))
+    session.histogram.record(participant_id=1, answer_ids=[1])
+
+    session.stage = Stage.DISCUSSION  # обсуждение пропускаем, оно пишет итоги вопроса в бд
+    asyncio.run(session._change_stage(Stage.QUESTION))
+    assert session.histogram.question_id == 2
+    assert session.histogram.total == 0
+    assert session.histogram.counts == {4: 0}
@@ -0,0 +1,120 @@
+import asyncio
+
+from websocket.codec import dumps, loads
+from websocket.InteractiveSession import InteractiveSession, Stage
+from websocket.schemas import AnswerGet, InteractiveInfo, InteractiveSnapshot, Question, QuestionType, StatePause
+from websocket.scoreboard import Scoreboard
+
+
+class Manager:
+    """Сессия держит на менеджер только слабую ссылку"""
+
+
+def make_snapshot() -> InteractiveSnapshot:
+    questions = (
+        Question(id=1, text="Первый", position=1, question_weight=2, type=QuestionType.one),
+        Question(id=2, text="Второй", position=2, question_weight=3, type=QuestionType.many),
+    )
+    answers = {
+        1: (AnswerGet(id=11, text="A", is_correct=True), AnswerGet(id=12, text="B", is_correct=False)),
+        2: (AnswerGet(id=21, text="C", is_correct=True), AnswerGet(id=22, text="D", is_correct=True)),
+    }
+    info = InteractiveInfo(interactive_id=7, code="123456", title="Квиз", description="", answer_duration=10,
+                           discussion_duration=5, countdown_duration=3)
+    return InteractiveSnapshot(info=info, questions=questions, answers=answers)
+
+
+def make_session(manager: Manager) -> InteractiveSession:
+    return InteractiveSession(
+        snapshot=make_snapshot(),
+        standings=[],
+        broadcast_callback=None,
+        get_participants_count=None,
+        session_manager=manager
+    )
+
+
+def round_trip(value):
+    """Как в redis: через json"""
+    return loads(dumps(value))
+
+
+def make_scoreboard() -> Scoreboard:
+    scoreboard = Scoreboard()
+    scoreboard.add(participant_id=1, user_id=101, username="Аня", is_hidden=False)
+    scoreboard.add(participant_id=2, user_id=102, username=None, is_hidden=True)
+    scoreboard.add(participant_id=3, user_id=103, username="Борис", is_hidden=False)
+    scoreboard.record_answer(1, question_id=1, is_correct=True, weight=2, time=4)
+    scoreboard.record_answer(2, question_id=1, is_correct=True, weight=2, time=2)
+    scoreboard.record_answer(3, question_id=1, is_correct=False, weight=2, time=1)
+    scoreboard.close_question(question_id=1, time_question=10)
+    return scoreboard
+
+
+def test_scoreboard_round_trip():
+    scoreboard = make_scoreboard()
+    restored = Scoreboard.load(round_trip(scoreboard.dump()))
+
+    assert [e.participant_id for e in restored.standings()] == [2, 1, 3]
+    for participant_id in (1, 2, 3):
+        assert restored.score(participant_id) == scoreboard.score(participant_id)
+        assert restored.total_time(participant_id) == scoreboard.total_time(participant_id)
+        assert restored.position(participant_id) == scoreboard.position(participant_id)
+        assert restored.is_correct(participant_id, 1) == scoreboard.is_correct(participant_id, 1)
+    assert restored.top(1)[0].is_hidden is True
+
+
+def test_restored_answer_replaces_previous():
+    restored = Scoreboard.load(round_trip(make_scoreboard().dump()))
+    restored.record_answer(3, question_id=1, is_correct=True, weight=2, time=1)
+    restored.record_answer(1, question_id=1, is_correct=False, weight=2, time=4)
+    assert restored.score(3) == 2
+    assert restored.score(1) == 0
+    assert [e.participant_id for e in restored.standings()] == [3, 2, 1]  # при равных баллах раньше меньшее время
+
+
+def test_session_round_trip():
+    manager = Manager()
+    session = make_session(manager)
+    asyncio.run(session._change_stage(Stage.QUESTION))
+    session.scoreboard = make_scoreboard()
+    session.histogram.record(participant_id=1, answer_ids=[11])
+    session.histogram.record(participant_id=2, answer_ids=[12])
+    session.remaining_time = 6
+    session.state = StatePause.no
+
+    checkpoint = round_trip({"state": session.dump_state(), "results": session.dump_results(), "pending": []})
+    restored = make_session(manager)
+    asyncio.run(restored.restore(checkpoint))
+
+    assert restored.stage == Stage.QUESTION
+    assert restored.current_question.id == 1
+    assert restored.remaining_time == 6
+    assert restored.state == StatePause.no
+    assert restored.histogram.counts == {11: 1, 12: 1}
+    assert restored.histogram.matched_answer_id(2) == 12
+    assert restored.scoreboard.score(2) == 2
+
+
+def test_selection_of_previous_question_is_not_restored():
+    manager = Manager()
+    session = make_session(manager)
+    asyncio.run(session._change_stage(Stage.QUESTION))
+    session.histogram.record(participant_id=1, answer_ids=[11])
+    results = session.dump_results()  # последняя запись таблицы - ещё на первом вопросе
+
+    session.question_index += 1  # следующий вопрос, таблица не менялась
+    checkpoint = round_trip({"state": session.dump_state(), "results": results, "pending": []})
+    restored = make_session(manager)
+    asyncio.run(restored.restore(checkpoint))
+
+    assert restored.current_question.id == 2
+    assert restored.histogram.total == 0
+    assert restored.histogram.counts == {21: 0, 22: 0}
+
+
+def test_new_question_forces_results_write():
+    session = make_session(Manager())
+    session._checkpoint_version = session.scoreboard.version
+    asyncio.run(session._change_stage(Stage.QUESTION))
+    assert session._checkpoint_version != session.scoreboard.version
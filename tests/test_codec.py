@@ -0,0 +1,32 @@
+import msgpack
+
+from websocket.codec import FIELD_TAGS, dumps, json_to_msgpack, pack
+from websocket.frames import StageFrames
+from websocket.schemas import DataPause, ScoreStageEnd, StatePause
+
+
+def make_frames() -> StageFrames:
+    frames = StageFrames()
+    frames.leader_variant = frames.add_variant("all", DataPause(state=StatePause.timer_n, timer_n=12))
+    frames.participant_variant = frames.leader_variant
+    frames.set_envelope(1, frames.leader_variant, score=ScoreStageEnd(position=1, score=5, time=12))
+    return frames
+
+
+def test_known_keys_are_sent_as_tags():
+    packed = msgpack.unpackb(pack({"stage": "end", "custom": [{"id": 1}]}), strict_map_key=False)
+    assert packed == {FIELD_TAGS.index("stage"): "end", "custom": [{FIELD_TAGS.index("id"): 1}]}
+
+
+def test_json_frame_to_msgpack():
+    frame = {"data": {"question": {"id": 3, "text": "Вопрос"}}, "timer": 5}
+    assert json_to_msgpack(dumps(frame)) == pack(frame)
+
+
+def test_packed_frames_match_json():
+    frames = make_frames()
+    for participant_id in (1, 2):
+        packed = frames.packed_for_participant(participant_id)
+        assert packed == json_to_msgpack(frames.frame_for_participant(participant_id))
+    assert frames.packed_for_leader() == json_to_msgpack(frames.frame_for_leader())
+    assert msgpack.unpackb(frames.packed_for_leader(), strict_map_key=False)[FIELD_TAGS.index("timer_n")] == 12
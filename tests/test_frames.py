@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+from websocket.codec import dumps, loads
+from websocket.frames import StageFrames
+from websocket.InteractiveSession import Stage
+from websocket.moderation_manager import ModerationManager
+from websocket.schemas import DataPause, DataStageEnd, InteractiveResultData, ScoreStageEnd, StageEnd, StatePause, \
+    Winner
+from websocket.session_manager import SessionManager
+
+
+def make_frames() -> StageFrames:
+    frames = StageFrames()
+    frames.leader_variant = frames.add_variant("all", DataPause(state=StatePause.timer_n, timer_n=12))
+    frames.participant_variant = frames.leader_variant
+    frames.set_envelope(1, frames.leader_variant, score=ScoreStageEnd(position=1, score=5, time=12))
+    return frames
+
+
+def test_envelope_is_appended_to_shared_part():
+    frames = make_frames()
+    assert loads(frames.frame_for_participant(1)) == {
+        **loads(frames.frame_for_leader()),
+        "score": {"position": 1, "score": 5, "time": 12},
+    }
+    assert frames.frame_for_participant(2) == frames.frame_for_leader()  # без конверта - общий кадр
+
+
+def test_frames_survive_bus_round_trip():
+    frames = make_frames()
+    restored = StageFrames.from_dict(loads(dumps(frames.to_dict())))  # как через redis
+    for participant_id in (1, 2):
+        assert restored.frame_for_participant(participant_id) == frames.frame_for_participant(participant_id)
+    assert restored.frame_for_leader() == frames.frame_for_leader()
+
+
+def test_no_participant_variant_means_no_frame():
+    frames = StageFrames()
+    frames.leader_variant = frames.add_variant("leader", ScoreStageEnd(position=1, score=0, time=0))
+    assert frames.frame_for_participant(1) is None
+    assert frames.packed_for_participant(1) is None
+
+
+def test_end_frame_reaches_participant_without_place():
+    async def scenario():
+        manager = SessionManager(ModerationManager())
+        winner = Winner(position=1, username="Аня", score=5, participant_id=1, is_hidden=False, time=12)
+        manager.interactive_sessions[7] = SimpleNamespace(
+            final_result=InteractiveResultData(participants_total=2, winners=[winner])
+        )
+        message = StageEnd(stage=Stage.END, data=DataStageEnd(title="Квиз", participants_total=2))
+        return await manager._build_frames(interactive_id=7, participant_ids=[1, 2], message=message, stage=Stage.END)
+
+    frames = asyncio.run(scenario())
+    assert loads(frames.frame_for_participant(1))["score"] == {"position": 1, "score": 5, "time": 12}
+    assert frames.frame_for_participant(2) == frames.frame_for_leader()
+    assert loads(frames.frame_for_participant(2))["data"]["winners"][0]["participant_id"] == 1
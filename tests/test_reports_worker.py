@@ -0,0 +1,33 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+yaml = pytest.importorskip("yaml")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def worker_env(compose_file: str, **overrides) -> dict:
+    """Окружение контейнера reports_worker: только его переменные, значения подставляются заглушками"""
+    with open(os.path.join(ROOT, compose_file), encoding="utf-8") as f:
+        service = yaml.safe_load(f)["services"]["reports_worker"]
+    env = {key: "1" for key in service["environment"]}
+    env.update(overrides)
+    env["PATH"] = os.environ["PATH"]
+    return env
+
+
+@pytest.mark.parametrize("compose_file", ["docker-compose.yml", "docker-compose.dev.yml"])
+@pytest.mark.parametrize("overrides", [{}, {"EMAIL_SMTP_PORT": "", "VK_APP_ID": ""}], ids=["set", "empty"])
+def test_worker_imports_jobs(compose_file, overrides):
+    # пустое значение - так compose подставляет переменную, которой нет в .env
+    result = subprocess.run(
+        [sys.executable, "-c", "import reports.jobs"],
+        cwd=os.path.join(ROOT, "src"),
+        env=worker_env(compose_file, **overrides),
+        capture_output=True,
+        text=True
+    )
+    assert result.returncode == 0, result.stderr
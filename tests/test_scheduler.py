@@ -0,0 +1,117 @@
+import asyncio
+import time
+
+from websocket.scheduler import TickScheduler
+
+INTERVAL = 0.05
+
+
+def make_scheduler() -> TickScheduler:
+    return TickScheduler(interval=INTERVAL, resolution=0.005, slots=8)
+
+
+def test_ticks_until_callback_returns_false():
+    async def scenario():
+        scheduler = make_scheduler()
+        ticks, done = [], asyncio.Event()
+
+        async def tick() -> bool:
+            ticks.append(time.monotonic())
+            return len(ticks) < 4
+
+        async def on_done():
+            done.set()
+
+        started = time.monotonic()
+        scheduler.add("session", tick, on_done=on_done)
+        await asyncio.wait_for(done.wait(), 2)
+        return scheduler, started, ticks
+
+    scheduler, started, ticks = asyncio.run(scenario())
+    assert len(ticks) == 4
+    assert "session" not in scheduler
+    # дедлайны от прошлого дедлайна: сдвиг не копится от тика к тику
+    assert ticks[-1] - started < 4 * INTERVAL + 0.05
+
+
+def test_slow_tick_does_not_shift_deadlines():
+    async def scenario():
+        scheduler = make_scheduler()
+        ticks = []
+
+        async def tick() -> bool:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(INTERVAL * 0.6)  # рассылка занимает больше половины интервала
+            return len(ticks) < 5
+
+        started = time.monotonic()
+        scheduler.add("session", tick)
+        while "session" in scheduler:
+            await asyncio.sleep(0.01)
+        return started, ticks
+
+    started, ticks = asyncio.run(scenario())
+    assert ticks[-1] - started < 5 * INTERVAL + 0.05
+
+
+def test_remove_cancels_running_tick():
+    async def scenario():
+        scheduler = make_scheduler()
+        started, cancelled = asyncio.Event(), asyncio.Event()
+
+        async def tick() -> bool:
+            started.set()
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return True
+
+        scheduler.add("session", tick)
+        await asyncio.wait_for(started.wait(), 2)
+        removed = await scheduler.remove("session")
+        return removed, cancelled.is_set(), await scheduler.remove("session"), len(scheduler)
+
+    assert asyncio.run(scenario()) == (True, True, False, 0)
+
+
+def test_failed_tick_finishes_session():
+    async def scenario():
+        scheduler = make_scheduler()
+        done = asyncio.Event()
+
+        async def tick() -> bool:
+            raise RuntimeError("boom")
+
+        async def on_done():
+            done.set()
+
+        scheduler.add("session", tick, on_done=on_done)
+        await asyncio.wait_for(done.wait(), 2)
+        return "session" in scheduler
+
+    assert asyncio.run(scenario()) is False
+
+
+def test_sessions_tick_independently():
+    async def scenario():
+        scheduler = make_scheduler()
+        counts = {"a": 0, "b": 0}
+
+        def make_tick(key: str, limit: int):
+            async def tick() -> bool:
+                counts[key] += 1
+                return counts[key] < limit
+            return tick
+
+        scheduler.add("a", make_tick("a", 2))
+        scheduler.add("b", make_tick("b", 4))
+        while len(scheduler):
+            await asyncio.sleep(0.01)
+        return counts, scheduler.stats()
+
+    counts, stats = asyncio.run(scenario())
+    assert counts == {"a": 2, "b": 4}
+    assert stats["ticks"] == 6
+    assert stats["sessions"] == 0
@@ -0,0 +1,60 @@
+import random
+
+from websocket.scoreboard import Scoreboard
+
+
+def make_scoreboard(count: int) -> Scoreboard:
+    scoreboard = Scoreboard()
+    for participant_id in range(1, count + 1):
+        scoreboard.add(participant_id=participant_id, user_id=100 + participant_id, username=f"u{participant_id}",
+                       is_hidden=False)
+    return scoreboard
+
+
+def test_places_by_score_then_time():
+    scoreboard = make_scoreboard(3)
+    scoreboard.record_answer(1, question_id=1, is_correct=True, weight=2, time=5)
+    scoreboard.record_answer(2, question_id=1, is_correct=True, weight=2, time=3)
+    scoreboard.record_answer(3, question_id=1, is_correct=False, weight=2, time=1)
+    scoreboard.close_question(question_id=1, time_question=10)
+
+    assert [winner.participant_id for winner in scoreboard.top(3)] == [2, 1, 3]
+    assert [scoreboard.position(participant_id) for participant_id in (1, 2, 3)] == [2, 1, 3]
+
+
+def test_reanswer_replaces_previous_answer():
+    scoreboard = make_scoreboard(2)
+    scoreboard.record_answer(1, question_id=1, is_correct=True, weight=3, time=1)
+    assert scoreboard.position(1) == 1
+    scoreboard.record_answer(1, question_id=1, is_correct=False, weight=3, time=2)
+    scoreboard.record_answer(2, question_id=1, is_correct=True, weight=3, time=4)
+
+    assert scoreboard.score(1) == 0
+    assert scoreboard.position(2) == 1
+    assert [entry.participant_id for entry in scoreboard.standings()] == [2, 1]
+
+
+def test_blocked_participant_leaves_places():
+    scoreboard = make_scoreboard(3)
+    scoreboard.record_answer(2, question_id=1, is_correct=True, weight=1, time=1)
+    assert scoreboard.position(2) == 1
+    scoreboard.remove(2)
+
+    assert scoreboard.position(2) is None
+    assert [entry.participant_id for entry in scoreboard.standings()] == [1, 3]
+
+
+def test_places_match_full_sort_after_random_answers():
+    rng = random.Random(3)
+    scoreboard = make_scoreboard(200)
+    for question_id in range(1, 6):
+        for _ in range(500):
+            scoreboard.record_answer(rng.randint(1, 200), question_id=question_id, is_correct=rng.random() < 0.5,
+                                     weight=rng.randint(1, 3), time=rng.randint(0, 20))
+            if rng.random() < 0.05:
+                scoreboard.top(3)  # чтение посреди вопроса, как кадр тика
+        scoreboard.close_question(question_id=question_id, time_question=20)
+
+    expected = sorted(range(1, 201), key=lambda p: (-scoreboard.score(p), scoreboard.total_time(p), p))
+    assert [entry.participant_id for entry in scoreboard.standings()] == expected
+    assert [scoreboard.position(p) for p in expected] == list(range(1, 201))
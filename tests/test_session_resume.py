@@ -0,0 +1,54 @@
+import asyncio
+
+from auth.schemas import ResumeTokenData
+from models import UserRoleEnum
+from websocket.connection_registry import ConnectionRegistry
+from websocket.moderation_manager import ModerationManager
+from websocket.InteractiveSession import Stage
+from websocket.session_manager import SessionManager
+
+
+class FakeBus:
+    """Пересылающий процесс: сессией владеет другой процесс, блокировки в общем множестве"""
+
+    def __init__(self, blocked: set[int] | None = None, down: bool = False):
+        self.blocked = blocked or set()
+        self.down = down
+
+    async def get_stage(self, interactive_id: int) -> str:
+        return Stage.QUESTION.value
+
+    async def is_blocked(self, interactive_id: int, participant_id: int) -> bool:
+        if self.down:
+            raise ConnectionError("redis is down")
+        return participant_id in self.blocked
+
+
+def make_relay(bus: FakeBus) -> SessionManager:
+    manager = SessionManager(ModerationManager())
+    manager.bus = bus
+    manager.active_connections[7] = ConnectionRegistry()
+    return manager
+
+
+def make_token(participant_id: int) -> ResumeTokenData:
+    return ResumeTokenData(user_id=5, participant_id=participant_id, interactive_id=7, role=UserRoleEnum.participant)
+
+
+def test_relay_resumes_participant():
+    manager = make_relay(FakeBus())
+    participant = asyncio.run(manager.resume(7, make_token(50)))
+    assert participant.participant_id == 50
+    assert not participant.is_blocked
+
+
+def test_relay_rejects_participant_blocked_by_owner():
+    # блокировка прошла у владельца до того, как этот процесс получил событие
+    manager = make_relay(FakeBus(blocked={50}))
+    assert asyncio.run(manager.resume(7, make_token(50))) is None
+    assert asyncio.run(manager.resume(7, make_token(51))) is not None
+
+
+def test_relay_falls_back_to_admission_without_redis():
+    manager = make_relay(FakeBus(down=True))
+    assert asyncio.run(manager.resume(7, make_token(50))) is None
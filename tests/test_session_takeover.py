@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+
+from websocket import session_manager as module
+from websocket.connection_registry import ConnectionRegistry
+from websocket.moderation_manager import ModerationManager
+from websocket.session_manager import SessionManager
+from websocket.state_push import StatePush
+
+
+class FakeBus:
+    """Аренда, которую этот процесс получает с попытки free_after"""
+
+    def __init__(self, free_after: int):
+        self.free_after = free_after
+        self.attempts = 0
+        self.events: list[str] = []
+
+    async def acquire(self, interactive_id: int) -> bool:
+        self.attempts += 1
+        return self.attempts >= self.free_after
+
+    async def release(self, interactive_id: int):
+        self.events.append("release")
+
+    def stop_listening(self, interactive_id: int):
+        self.events.append("stop_listening")
+
+    def listen_frames(self, interactive_id: int, handler):
+        self.events.append("listen_frames")
+
+    def listen_moderation(self, handler):
+        pass
+
+    async def set_online(self, interactive_id: int, count: int):
+        pass
+
+
+class FakeCheckpoints:
+    def __init__(self, live_ids: list[int]):
+        self.ids = live_ids
+        self.deleted: list[int] = []
+
+    async def live_ids(self) -> list[int]:
+        return self.ids
+
+    async def delete(self, interactive_id: int):
+        self.deleted.append(interactive_id)
+
+
+@pytest.fixture
+def manager(monkeypatch) -> SessionManager:
+    monkeypatch.setattr(module, "LEASE_REFRESH", 0.01)
+    monkeypatch.setattr(module, "OWNER_LEASE", 0.01)
+    manager = SessionManager(ModerationManager())
+    manager.conducted = False
+    manager.created: list[int] = []
+
+    async def get_interactive_conducted(interactive_id: int):
+        return manager.conducted
+
+    async def create_session(interactive_id: int):
+        manager.created.append(interactive_id)
+        manager.interactive_sessions[interactive_id] = object()
+        manager.active_connections.setdefault(interactive_id, ConnectionRegistry())
+
+    monkeypatch.setattr(module.Repository, "get_interactive_conducted", get_interactive_conducted)
+    monkeypatch.setattr(manager, "_create_session", create_session)
+    return manager
+
+
+def make_relay(manager: SessionManager, interactive_id: int, registry: ConnectionRegistry):
+    manager.active_connections[interactive_id] = registry
+    manager.push_states[interactive_id] = StatePush()
+    manager._watch_owner(interactive_id)
+
+
+def test_relay_takes_over_after_owner_lease_expires(manager):
+    manager.bus = FakeBus(free_after=3)
+    registry = ConnectionRegistry()
+
+    async def scenario():
+        make_relay(manager, 7, registry)
+        for _ in range(100):
+            if manager.created:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert manager.created == [7]
+    assert manager.bus.attempts == 3
+    assert manager.bus.events == ["stop_listening"]
+    assert manager.active_connections[7] is registry  # сокеты клиентов этого процесса не потерялись
+
+
+def test_relay_of_finished_interactive_is_closed(manager):
+    manager.bus = FakeBus(free_after=1)
+    manager.checkpoints = FakeCheckpoints([])
+    manager.conducted = True
+
+    async def scenario():
+        make_relay(manager, 7, ConnectionRegistry())
+        for _ in range(100):
+            if 7 not in manager.active_connections:
+                break
+            await asyncio.sleep(0.01)
+
+    asyncio.run(scenario())
+    assert manager.created == []
+    assert 7 not in manager.active_connections
+    assert manager.checkpoints.deleted == [7]
+    assert "release" in manager.bus.events
+
+
+def test_restart_retries_restore_after_lease(manager):
+    manager.bus = FakeBus(free_after=2)  # при старте аренда упавшего владельца ещё жива
+    manager.checkpoints = FakeCheckpoints([7])
+
+    async def scenario():
+        await manager.start()
+        assert manager.created == []
+        await manager._retry_restore
+
+    asyncio.run(scenario())
+    assert manager.created == [7]
+
+
+class FakeOwnerBus:
+    """Владелец в другом процессе: owners - кто держит аренду при очередной проверке, None - аренда снята"""
+
+    def __init__(self, owners: list[str | None]):
+        self.owners = owners
+        self.sent: list[dict] = []
+
+    async def get_owner(self, interactive_id: int) -> str | None:
+        return self.owners.pop(0) if len(self.owners) > 1 else self.owners[0]
+
+    async def send_to_owner(self, interactive_id: int, payload: dict):
+        self.sent.append(payload)
+
+
+def test_relay_delete_waits_for_owner_release(manager, monkeypatch):
+    monkeypatch.setattr(module, "DELETE_POLL", 0.001)
+    manager.bus = FakeOwnerBus(["a", "a", "a", None])
+
+    assert asyncio.run(manager.disconnect_delete(7))
+    assert manager.bus.owners == [None]  # вернулся только после снятия аренды
+    assert manager.bus.sent == [{"type": "delete"}]
+
+
+def test_relay_delete_resends_to_new_owner(manager, monkeypatch):
+    monkeypatch.setattr(module, "DELETE_POLL", 0.001)
+    manager.bus = FakeOwnerBus(["a", "a", "b", "b", None])  # прежний владелец упал, сессию забрал другой
+
+    assert asyncio.run(manager.disconnect_delete(7))
+    assert [payload["type"] for payload in manager.bus.sent] == ["delete", "delete"]
+
+
+def test_relay_delete_gives_up_if_owner_never_releases(manager, monkeypatch):
+    monkeypatch.setattr(module, "DELETE_POLL", 0.001)
+    manager.bus = FakeOwnerBus(["a"])
+
+    assert not asyncio.run(manager.disconnect_delete(7))
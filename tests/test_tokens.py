@@ -0,0 +1,36 @@
+import jwt
+
+from auth.auth_config import ALGORITHM, SECRET_KEY
+from auth.schemas import ResumeTokenData
+from auth.untils import create_access_token, create_resume_token, decode_resume_token, decode_token, \
+    decode_token_for_participant, decode_token_for_reset
+from users.schemas import UserRoleEnum
+
+
+def make_resume_token() -> str:
+    return create_resume_token(ResumeTokenData(user_id=5, participant_id=50, interactive_id=7,
+                                               role=UserRoleEnum.participant))
+
+
+def test_resume_token_round_trip():
+    data = decode_resume_token(make_resume_token())
+    assert data == ResumeTokenData(user_id=5, participant_id=50, interactive_id=7, role=UserRoleEnum.participant)
+
+
+def test_resume_token_is_rejected_by_other_decoders():
+    token = make_resume_token()
+    assert decode_token_for_reset(token) is None
+    assert decode_token_for_participant(token) is None
+    assert decode_token(token) is None
+
+
+def test_resume_type_is_rejected_even_with_main_key():
+    token = jwt.encode({"user_id": 5, "type": "resume"}, SECRET_KEY, algorithm=ALGORITHM)
+    assert decode_token_for_reset(token) is None
+    assert decode_resume_token(token) is None  # подписан не ключом resume-токенов
+
+
+def test_other_tokens_are_not_resume_tokens():
+    reset = create_access_token({"user_id": 5})
+    assert decode_token_for_reset(reset) == 5
+    assert decode_resume_token(reset) is None